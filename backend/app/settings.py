@@ -132,6 +132,14 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+
+CACHES = {
+    'default': env.cache('CACHE_URL', default='locmemcache://'),
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
@@ -184,3 +192,31 @@ MEDIA_ROOT = BASE_DIR / 'media'
 
 FEED_ENGINE_URL = env('FEED_ENGINE_URL', default='http://localhost:8001')
 FEED_ENGINE_TOKEN = env('FEED_ENGINE_TOKEN', default='feed-engine-token')
+FEED_ENGINE_TIMEOUT = env.float('FEED_ENGINE_TIMEOUT', default=5.0)
+FEED_ENGINE_CONNECT_TIMEOUT = env.float('FEED_ENGINE_CONNECT_TIMEOUT', default=1.0)
+# 同步命令上传数据的读取超时
+FEED_ENGINE_SYNC_TIMEOUT = env.float('FEED_ENGINE_SYNC_TIMEOUT', default=120.0)
+# 搜索请求的重试次数和退避基数（秒）
+FEED_ENGINE_RETRIES = env.int('FEED_ENGINE_RETRIES', default=2)
+FEED_ENGINE_RETRY_BACKOFF = env.float('FEED_ENGINE_RETRY_BACKOFF', default=0.05)
+# 连续失败多少次后打开熔断器，以及熔断持续的秒数
+FEED_ENGINE_BREAKER_THRESHOLD = env.int('FEED_ENGINE_BREAKER_THRESHOLD', default=5)
+FEED_ENGINE_BREAKER_COOLDOWN = env.float('FEED_ENGINE_BREAKER_COOLDOWN', default=30.0)
+FEED_ENGINE_MAX_WORKERS = env.int('FEED_ENGINE_MAX_WORKERS', default=8)
+# 进程内推荐后端的索引目录，仅在 FEED_ENGINE_URL 以 local:// 开头时使用
+FEED_ENGINE_LOCAL_PATH = Path(env('FEED_ENGINE_LOCAL_PATH', default=BASE_DIR / 'feed-engine'))
+
+# View counts
+# 浏览次数在内存中累计，超过间隔（秒）或达到次数后批量写入数据库
+VIEW_COUNT_FLUSH_INTERVAL = env.float('VIEW_COUNT_FLUSH_INTERVAL', default=5.0)
+VIEW_COUNT_FLUSH_EVENTS = env.int('VIEW_COUNT_FLUSH_EVENTS', default=100)
+
+# History
+# 每个用户保留的浏览历史条数，由 prunehistory 命令定期清理
+HISTORY_MAX_PER_USER = env.int('HISTORY_MAX_PER_USER', default=1000)
+
+# Feed cache
+
+FEED_CACHE_TTL = env.int('FEED_CACHE_TTL', default=60)
+FEED_CACHE_STALE_TTL = env.int('FEED_CACHE_STALE_TTL', default=600)
+FEED_CACHE_LOCK_TIMEOUT = env.int('FEED_CACHE_LOCK_TIMEOUT', default=30)
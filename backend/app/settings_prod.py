@@ -21,6 +21,11 @@ DATABASES = {
     }
 }
 
+# 使用数据库缓存在多个 gunicorn 工作进程之间共享动态缓存。
+CACHES = {
+    'default': env.cache('CACHE_URL', default='dbcache://django_cache'),
+}
+
 MEDIA_URL = env('MEDIA_URL', default='/media/')
 
 FEED_ENGINE_URL = env('FEED_ENGINE_URL')
@@ -22,6 +22,8 @@ from django.urls import include, path
 from drf_spectacular.views import (SpectacularAPIView, SpectacularRedocView,
                                    SpectacularSwaggerView)
 
+from utils.metrics import get_metrics
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/v1/user/', include('user.urls')),
@@ -35,4 +37,5 @@ urlpatterns = [
          SpectacularSwaggerView.as_view(url_name='schema'), name='swagger-ui'),
     path('api/schema/redoc/', SpectacularRedocView.as_view(url_name='schema'), name='redoc'),
     path('api/v1/comments/', include('comment.urls')),
+    path('api/v1/metrics', get_metrics, name='get_metrics'),
 ] + static('media/', document_root=settings.MEDIA_ROOT)
@@ -11,6 +11,11 @@ import os
 
 from django.core.wsgi import get_wsgi_application
 
+from utils.view_counts import start_flush_thread
+
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'app.settings')
 
 application = get_wsgi_application()
+
+# 每个 gunicorn 工作进程在导入时启动自己的写入线程。
+start_flush_thread()
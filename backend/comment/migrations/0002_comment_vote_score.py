@@ -0,0 +1,35 @@
+# Generated by Django 5.1.2 on 2026-10-17 21:20
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+
+def populate_vote_score(apps, schema_editor):
+    Comment = apps.get_model('comment', 'Comment')
+    Vote = apps.get_model('comment', 'Vote')
+
+    vote_sums = (
+        Vote.objects
+        .filter(comment=OuterRef('pk'))
+        .values('comment')
+        .annotate(total=Sum('value'))
+        .values('total')
+    )
+    Comment.objects.update(vote_score=Coalesce(Subquery(vote_sums), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('comment', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='vote_score',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(populate_vote_score, migrations.RunPython.noop),
+    ]
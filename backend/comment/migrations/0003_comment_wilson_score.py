@@ -0,0 +1,82 @@
+# Generated by Django 5.1.2 on 2026-10-17 21:23
+
+import math
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def wilson_score(upvotes, downvotes, z=1.96):
+    """
+    与 comment.utils.wilson_score 相同，迁移不依赖会变化的应用代码。
+    """
+    n = upvotes + downvotes
+    if n == 0:
+        return 0.0
+
+    p = upvotes / n
+    z2 = z * z
+    center = p + z2 / (2 * n)
+    margin = z * math.sqrt((p * (1 - p) + z2 / (4 * n)) / n)
+    return (center - margin) / (1 + z2 / n)
+
+
+def populate_vote_counts(apps, schema_editor):
+    Comment = apps.get_model('comment', 'Comment')
+
+    comments = (
+        Comment.objects
+        .annotate(
+            up=Count('votes', filter=Q(votes__value=1)),
+            down=Count('votes', filter=Q(votes__value=-1)),
+        )
+        .filter(Q(up__gt=0) | Q(down__gt=0))
+        .only('pk')
+    )
+    updated = []
+    for comment in comments.iterator():
+        comment.upvotes = comment.up
+        comment.downvotes = comment.down
+        comment.wilson_score = wilson_score(comment.up, comment.down)
+        updated.append(comment)
+    Comment.objects.bulk_update(updated, ['upvotes', 'downvotes', 'wilson_score'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('comment', '0002_comment_vote_score'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='downvotes',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='upvotes',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='wilson_score',
+            field=models.FloatField(default=0.0),
+        ),
+        migrations.RunPython(populate_vote_counts, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['resource', 'parent', '-created_at', '-id'], name='comment_new_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['resource', 'parent', '-wilson_score', '-created_at', '-id'], name='comment_top_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['parent', '-created_at', '-id'], name='comment_reply_idx'),
+        ),
+    ]
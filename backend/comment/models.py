@@ -1,5 +1,21 @@
 from django.conf import settings
 from django.db import models
+from django.db.models import OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+class CommentQuerySet(models.QuerySet):
+    def with_votes(self, user):
+        """
+        加载作者，并附带当前用户的投票 ``user_vote``，未投票或未登录时为 0。
+        """
+        queryset = self.select_related('author')
+        if not user.is_authenticated:
+            return queryset.annotate(user_vote=Value(0))
+        return queryset.annotate(user_vote=Coalesce(
+            Subquery(Vote.objects.filter(comment=OuterRef('pk'), user=user).values('value')[:1]),
+            0,
+        ))
 
 
 class Comment(models.Model):
@@ -19,9 +35,24 @@ class Comment(models.Model):
         'self', null=True, blank=True, on_delete=models.CASCADE)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # 投票统计，投票时在同一个事务中更新
+    vote_score = models.IntegerField(default=0)
+    upvotes = models.IntegerField(default=0)
+    downvotes = models.IntegerField(default=0)
+    # 好评率 Wilson 置信区间的下界，用于按热度排序
+    wilson_score = models.FloatField(default=0.0)
+
+    objects = CommentQuerySet.as_manager()
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['resource', 'parent', '-created_at', '-id'],
+                         name='comment_new_idx'),
+            models.Index(fields=['resource', 'parent', '-wilson_score', '-created_at', '-id'],
+                         name='comment_top_idx'),
+            models.Index(fields=['parent', '-created_at', '-id'], name='comment_reply_idx'),
+        ]
 
 
 class Vote(models.Model):
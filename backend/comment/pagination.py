@@ -0,0 +1,143 @@
+import base64
+import json
+from collections.abc import Sequence
+from typing import Any, Optional
+
+from django.core.exceptions import ValidationError
+from django.db import models
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+from utils.exceptions import CustomValidationError
+
+# 排序方式对应的字段，全部按降序排列，最后用 id 区分相同的值
+COMMENT_ORDERINGS = {
+    'new': ('created_at', 'id'),
+    'top': ('wilson_score', 'created_at', 'id'),
+}
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    payload = json.dumps([value.isoformat() if hasattr(value, 'isoformat') else value
+                          for value in values])
+    return base64.urlsafe_b64encode(payload.encode()).decode()
+
+
+def decode_cursor(cursor: str, model: type[models.Model], fields: Sequence[str]) -> list[Any]:
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if not isinstance(values, list) or len(values) != len(fields):
+            raise ValueError
+        return [model._meta.get_field(field).to_python(value)
+                for field, value in zip(fields, values)]
+    except (ValueError, TypeError, json.JSONDecodeError, ValidationError):
+        raise NotFound('无效的游标。')
+
+
+def get_cursor(obj: models.Model, fields: Sequence[str]) -> str:
+    return encode_cursor([getattr(obj, field) for field in fields])
+
+
+def filter_after(queryset: models.QuerySet, fields: Sequence[str], values: Sequence[Any]):
+    """
+    只保留按 ``fields`` 降序排列时位于 ``values`` 之后的记录。
+    """
+    condition = Q()
+    for i, field in enumerate(fields):
+        equal = {prefix: value for prefix, value in zip(fields[:i], values[:i])}
+        condition |= Q(**equal, **{f'{field}__lt': values[i]})
+    return queryset.filter(condition)
+
+
+class CommentCursorPagination(BasePagination):
+    """
+    评论的游标分页，按 ``?ordering=new|top`` 排序。
+
+    游标记录上一页最后一条评论的排序字段，下一页直接从索引中的该位置开始读取，
+    与页数无关。
+    """
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+    def get_ordering(self, request: Request) -> str:
+        ordering = request.query_params.get('ordering', 'new')
+        if ordering not in COMMENT_ORDERINGS:
+            orderings = ', '.join(COMMENT_ORDERINGS)
+            raise CustomValidationError({'ordering': [f'排序方式必须是 {orderings} 之一。']})
+        return ordering
+
+    def get_page_size(self, request: Request) -> int:
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(max(page_size, 1), self.max_page_size)
+
+    def paginate_queryset(self, queryset, request, view=None) -> list[Any]:
+        self.request = request
+        self.fields = COMMENT_ORDERINGS[self.get_ordering(request)]
+        page_size = self.get_page_size(request)
+
+        queryset = queryset.order_by(*(f'-{field}' for field in self.fields))
+        if cursor := request.query_params.get('cursor'):
+            values = decode_cursor(cursor, queryset.model, self.fields)
+            queryset = filter_after(queryset, self.fields, values)
+
+        page = list(queryset[:page_size + 1])
+        self.next_cursor: Optional[str] = None
+        if len(page) > page_size:
+            page = page[:page_size]
+            self.next_cursor = get_cursor(page[-1], self.fields)
+        return page
+
+    def get_next_link(self) -> Optional[str]:
+        if self.next_cursor is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, 'cursor', self.next_cursor)
+
+    def get_paginated_response(self, data) -> Response:
+        return Response({
+            'next': self.get_next_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                'name': 'cursor',
+                'required': False,
+                'in': 'query',
+                'description': '分页游标',
+                'schema': {'type': 'string'},
+            },
+            {
+                'name': 'ordering',
+                'required': False,
+                'in': 'query',
+                'description': '排序方式，new 按时间，top 按好评率',
+                'schema': {'type': 'string', 'enum': list(COMMENT_ORDERINGS)},
+            },
+            {
+                'name': self.page_size_query_param,
+                'required': False,
+                'in': 'query',
+                'description': '每页的评论数',
+                'schema': {'type': 'integer'},
+            },
+        ]
@@ -1,25 +1,35 @@
+from django.urls import reverse
+from drf_spectacular.utils import extend_schema_field
 from rest_framework import serializers
+from rest_framework.utils.urls import replace_query_param
 
 from comment.models import Comment, Vote
+from comment.pagination import COMMENT_ORDERINGS, get_cursor
 from user.serializers import UserSerializer
 
+# 评论列表中每个顶层评论附带的回复数
+REPLY_PREVIEW_SIZE = 3
+REPLY_ORDERING = tuple(f'-{field}' for field in COMMENT_ORDERINGS['new'])
+
 
 class CommentSerializer(serializers.ModelSerializer):
     author = UserSerializer(read_only=True)
-    vote_count = serializers.SerializerMethodField()
+    vote_count = serializers.IntegerField(source='vote_score', read_only=True)
     user_vote = serializers.SerializerMethodField()
     replies = serializers.SerializerMethodField()
+    replies_next = serializers.SerializerMethodField()
 
     class Meta:
         model = Comment
         fields = ['id', 'resource', 'content', 'author', 'parent',
-                  'created_at', 'updated_at', 'vote_count', 'user_vote', 'replies']
+                  'created_at', 'updated_at', 'vote_count', 'user_vote', 'replies',
+                  'replies_next']
         read_only_fields = ['author', 'resource']
 
-    def get_vote_count(self, obj):
-        return sum(vote.value for vote in obj.votes.all())
-
     def get_user_vote(self, obj):
+        if hasattr(obj, 'user_vote'):
+            return obj.user_vote
+
         request = self.context.get('request')
         if request and request.user.is_authenticated:
             try:
@@ -29,12 +39,42 @@ class CommentSerializer(serializers.ModelSerializer):
                 pass
         return 0
 
+    def get_reply_preview(self, obj) -> list[Comment]:
+        """
+        最新的 REPLY_PREVIEW_SIZE + 1 条回复，多出的一条用于判断是否还有更多回复。
+        """
+        if hasattr(obj, 'prefetched_replies'):
+            return obj.prefetched_replies
+
+        replies = Comment.objects.filter(parent=obj).order_by(*REPLY_ORDERING)
+        if request := self.context.get('request'):
+            replies = replies.with_votes(request.user)
+        obj.prefetched_replies = list(replies[:REPLY_PREVIEW_SIZE + 1])
+        return obj.prefetched_replies
+
     def get_replies(self, obj):
-        if obj.parent is None:  # Only get replies for top-level comments
-            replies = Comment.objects.filter(parent=obj)
+        if obj.parent_id is None:  # Only get replies for top-level comments
+            replies = self.get_reply_preview(obj)[:REPLY_PREVIEW_SIZE]
             return CommentSerializer(replies, many=True, context=self.context).data
         return []
 
+    @extend_schema_field(serializers.URLField(allow_null=True))
+    def get_replies_next(self, obj):
+        """
+        还有更多回复时，返回获取后续回复的链接。
+        """
+        if obj.parent_id is not None:
+            return None
+        replies = self.get_reply_preview(obj)
+        if len(replies) <= REPLY_PREVIEW_SIZE:
+            return None
+
+        url = reverse('comment-replies', kwargs={'resource': obj.resource, 'pk': obj.pk})
+        if request := self.context.get('request'):
+            url = request.build_absolute_uri(url)
+        cursor = get_cursor(replies[REPLY_PREVIEW_SIZE - 1], COMMENT_ORDERINGS['new'])
+        return replace_query_param(url, 'cursor', cursor)
+
     def to_representation(self, instance):
         # 确保单个对象返回时不是列表
         ret = super().to_representation(instance)
@@ -1,8 +1,11 @@
 from django.urls import reverse
+from django.utils.timezone import now, timedelta
 from rest_framework import status
 from rest_framework.test import APIClient, APITestCase
 
 from comment.models import Comment, Vote
+from comment.serializers import REPLY_PREVIEW_SIZE
+from comment.utils import wilson_score
 from user.models import User
 
 
@@ -47,8 +50,11 @@ class CommentTests(APITestCase):
         response = self.client.get(url)
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)  # 只返回顶层评论
-        self.assertEqual(len(response.data[0]['replies']), 1)  # 包含一个回复
+        results = response.data['results']
+        self.assertEqual(len(results), 1)  # 只返回顶层评论
+        self.assertEqual(len(results[0]['replies']), 1)  # 包含一个回复
+        self.assertIsNone(results[0]['replies_next'])
+        self.assertIsNone(response.data['next'])
 
     def test_create_comment(self):
         """测试创建新评论"""
@@ -218,3 +224,124 @@ class CommentTests(APITestCase):
         # 再次获取评论详情检查最终投票数
         response = self.client.get(url)
         self.assertEqual(response.data['vote_count'], 0)  # 1 + (-1) = 0
+
+    def test_list_comments_query_count(self):
+        """测试评论列表的查询次数不随评论数增加"""
+        for i in range(10):
+            parent = Comment.objects.create(
+                resource=self.resource, content=f'Comment {i}', author=self.user1)
+            for j in range(3):
+                reply = Comment.objects.create(
+                    resource=self.resource, content=f'Reply {i}.{j}', author=self.user2,
+                    parent=parent)
+                Vote.objects.create(comment=reply, user=self.user1, value=Comment.VOTE_UP)
+        Comment.objects.filter(parent__isnull=False).update(vote_score=1)
+
+        self.client.force_authenticate(user=self.user1)
+        url = reverse('comment-list', kwargs={'resource': self.resource})
+        with self.assertNumQueries(2):  # 顶层评论 + 回复
+            response = self.client.get(url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 11)
+        replies = response.data['results'][0]['replies']
+        self.assertEqual(len(replies), 3)
+        self.assertEqual((replies[0]['vote_count'], replies[0]['user_vote']), (1, 1))
+        self.assertEqual(replies[0]['author']['username'], 'testuser2')
+
+    def test_vote_score_is_maintained(self):
+        """测试投票、改票和取消投票时更新评论的总分"""
+        url = reverse('comment-vote', kwargs={'resource': self.resource, 'pk': self.comment1.id})
+        for user, value, expected in [
+            (self.user1, Comment.VOTE_UP, 1),
+            (self.user2, Comment.VOTE_UP, 2),
+            (self.user1, Comment.VOTE_UP, 2),
+            (self.user1, Comment.VOTE_DOWN, 0),
+            (self.user2, Comment.VOTE_CANCEL, -1),
+            (self.user2, Comment.VOTE_CANCEL, -1),
+        ]:
+            self.client.force_authenticate(user=user)
+            response = self.client.post(url, {'value': value})
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(response.data['vote_count'], expected)
+            self.assertEqual(response.data['user_vote'], value)
+
+        self.comment1.refresh_from_db()
+        self.assertEqual(self.comment1.vote_score, -1)
+
+    def test_paginate_comments(self):
+        """测试按时间和好评率分页获取顶层评论"""
+        base = now() - timedelta(days=1)
+        comments = []
+        for i in range(5):
+            comment = Comment.objects.create(
+                resource=self.resource, content=f'Comment {i}', author=self.user1)
+            comments.append(comment)
+        Comment.objects.filter(pk=self.comment1.pk).update(created_at=base)
+        for i, comment in enumerate(comments):
+            # 后两条评论的创建时间相同，依靠 id 区分
+            Comment.objects.filter(pk=comment.pk).update(
+                created_at=base + timedelta(minutes=min(i + 1, 4)))
+        Comment.objects.filter(pk=comments[0].pk).update(upvotes=10, wilson_score=0.72)
+        Comment.objects.filter(pk=comments[2].pk).update(upvotes=1, wilson_score=0.2)
+
+        url = reverse('comment-list', kwargs={'resource': self.resource})
+
+        def get_all(params):
+            ids = []
+            next_url = url
+            while next_url:
+                response = self.client.get(next_url, params if next_url == url else None)
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                self.assertLessEqual(len(response.data['results']), 2)
+                ids += [comment['id'] for comment in response.data['results']]
+                next_url = response.data['next']
+            return ids
+
+        newest_first = [c.pk for c in reversed(comments)] + [self.comment1.pk]
+        self.assertEqual(get_all({'page_size': 2}), newest_first)
+
+        top = [comments[0].pk, comments[2].pk]
+        top += [pk for pk in newest_first if pk not in top]
+        self.assertEqual(get_all({'page_size': 2, 'ordering': 'top'}), top)
+
+        response = self.client.get(url, {'ordering': 'old'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get(url, {'cursor': 'invalid'})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_truncated_replies(self):
+        """测试评论列表只附带最新的几条回复，其余回复通过 replies_next 分页获取"""
+        for i in range(REPLY_PREVIEW_SIZE + 2):
+            Comment.objects.create(
+                resource=self.resource, content=f'Reply {i}', author=self.user2,
+                parent=self.comment1)
+        expected = list(
+            Comment.objects.filter(parent=self.comment1)
+            .order_by('-created_at', '-id').values_list('pk', flat=True)
+        )
+
+        url = reverse('comment-list', kwargs={'resource': self.resource})
+        response = self.client.get(url)
+        comment = response.data['results'][0]
+        self.assertEqual([reply['id'] for reply in comment['replies']],
+                         expected[:REPLY_PREVIEW_SIZE])
+
+        response = self.client.get(comment['replies_next'])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([reply['id'] for reply in response.data['results']],
+                         expected[REPLY_PREVIEW_SIZE:])
+        self.assertIsNone(response.data['next'])
+
+    def test_wilson_score(self):
+        """测试投票后更新好评率下界"""
+        self.assertEqual(wilson_score(0, 0), 0.0)
+        self.assertGreater(wilson_score(100, 5), wilson_score(5, 0))
+        self.assertLess(wilson_score(1, 0), wilson_score(10, 1))
+
+        self.client.force_authenticate(user=self.user1)
+        url = reverse('comment-vote', kwargs={'resource': self.resource, 'pk': self.comment1.id})
+        self.client.post(url, {'value': Comment.VOTE_UP})
+        self.comment1.refresh_from_db()
+        self.assertEqual((self.comment1.upvotes, self.comment1.downvotes), (1, 0))
+        self.assertAlmostEqual(self.comment1.wilson_score, wilson_score(1, 0))
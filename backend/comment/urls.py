@@ -6,6 +6,10 @@ comment_vote = CommentViewSet.as_view({
     'post': 'vote'
 })
 
+comment_replies = CommentViewSet.as_view({
+    'get': 'replies'
+})
+
 comment_detail = CommentViewSet.as_view({
     'get': 'retrieve',
     'patch': 'partial_update',
@@ -19,6 +23,7 @@ comment_list = CommentViewSet.as_view({
 
 urlpatterns = [
     path('<path:resource>/<int:pk>/vote/', comment_vote, name='comment-vote'),
+    path('<path:resource>/<int:pk>/replies/', comment_replies, name='comment-replies'),
     path('<path:resource>/<int:pk>/', comment_detail, name='comment-detail'),
     path('<path:resource>/', comment_list, name='comment-list'),
 ]
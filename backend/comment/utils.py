@@ -0,0 +1,19 @@
+import math
+
+# 95% 置信水平对应的 z 值
+WILSON_Z = 1.96
+
+
+def wilson_score(upvotes: int, downvotes: int, z: float = WILSON_Z) -> float:
+    """
+    计算好评率 Wilson 置信区间的下界，票数少的评论不会因为偶然的几张赞成票排在前面。
+    """
+    n = upvotes + downvotes
+    if n == 0:
+        return 0.0
+
+    p = upvotes / n
+    z2 = z * z
+    center = p + z2 / (2 * n)
+    margin = z * math.sqrt((p * (1 - p) + z2 / (4 * n)) / n)
+    return (center - margin) / (1 + z2 / n)
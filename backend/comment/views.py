@@ -1,3 +1,5 @@
+from django.db import transaction
+from django.db.models import Prefetch
 from drf_spectacular.utils import extend_schema
 from rest_framework import status, viewsets
 from rest_framework.decorators import action
@@ -5,15 +7,19 @@ from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 
 from comment.models import Comment, Vote
-from comment.serializers import CommentSerializer, VoteSerializer
+from comment.pagination import CommentCursorPagination
+from comment.serializers import (REPLY_ORDERING, REPLY_PREVIEW_SIZE,
+                                 CommentSerializer, VoteSerializer)
+from comment.utils import wilson_score
 from utils.exceptions import CustomValidationError
 
 
 class CommentViewSet(viewsets.ModelViewSet):
     serializer_class = CommentSerializer
+    pagination_class = CommentCursorPagination
 
     def get_permissions(self):
-        if self.action in ['list', 'retrieve']:
+        if self.action in ['list', 'retrieve', 'replies']:
             permission_classes = [AllowAny]
         else:
             permission_classes = [IsAuthenticated]
@@ -21,11 +27,21 @@ class CommentViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         resource = self.kwargs.get('resource')
-        if self.action in ['retrieve', 'update', 'partial_update', 'destroy', 'vote']:
+        queryset = Comment.objects.filter(resource=resource).with_votes(self.request.user)
+        if self.action in ['list', 'retrieve', 'vote']:
+            # 每个评论的前几条回复用一条查询加载，按父评论分组，多取一条用于判断是否还有更多回复
+            replies = (
+                Comment.objects
+                .with_votes(self.request.user)
+                .order_by(*REPLY_ORDERING)[:REPLY_PREVIEW_SIZE + 1]
+            )
+            queryset = queryset.prefetch_related(
+                Prefetch('comment_set', queryset=replies, to_attr='prefetched_replies'))
+        if self.action in ['retrieve', 'update', 'partial_update', 'destroy', 'vote', 'replies']:
             # 对于单个评论的操作，返回所有评论
-            return Comment.objects.filter(resource=resource)
+            return queryset
         # 对于列表操作，只返回顶层评论
-        return Comment.objects.filter(resource=resource, parent=None)
+        return queryset.filter(parent=None)
 
     def perform_create(self, serializer):
         resource = self.kwargs.get('resource')
@@ -77,27 +93,59 @@ class CommentViewSet(viewsets.ModelViewSet):
             raise CustomValidationError(serializer.errors)
 
         value = serializer.validated_data['value']
-        if value == Comment.VOTE_CANCEL:
-            # 取消投票
-            comment.votes.filter(user=request.user).delete()
-        else:
-            vote, created = Vote.objects.update_or_create(
-                comment=comment,
-                user=request.user,
-                defaults={'value': value}
+        with transaction.atomic():
+            # 锁定评论，同一评论的投票依次更新统计
+            locked = (
+                Comment.objects
+                .select_for_update()
+                .only('pk', 'upvotes', 'downvotes')
+                .get(pk=comment.pk)
             )
+            vote = Vote.objects.filter(comment=comment, user=request.user).first()
+            previous = vote.value if vote else Comment.VOTE_CANCEL
+
+            if value == Comment.VOTE_CANCEL:
+                # 取消投票
+                if vote:
+                    vote.delete()
+            elif vote:
+                vote.value = value
+                vote.save(update_fields=['value'])
+            else:
+                Vote.objects.create(comment=comment, user=request.user, value=value)
+
+            if value != previous:
+                locked.upvotes += (value == Comment.VOTE_UP) - (previous == Comment.VOTE_UP)
+                locked.downvotes += (value == Comment.VOTE_DOWN) - (previous == Comment.VOTE_DOWN)
+                locked.vote_score = locked.upvotes - locked.downvotes
+                locked.wilson_score = wilson_score(locked.upvotes, locked.downvotes)
+                locked.save(update_fields=['upvotes', 'downvotes', 'vote_score', 'wilson_score'])
 
         # Return updated comment data
+        comment = self.get_queryset().get(pk=comment.pk)
         comment_serializer = CommentSerializer(comment, context={'request': request})
         return Response(comment_serializer.data, status=status.HTTP_200_OK)
 
     def list(self, request, *args, **kwargs):
         """
-        获取资源的评论列表，返回所有顶层评论，以及每个顶层评论的回复。
+        分页获取资源的顶层评论，每个顶层评论附带最新的几条回复，更多回复通过 replies_next 获取。
+
+        ordering 为 new 时按发布时间排序，为 top 时按好评率排序。
         """
-        queryset = self.get_queryset()
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
+        page = self.paginate_queryset(self.get_queryset())
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+    @action(detail=True, methods=['get'])
+    def replies(self, request, resource, pk=None):
+        """
+        分页获取评论的回复。
+        """
+        comment = self.get_object()
+        queryset = Comment.objects.filter(parent=comment).with_votes(request.user)
+        page = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
 
     def retrieve(self, request, *args, **kwargs):
         """
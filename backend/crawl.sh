@@ -4,7 +4,7 @@ github_langs="python,javascript,java,go,ruby,php,swift,typescript,c,cpp,csharp,s
 github_periods="daily,weekly,monthly"
 
 echo "Crawling arXiv e-prints..."
-python -m crawler.arxiv --catchup --save
+python -m crawler.arxiv --oai --save
 
 echo "Crawling GitHub..."
 python -m crawler.github --lang ${github_langs//,/ } --since ${github_periods//,/ } --save
@@ -12,3 +12,9 @@ python -m crawler.github --lang ${github_langs//,/ } --since ${github_periods//,
 echo "Syncing crawled data..."
 python manage.py syncarxiv
 python manage.py syncgithub
+
+echo "Refreshing hot scores..."
+python manage.py refreshhotscores
+
+echo "Pruning browsing history..."
+python manage.py prunehistory
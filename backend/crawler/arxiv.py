@@ -1,6 +1,5 @@
 import itertools
 import json
-import multiprocessing
 import re
 import sys
 import xml.etree.ElementTree as ET
@@ -8,23 +7,32 @@ from datetime import datetime, timedelta
 from typing import Iterator, NamedTuple, Optional
 from urllib.parse import urljoin
 
+import requests
 from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
 from tqdm import tqdm
 
 from pub.schema import ArxivAuthorSchema, ArxivEntrySchema
 
-from . import common
+from . import common, oai
+from .fetcher import AdaptiveFetcher, TokenBucket
+
+ARXIV_API_URL = "https://export.arxiv.org/api/query"
+ARXIV_OAI_URL = "https://oaipmh.arxiv.org/oai"
+ARXIV_OAI_NS = {"arXiv": "http://arxiv.org/OAI/arXiv/"}
+# OAI-PMH 抓取的检查点
+OAI_CHECKPOINT = "arxiv-oai"
+# arXiv API 要求每 3 秒不超过一个请求
+ARXIV_API_RATE = 1 / 3
 
 session = common.get_session()
 
 
 def fetch_arxiv_metadata(arxiv_ids: list[str]) -> list[ArxivEntrySchema]:
-    url = "https://export.arxiv.org/api/query"
     data = {"id_list": ",".join(arxiv_ids), "max_results": len(arxiv_ids)}
 
-    response = session.post(url, data=data)
-    if response.status_code != 200:
-        raise Exception(f"Failed to fetch metadata: {response.status_code}")
+    response = session.post(ARXIV_API_URL, data=data)
+    response.raise_for_status()
 
     root = ET.fromstring(response.text)
     ns = {
@@ -108,41 +116,152 @@ def main(args):
 
     if args.output:
         out_file = open(args.output, "w")
+    else:
+        out_file = None
 
-    if args.save or args.catchup:
+    if args.save or args.catchup or args.oai:
         common.setup_database()
 
-    if args.catchup:
-        id_ranges = get_catchup_id_ranges()
+    follower_index = None
+    if args.save:
+        from feed.utils import build_follower_index
+
+        # 每次抓取只构建一次关注者索引，所有批次共用
+        follower_index = build_follower_index()
+
+    if args.oai:
+        harvest(args, out_file, follower_index)
     else:
-        if any(arg is None for arg in (args.month, args.start, args.end)):
-            raise ValueError("Month, start, and end must be specified")
-        id_ranges = [ArxivIdRange(args.month, args.start, args.end)]
+        if args.catchup:
+            id_ranges = get_catchup_id_ranges()
+        else:
+            if any(arg is None for arg in (args.month, args.start, args.end)):
+                raise ValueError("Month, start, and end must be specified")
+            id_ranges = [ArxivIdRange(args.month, args.start, args.end)]
+
+        fetcher = make_fetcher(args)
+        for id_range in id_ranges:
+            fetch_and_save(
+                fetcher, id_range.arxiv_ids(), args, out_file,
+                desc=f"Fetching {id_range.month} ({id_range.start}-{id_range.end})",
+                follower_index=follower_index,
+            )
+
+    if out_file is not None:
+        out_file.close()
 
+
+def make_fetcher(args) -> AdaptiveFetcher[ArxivEntrySchema]:
+    """
+    创建 arXiv API 的抓取器，所有线程共享同一个令牌桶和连接池。
+    """
+    adapter = HTTPAdapter(pool_maxsize=args.jobs)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return AdaptiveFetcher(
+        fetch_arxiv_metadata,
+        TokenBucket(ARXIV_API_RATE),
+        max_concurrency=args.jobs,
+    )
+
+
+def fetch_and_save(
+    fetcher: AdaptiveFetcher,
+    arxiv_ids: list[str],
+    args,
+    out_file,
+    desc: str,
+    follower_index=None,
+):
     def filter_result(metadata: ArxivEntrySchema):
         return metadata["primary_category"].startswith(args.category + ".")
 
-    with multiprocessing.Pool(processes=args.jobs) as pool:
-        for id_range in id_ranges:
-            batches = itertools.batched(id_range.arxiv_ids(), args.batch)
-            batches = [list(batch) for batch in batches]
+    batches = itertools.batched(arxiv_ids, args.batch)
+    progress = tqdm(total=len(arxiv_ids), desc=desc, unit="id")
+    failed_before = len(fetcher.failed)
 
-            for results in tqdm(
-                pool.imap_unordered(fetch_arxiv_metadata, batches),
-                total=len(batches),
-                desc=f"Fetching {id_range.month} ({id_range.start}-{id_range.end})",
-            ):
-                filtered_results = list(filter(filter_result, results))
+    for batch, results in fetcher.fetch(batches):
+        progress.update(len(batch))
+        filtered_results = list(filter(filter_result, results))
 
-                if args.save:
-                    save_results_to_db(filtered_results)
+        if args.save:
+            save_results_to_db(filtered_results, follower_index)
 
-                if args.output:
-                    for result in filtered_results:
-                        print(json.dumps(result), file=out_file)
+        if out_file is not None:
+            for result in filtered_results:
+                print(json.dumps(result), file=out_file)
 
-    if args.output:
-        out_file.close()
+    progress.close()
+    if failed := len(fetcher.failed) - failed_before:
+        print(f"Failed to fetch {failed} entries", file=sys.stderr)
+
+
+def harvest(args, out_file, follower_index=None):
+    """
+    通过 OAI-PMH 抓取检查点之后新增或更新的论文，全部保存后更新检查点。
+    """
+    from_date = args.from_date or get_oai_checkpoint()
+    if from_date is None:
+        raise ValueError("No checkpoint found, use --from to specify the start date")
+
+    arxiv_ids, datestamp = harvest_arxiv_ids(args.category, from_date)
+
+    fetcher = make_fetcher(args)
+    fetch_and_save(
+        fetcher, arxiv_ids, args, out_file,
+        desc=f"Fetching updates since {from_date}",
+        follower_index=follower_index,
+    )
+
+    # 有论文抓取失败时不更新检查点，下次从原来的检查点重新抓取
+    if args.save and datestamp is not None and not fetcher.failed:
+        save_oai_checkpoint(datestamp)
+
+
+def harvest_arxiv_ids(category: str, from_date: str) -> tuple[list[str], Optional[str]]:
+    """
+    获取 ``from_date`` 之后新增或更新的、主分类属于 ``category`` 的论文 ID，以及其中最新的时间戳。
+
+    OAI-PMH 的 arXiv 格式不包含版本号，完整的元数据仍通过 API 按 ID 获取最新版本，
+    但只请求确实有变化的论文。
+    """
+    arxiv_ids = []
+    latest_datestamp = None
+
+    for record in tqdm(
+        oai.list_records(ARXIV_OAI_URL, "arXiv", set_spec=category, from_date=from_date),
+        desc=f"Harvesting {category} since {from_date}",
+    ):
+        if latest_datestamp is None or record.datestamp > latest_datestamp:
+            latest_datestamp = record.datestamp
+        if record.deleted or record.metadata is None:
+            continue
+
+        categories = record.metadata.find("arXiv:categories", ARXIV_OAI_NS).text.split()
+        # 第一个分类是主分类，跳过从其他分类交叉列出的论文
+        if categories and categories[0].startswith(category + "."):
+            arxiv_ids.append(record.metadata.find("arXiv:id", ARXIV_OAI_NS).text.strip())
+
+    return arxiv_ids, latest_datestamp
+
+
+def get_oai_checkpoint() -> Optional[str]:
+    from pub.models import ArxivEntry, HarvestCheckpoint
+
+    checkpoint = HarvestCheckpoint.objects.filter(source=OAI_CHECKPOINT).first()
+    if checkpoint is not None:
+        return checkpoint.datestamp.isoformat()
+
+    # 第一次使用 OAI-PMH 抓取时，从已有论文中最新的更新日期开始
+    latest_entry = ArxivEntry.objects.order_by("-updated").only("updated").first()
+    return latest_entry.updated.date().isoformat() if latest_entry is not None else None
+
+
+def save_oai_checkpoint(datestamp: str):
+    from pub.models import HarvestCheckpoint
+
+    HarvestCheckpoint.objects.update_or_create(
+        source=OAI_CHECKPOINT, defaults={"datestamp": datestamp})
 
 
 def get_catchup_id_ranges() -> Iterator[ArxivIdRange]:
@@ -191,10 +310,15 @@ def get_month_end_index(month: datetime) -> int:
     return int(last_entry_id.split(".")[-1]) + 1000
 
 
-def save_results_to_db(results: list[ArxivEntrySchema]):
+def save_results_to_db(results: list[ArxivEntrySchema], follower_index=None):
+    """
+    写入论文及其作者，并写入关注者的收件箱。``follower_index`` 为空时重新构建关注者索引。
+    """
     from django.db import transaction
 
+    from feed.utils import fan_out_follow_inbox
     from pub.models import ArxivEntry, ArxivEntryAuthor
+    from pub.sync import SYNC_SOURCES, delete_resources, mark_index_changes
 
     entries: list[ArxivEntry] = []
     author_instances: list[ArxivEntryAuthor] = []
@@ -203,12 +327,73 @@ def save_results_to_db(results: list[ArxivEntrySchema]):
         entry = ArxivEntry(**result)
         entry.make_slug()
         entries.append(entry)
+
+    # 作者、分类、PDF 链接等元数据也可能更新，全部写入；只有索引内容变化的论文需要重新同步
+    mark_index_changes(SYNC_SOURCES["arxiv"], entries)
+    for entry in entries:
         author_instances.extend(entry.make_authors())
 
+    PK = "arxiv_id"
     with transaction.atomic():
-        ArxivEntry.objects.bulk_create(entries, ignore_conflicts=True)
+        ArxivEntry.objects.bulk_create(
+            entries,
+            update_conflicts=True,
+            update_fields=ArxivEntrySchema.__annotations__.keys() - {PK} | {"index_hash", "synced"},
+            unique_fields={PK} if common.supports_bulk_create_unique_fields() else None
+        )
         ArxivEntryAuthor.objects.filter(arxiv_entry__in=entries).delete()
         ArxivEntryAuthor.objects.bulk_create(author_instances)
+        fan_out_follow_inbox(author_instances, follower_index)
+        old_ids = delete_old_versions([entry.arxiv_id for entry in entries])
+
+    if old_ids:
+        try:
+            delete_resources(SYNC_SOURCES["arxiv"], old_ids)
+        except requests.RequestException as e:
+            # 推荐后端中多出的条目会在下次对账时删除
+            print(f"Failed to delete old versions from the feed engine: {e}", file=sys.stderr)
+
+
+def split_version(arxiv_id: str) -> tuple[str, int]:
+    """
+    将 arXiv ID 拆分为不带版本号的 ID 和版本号。
+    """
+    m = re.fullmatch(r"(.+)v(\d+)", arxiv_id)
+    if not m:
+        return arxiv_id, 0
+    return m.group(1), int(m.group(2))
+
+
+def delete_old_versions(arxiv_ids: list[str]) -> list[str]:
+    """
+    删除已入库的论文的旧版本，返回删除的论文 ID。
+
+    浏览历史合并到新版本，作者、收件箱和热点追踪得分随旧版本级联删除。
+    """
+    from history.models import History
+    from pub.models import ArxivEntry
+    from user.counters import recount_user_counters
+
+    latest_ids = {}
+    for arxiv_id in arxiv_ids:
+        base_id, version = split_version(arxiv_id)
+        for old_version in range(1, version):
+            latest_ids[f"{base_id}v{old_version}"] = arxiv_id
+
+    old_ids = list(ArxivEntry.objects.filter(pk__in=latest_ids).values_list("pk", flat=True))
+    merged_users = set()
+    for old_id in old_ids:
+        histories = History.objects.filter(arxiv_entry=old_id)
+        # 同时浏览过新旧版本的用户只保留新版本的记录
+        duplicates = histories.filter(user__in=History.objects.filter(
+            arxiv_entry=latest_ids[old_id]).values("user"))
+        merged_users.update(duplicates.values_list("user", flat=True))
+        duplicates.delete()
+        histories.update(arxiv_entry=latest_ids[old_id])
+    ArxivEntry.objects.filter(pk__in=old_ids).delete()
+    if merged_users:
+        recount_user_counters(merged_users, fields=["history_count"])
+    return old_ids
 
 
 def parse_args(args=None):
@@ -222,8 +407,14 @@ def parse_args(args=None):
         "--catchup", action="store_true",
         help="Catch up to the latest index (requires --save, overrides --month, --start, --end)")
     parser.add_argument("-b", "--batch", type=int, default=200, help="Batch size")
+    parser.add_argument(
+        "--oai", action="store_true",
+        help="Harvest new and updated entries via OAI-PMH since the last checkpoint")
+    parser.add_argument(
+        "--from", dest="from_date", type=str,
+        help="Harvest entries updated since this date (YYYY-MM-DD, overrides the checkpoint)")
     parser.add_argument("--category", type=str, default="cs", help="Primary category")
-    parser.add_argument("-j", "--jobs", type=int, default=4, help="Number of jobs")
+    parser.add_argument("-j", "--jobs", type=int, default=4, help="Maximum concurrent requests")
     parser.add_argument("-o", "--output", type=str, help="Output file path")
     parser.add_argument("--save", action="store_true", help="Save to database")
     return parser.parse_args(args)
@@ -1,5 +1,7 @@
 import requests
 
+from utils.db import supports_bulk_create_unique_fields  # noqa: F401
+
 USER_AGENT = 'AcademicExpressCrawler/1.0'
 
 _session: requests.Session = None
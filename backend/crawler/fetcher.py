@@ -0,0 +1,155 @@
+"""
+自适应的并发抓取器。
+
+所有请求先从共享的令牌桶中获取令牌，保证整体请求速率不超过目标站点的限制；
+服务器返回 429/503 时按 Retry-After 暂停所有请求。并发数按 AIMD 调整：
+每个成功的批次增加 ``1 / 并发数``，每次失败减半。失败的批次拆成两半重试，
+只有单独失败多次的 ID 被放弃，不会中断整个抓取。
+"""
+import sys
+import threading
+import time
+from collections import deque
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import (FIRST_COMPLETED, Future, ThreadPoolExecutor,
+                                wait)
+from typing import Generic, Optional, TypeVar
+
+T = TypeVar("T")
+
+# 限流响应的状态码
+THROTTLE_STATUS_CODES = frozenset({429, 503})
+# 没有 Retry-After 时第一次重试前的等待时间（秒），之后每次翻倍
+DEFAULT_BACKOFF = 5.0
+
+
+class TokenBucket:
+    """
+    线程安全的令牌桶，每秒补充 ``rate`` 个令牌，最多积累 ``capacity`` 个。
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        capacity: float = 1,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self.rate = rate
+        self.capacity = capacity
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._tokens = capacity
+        self._updated = clock()
+        self._paused_until = 0.0
+
+    def acquire(self):
+        """
+        获取一个令牌，没有令牌或暂停期间阻塞。
+        """
+        while True:
+            with self._lock:
+                now = self._clock()
+                if now < self._paused_until:
+                    delay = self._paused_until - now
+                else:
+                    elapsed = now - max(self._updated, self._paused_until)
+                    self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+                    self._updated = now
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        return
+                    delay = (1 - self._tokens) / self.rate
+            self._sleep(delay)
+
+    def pause(self, seconds: float):
+        """
+        暂停发放令牌，暂停期间不积累令牌。
+        """
+        with self._lock:
+            self._paused_until = max(self._paused_until, self._clock() + seconds)
+            self._tokens = 0
+
+
+def is_throttled(error: Exception) -> bool:
+    response = getattr(error, "response", None)
+    return response is not None and response.status_code in THROTTLE_STATUS_CODES
+
+
+def get_retry_after(response) -> Optional[float]:
+    try:
+        return max(float(response.headers["Retry-After"]), 0)
+    except (KeyError, ValueError):
+        return None
+
+
+class AdaptiveFetcher(Generic[T]):
+    """
+    并发地按批次调用 ``fetch_batch``，按完成顺序返回 (批次, 结果)。
+
+    限流的批次在等待后原样重试；其他失败的批次拆成两半重试，单个 ID 失败
+    ``max_attempts`` 次后记入 ``failed``。
+    """
+
+    def __init__(
+        self,
+        fetch_batch: Callable[[list[str]], list[T]],
+        bucket: TokenBucket,
+        max_concurrency: int = 4,
+        max_attempts: int = 3,
+        backoff: float = DEFAULT_BACKOFF,
+    ):
+        self.fetch_batch = fetch_batch
+        self.bucket = bucket
+        self.max_concurrency = max_concurrency
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.concurrency = 1.0
+        self.failed: list[str] = []
+
+    def fetch(self, batches: Iterable[list[str]]) -> Iterator[tuple[list[str], list[T]]]:
+        queue = deque((list(batch), 0) for batch in batches)
+        in_flight: dict[Future, tuple[list[str], int]] = {}
+
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
+            while queue or in_flight:
+                while queue and len(in_flight) < int(self.concurrency):
+                    batch, attempt = queue.popleft()
+                    in_flight[executor.submit(self._call, batch)] = (batch, attempt)
+
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    batch, attempt = in_flight.pop(future)
+                    try:
+                        results = future.result()
+                    except Exception as e:
+                        self._retry(queue, batch, attempt, e)
+                    else:
+                        # 加性增加：每完成一轮（约 concurrency 个批次）并发数加一
+                        self.concurrency = min(
+                            self.max_concurrency, self.concurrency + 1 / self.concurrency)
+                        yield batch, results
+
+    def _call(self, batch: list[str]) -> list[T]:
+        self.bucket.acquire()
+        return self.fetch_batch(batch)
+
+    def _retry(self, queue: deque, batch: list[str], attempt: int, error: Exception):
+        # 乘性减少
+        self.concurrency = max(1.0, self.concurrency / 2)
+
+        if is_throttled(error) and attempt + 1 < self.max_attempts:
+            retry_after = get_retry_after(error.response)
+            self.bucket.pause(self.backoff * 2 ** attempt if retry_after is None else retry_after)
+            queue.appendleft((batch, attempt + 1))
+        elif len(batch) > 1:
+            middle = len(batch) // 2
+            queue.appendleft((batch[middle:], 0))
+            queue.appendleft((batch[:middle], 0))
+        elif attempt + 1 < self.max_attempts:
+            self.bucket.pause(self.backoff * 2 ** attempt)
+            queue.appendleft((batch, attempt + 1))
+        else:
+            print(f"Failed to fetch {batch[0]}: {error}", file=sys.stderr)
+            self.failed.extend(batch)
@@ -117,6 +117,7 @@ def main(args):
 
 def save_results_to_db(results: list[GithubRepoSchema]):
     from pub.models import GithubRepo
+    from pub.sync import SYNC_SOURCES, mark_index_changes
 
     entries: list[GithubRepo] = []
 
@@ -124,23 +125,17 @@ def save_results_to_db(results: list[GithubRepoSchema]):
         entry = GithubRepo(**result)
         entries.append(entry)
 
+    # Star 数等统计每次都会变化，全部写入；只有索引内容变化的仓库需要重新同步
+    mark_index_changes(SYNC_SOURCES["github"], entries)
+
     PK = "repo_id"
     GithubRepo.objects.bulk_create(
         entries,
         update_conflicts=True,
-        update_fields=GithubRepoSchema.__annotations__.keys() - {PK},
+        update_fields=GithubRepoSchema.__annotations__.keys() - {PK} | {"index_hash", "synced"},
         # XXX: Workaround for bulk_create unique_fields issue
         # https://docs.djangoproject.com/en/5.1/ref/models/querysets/#bulk-create
-        unique_fields={PK} if supports_bulk_create_unique_fields() else None
-    )
-
-
-def supports_bulk_create_unique_fields():
-    from django.conf import settings
-
-    return settings.DATABASES["default"]["ENGINE"] in (
-        "django.db.backends.postgresql",
-        "django.db.backends.sqlite3",
+        unique_fields={PK} if common.supports_bulk_create_unique_fields() else None
     )
 
 
@@ -0,0 +1,98 @@
+"""
+OAI-PMH 协议的 ListRecords 客户端。
+"""
+import time
+import xml.etree.ElementTree as ET
+from typing import Iterator, NamedTuple, Optional
+
+import requests
+
+from . import common
+
+OAI_NS = {"oai": "http://www.openarchives.org/OAI/2.0/"}
+
+# 服务器返回 503 且没有 Retry-After 时的等待时间（秒）
+DEFAULT_RETRY_AFTER = 10
+MAX_RETRIES = 5
+
+
+class OAIError(Exception):
+    def __init__(self, code: str, message: str):
+        super().__init__(f"{code}: {message}")
+        self.code = code
+
+
+class OAIRecord(NamedTuple):
+    identifier: str
+    datestamp: str
+    deleted: bool
+    metadata: Optional[ET.Element]
+
+
+def list_records(
+    base_url: str,
+    metadata_prefix: str,
+    set_spec: Optional[str] = None,
+    from_date: Optional[str] = None,
+    session: Optional[requests.Session] = None,
+) -> Iterator[OAIRecord]:
+    """
+    获取 ``from_date`` 之后新增、修改或删除的记录，自动跟随 resumptionToken 翻页。
+    """
+    session = session or common.get_session()
+
+    params = {"verb": "ListRecords", "metadataPrefix": metadata_prefix}
+    if set_spec is not None:
+        params["set"] = set_spec
+    if from_date is not None:
+        params["from"] = from_date
+
+    while True:
+        root = request(session, base_url, params)
+
+        error = root.find("oai:error", OAI_NS)
+        if error is not None:
+            # 没有符合条件的记录不是错误
+            if error.get("code") == "noRecordsMatch":
+                return
+            raise OAIError(error.get("code"), (error.text or "").strip())
+
+        records = root.find("oai:ListRecords", OAI_NS)
+        for record in records.findall("oai:record", OAI_NS):
+            yield parse_record(record)
+
+        token = records.find("oai:resumptionToken", OAI_NS)
+        if token is None or not (token.text or "").strip():
+            return
+        params = {"verb": "ListRecords", "resumptionToken": token.text.strip()}
+
+
+def request(session: requests.Session, base_url: str, params: dict[str, str]) -> ET.Element:
+    """
+    发送请求，服务器返回 503 时按 Retry-After 等待后重试。
+    """
+    for attempt in range(MAX_RETRIES + 1):
+        response = session.get(base_url, params=params)
+        if response.status_code == 503 and attempt < MAX_RETRIES:
+            time.sleep(get_retry_after(response))
+            continue
+        response.raise_for_status()
+        return ET.fromstring(response.content)
+
+
+def get_retry_after(response: requests.Response) -> float:
+    try:
+        return max(float(response.headers["Retry-After"]), 0)
+    except (KeyError, ValueError):
+        return DEFAULT_RETRY_AFTER
+
+
+def parse_record(record: ET.Element) -> OAIRecord:
+    header = record.find("oai:header", OAI_NS)
+    metadata = record.find("oai:metadata", OAI_NS)
+    return OAIRecord(
+        identifier=header.find("oai:identifier", OAI_NS).text.strip(),
+        datestamp=header.find("oai:datestamp", OAI_NS).text.strip(),
+        deleted=header.get("status") == "deleted",
+        metadata=metadata[0] if metadata is not None and len(metadata) else None,
+    )
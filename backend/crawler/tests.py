@@ -0,0 +1,253 @@
+import threading
+import time
+from datetime import date
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from unittest import mock
+from urllib.parse import parse_qsl, urlsplit
+
+import requests
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+
+from pub.models import ArxivEntry, ArxivEntryAuthor, HarvestCheckpoint
+
+from . import arxiv
+from .fetcher import AdaptiveFetcher, TokenBucket
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures" / "arxiv-oai"
+
+
+class FixtureServer:
+    """
+    回放录制的响应的本地 HTTP 服务器。
+
+    ``routes`` 将 (路径, 请求参数) 映射到响应列表，同一个请求重复出现时依次返回，最后一个响应重复使用。
+    响应为 (状态码, 响应头, fixture 文件名)。
+    """
+
+    def __init__(self, routes: dict[tuple[str, frozenset], list[tuple[int, dict, str]]]):
+        self.routes = {key: list(responses) for key, responses in routes.items()}
+        self.requests: list[tuple[str, dict[str, str]]] = []
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                self.replay(urlsplit(self.path).query)
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                self.replay(self.rfile.read(length).decode())
+
+            def replay(self, query: str):
+                path = urlsplit(self.path).path
+                params = dict(parse_qsl(urlsplit(self.path).query))
+                params.update(parse_qsl(query))
+                server.requests.append((path, params))
+
+                responses = server.routes.get((path, frozenset(params.items())))
+                if not responses:
+                    self.send_error(404)
+                    return
+                status_code, headers, filename = (
+                    responses.pop(0) if len(responses) > 1 else responses[0])
+                body = (FIXTURES_DIR / filename).read_bytes() if filename else b""
+
+                self.send_response(status_code)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def list_records_params(**params) -> frozenset:
+    return frozenset({"verb": "ListRecords", **params}.items())
+
+
+def harvest_params(from_date: str) -> frozenset:
+    return list_records_params(metadataPrefix="arXiv", set="cs", **{"from": from_date})
+
+
+class ArxivHarvestTests(TestCase):
+    def setUp(self) -> None:
+        self.server = FixtureServer({
+            ("/oai", harvest_params("2024-01-01")): [
+                # 第一次请求时服务器要求稍后重试
+                (503, {"Retry-After": "0"}, None),
+                (200, {}, "list-records-1.xml"),
+            ],
+            ("/oai", list_records_params(resumptionToken="6543210|1001")): [
+                (200, {}, "list-records-2.xml"),
+            ],
+            ("/oai", harvest_params("2024-01-03")): [
+                (200, {}, "no-records.xml"),
+            ],
+            ("/api/query", frozenset({
+                "id_list": "2401.00001,2401.00004",
+                "max_results": "2",
+            }.items())): [
+                (200, {}, "api-query.xml"),
+            ],
+        })
+        self.addCleanup(self.server.close)
+
+        patcher = mock.patch.multiple(
+            arxiv,
+            ARXIV_OAI_URL=f"{self.server.url}/oai",
+            ARXIV_API_URL=f"{self.server.url}/api/query",
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def harvest(self, *args: str):
+        arxiv.main(arxiv.parse_args(["--oai", "--save", "-j", "1", *args]))
+
+    def test_harvest(self):
+        """测试只获取有变化的 cs 论文的元数据，用新版本替换旧版本，并在抓取完成后保存检查点"""
+        old_entry = ArxivEntry.objects.create(
+            arxiv_id="2401.00001v1", title="Old", summary="", authors=[{"name": "Old Author"}],
+            published=timezone.now(), updated=timezone.now(), primary_category="cs.LG",
+            categories=["cs.LG"], link="https://arxiv.org/abs/2401.00001v1",
+            pdf="https://arxiv.org/pdf/2401.00001v1",
+        )
+        ArxivEntryAuthor.objects.bulk_create(old_entry.make_authors())
+        with (
+            mock.patch("feed.utils.build_follower_index", return_value={}) as build_index,
+            mock.patch("pub.sync.delete_resources") as delete_resources,
+        ):
+            self.harvest("--from", "2024-01-01")
+        # 关注者索引每次抓取只构建一次
+        build_index.assert_called_once()
+        # 旧版本从推荐后端中删除
+        self.assertEqual(delete_resources.call_args.args[1], ["2401.00001v1"])
+        self.assertFalse(ArxivEntryAuthor.objects.filter(arxiv_entry="2401.00001v1").exists())
+
+        self.assertEqual(
+            set(ArxivEntry.objects.values_list("arxiv_id", flat=True)),
+            {"2401.00001v2", "2401.00004v1"},
+        )
+        self.assertEqual(
+            HarvestCheckpoint.objects.get(source=arxiv.OAI_CHECKPOINT).datestamp,
+            date(2024, 1, 3),
+        )
+        self.assertEqual(
+            [path for path, _ in self.server.requests],
+            ["/oai", "/oai", "/oai", "/api/query"],
+        )
+
+    def test_resume_from_checkpoint(self):
+        """测试没有指定日期时从检查点开始抓取，没有新记录时不请求元数据"""
+        HarvestCheckpoint.objects.create(source=arxiv.OAI_CHECKPOINT, datestamp=date(2024, 1, 3))
+
+        self.harvest()
+
+        self.assertEqual(self.server.requests, [("/oai", {
+            "verb": "ListRecords",
+            "metadataPrefix": "arXiv",
+            "set": "cs",
+            "from": "2024-01-03",
+        })])
+        self.assertFalse(ArxivEntry.objects.exists())
+
+
+def throttled_error(retry_after: str) -> requests.HTTPError:
+    response = requests.Response()
+    response.status_code = 503
+    response.headers["Retry-After"] = retry_after
+    return requests.HTTPError(response=response)
+
+
+class AdaptiveFetcherTests(SimpleTestCase):
+    def fetch_all(self, fetcher: AdaptiveFetcher, batches: list[list[str]]) -> list[str]:
+        return sorted(result for _, results in fetcher.fetch(batches) for result in results)
+
+    def test_token_bucket(self):
+        """测试令牌桶限制请求速率，暂停期间不积累令牌"""
+        current_time = 0.0
+        sleeps = []
+
+        def sleep(seconds):
+            nonlocal current_time
+            sleeps.append(seconds)
+            current_time += seconds
+
+        bucket = TokenBucket(rate=2, clock=lambda: current_time, sleep=sleep)
+        for _ in range(3):
+            bucket.acquire()
+        self.assertEqual(current_time, 1.0)
+
+        bucket.pause(5)
+        bucket.acquire()
+        self.assertEqual(current_time, 6.5)
+
+    def test_split_failing_batch(self):
+        """测试失败的批次被拆分，只放弃单独失败的 ID"""
+        calls = []
+
+        def fetch_batch(batch):
+            calls.append(batch)
+            if "bad" in batch:
+                raise ValueError("Malformed response")
+            return batch
+
+        fetcher = AdaptiveFetcher(
+            fetch_batch, TokenBucket(rate=1000), max_attempts=2, backoff=0)
+        results = self.fetch_all(fetcher, [["a", "b", "bad", "c"], ["d"]])
+
+        self.assertEqual(results, ["a", "b", "c", "d"])
+        self.assertEqual(fetcher.failed, ["bad"])
+        self.assertEqual(calls.count(["bad"]), 2)
+
+    def test_retry_after(self):
+        """测试限流的批次在 Retry-After 之后原样重试，并降低并发数"""
+        calls = []
+
+        def fetch_batch(batch):
+            calls.append((batch, time.monotonic()))
+            if len(calls) == 4:
+                raise throttled_error("0.2")
+            return batch
+
+        fetcher = AdaptiveFetcher(fetch_batch, TokenBucket(rate=1000, capacity=10),
+                                  max_concurrency=4)
+        batches = [[str(i)] for i in range(8)]
+        results = self.fetch_all(fetcher, batches)
+
+        self.assertEqual(results, [str(i) for i in range(8)])
+        self.assertEqual(fetcher.failed, [])
+        self.assertEqual(len(calls), 9)
+        throttled_batch, throttled_at = calls[3]
+        retried_at = next(at for batch, at in calls[4:] if batch == throttled_batch)
+        self.assertGreaterEqual(retried_at - throttled_at, 0.2)
+
+    def test_aimd(self):
+        """测试并发数在成功时逐步增加，失败时减半"""
+        fail = threading.Event()
+
+        def fetch_batch(batch):
+            if fail.is_set():
+                fail.clear()
+                raise throttled_error("0")
+            return batch
+
+        fetcher = AdaptiveFetcher(fetch_batch, TokenBucket(rate=1000, capacity=10),
+                                  max_concurrency=4)
+        self.fetch_all(fetcher, [[str(i)] for i in range(20)])
+        self.assertEqual(fetcher.concurrency, 4)
+
+        fail.set()
+        self.fetch_all(fetcher, [["x"]])
+        self.assertLess(fetcher.concurrency, 4)
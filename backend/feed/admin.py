@@ -1,3 +1,25 @@
-from django.contrib import admin  # noqa: F401
+from django.contrib import admin
 
-# Register your models here.
+from .models import FollowInboxItem, HotScore, TopicCandidates
+
+
+class FollowInboxItemAdmin(admin.ModelAdmin):
+    list_display = ('user', 'arxiv_entry', 'timestamp')
+    search_fields = ('user__username', 'arxiv_entry__arxiv_id')
+    raw_id_fields = ('user', 'arxiv_entry')
+
+
+class HotScoreAdmin(admin.ModelAdmin):
+    list_display = ('origin', 'arxiv_entry', 'github_repo', 'velocity', 'score', 'computed_at')
+    list_filter = ('origin',)
+    raw_id_fields = ('arxiv_entry', 'github_repo')
+
+
+class TopicCandidatesAdmin(admin.ModelAdmin):
+    list_display = ('topic', 'computed_at')
+    search_fields = ('topic',)
+
+
+admin.site.register(FollowInboxItem, FollowInboxItemAdmin)
+admin.site.register(HotScore, HotScoreAdmin)
+admin.site.register(TopicCandidates, TopicCandidatesAdmin)
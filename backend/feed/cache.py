@@ -0,0 +1,59 @@
+import time
+from typing import Any, Callable
+
+from django.conf import settings
+from django.core.cache import cache
+
+from utils import metrics
+
+FEED_CACHE_GENERATION_KEY = 'feed:generation'
+
+
+def get_cached_feed(endpoint: str, variant: str, compute: Callable[[], Any]) -> Any:
+    """
+    从共享缓存中获取对所有匿名访客相同的动态，缓存按 ``endpoint`` 和 ``variant`` 区分。
+
+    缓存在 ``FEED_CACHE_TTL`` 秒内视为新鲜；过期后的 ``FEED_CACHE_STALE_TTL`` 秒内，
+    只有抢到刷新锁的一个工作进程重新计算，其他进程继续返回旧的结果。
+    """
+    generation = cache.get_or_set(FEED_CACHE_GENERATION_KEY, 0, timeout=None)
+    key = f'feed:{generation}:{endpoint}:{variant}'
+    lock_key = f'{key}:lock'
+    locked = False
+
+    cached = cache.get(key)
+    if cached is not None:
+        fresh_until, payload = cached
+        if time.time() < fresh_until:
+            metrics.incr(f'feed.cache.hit.{endpoint}')
+            return payload
+
+        locked = cache.add(lock_key, True, timeout=settings.FEED_CACHE_LOCK_TIMEOUT)
+        if not locked:
+            metrics.incr(f'feed.cache.stale.{endpoint}')
+            return payload
+
+    metrics.incr(f'feed.cache.miss.{endpoint}')
+    try:
+        payload = compute()
+        cache.set(
+            key,
+            (time.time() + settings.FEED_CACHE_TTL, payload),
+            timeout=settings.FEED_CACHE_TTL + settings.FEED_CACHE_STALE_TTL,
+        )
+    finally:
+        # 缓存缺失时没有获取锁，不能释放其他进程持有的锁。
+        if locked:
+            cache.delete(lock_key)
+
+    return payload
+
+
+def invalidate_feed_cache() -> None:
+    """
+    使所有缓存的动态失效，在推荐后端或热点得分更新后调用。
+    """
+    try:
+        cache.incr(FEED_CACHE_GENERATION_KEY)
+    except ValueError:
+        cache.set(FEED_CACHE_GENERATION_KEY, 1, timeout=None)
@@ -0,0 +1,3 @@
+# TODO: 从话题推荐模型中获取推荐的话题。
+# 没有订阅话题的用户看到的默认话题，它们的候选列表也会被预先计算。
+DEFAULT_TOPICS = ['Machine Learning', 'Computer Vision', 'Natural Language Processing']
@@ -0,0 +1,203 @@
+from datetime import datetime, timedelta
+from typing import Optional
+
+import numpy as np
+from django.db import transaction
+from django.db.models import Avg, F, Q
+from django.utils.timezone import now
+
+from pub.models import ArxivEntry, GithubRepo
+from pub.rollups import get_view_velocities, rollups_cover
+
+from . import ranking
+from .models import HotScore
+
+# 热点追踪只考虑最近 30 天的动态。
+HOT_WINDOW = timedelta(days=30)
+
+# 浏览速度按最近 7 天的独立访客数计算。
+HOT_VELOCITY_WINDOW = timedelta(days=7)
+
+# 时效性得分按天计算，超过该时间未重新计算的得分需要刷新。
+HOT_SCORE_MAX_AGE = timedelta(days=1)
+
+
+def get_hot_velocities(current_time: datetime) -> dict[str, dict[str, int]]:
+    """
+    按来源获取最近 ``HOT_VELOCITY_WINDOW`` 内有浏览的条目的浏览速度。
+
+    浏览汇总还没有覆盖整个速度窗口时（如刚部署之后），用累计浏览次数作为时间窗口内条目的浏览速度，
+    避免热点追踪在积累足够的浏览记录之前为空。
+    """
+    velocities: dict[str, dict[str, int]] = {'arxiv': {}, 'github': {}}
+    for (resource_type, resource_id), velocity in get_view_velocities(
+            HOT_VELOCITY_WINDOW, current_time).items():
+        if velocity > 0:
+            velocities[resource_type][resource_id] = velocity
+
+    if not rollups_cover(HOT_VELOCITY_WINDOW, current_time):
+        window_start = current_time - HOT_WINDOW
+        seeds = {
+            'arxiv': ArxivEntry.objects.filter(published__gte=window_start),
+            'github': GithubRepo.objects.filter(pushed_at__gte=window_start),
+        }
+        for origin, queryset in seeds.items():
+            origin_velocities = velocities[origin]
+            for pk, view_count in queryset.filter(view_count__gt=0).values_list('pk', 'view_count'):
+                origin_velocities[pk] = max(origin_velocities.get(pk, 0), view_count)
+    return velocities
+
+
+def refresh_hot_scores(current_time: Optional[datetime] = None) -> tuple[int, int]:
+    """
+    增量刷新热点追踪得分，返回重新计算和删除的得分数。
+
+    得分中的浏览次数使用最近 ``HOT_VELOCITY_WINDOW`` 内每天独立访客数之和，
+    同一访客反复刷新不会推高得分。只有新出现、浏览速度发生变化或者计算时间超过
+    ``HOT_SCORE_MAX_AGE`` 的条目会被重新计算，随后按来源重新标准化得分。
+    """
+    current_time = current_time or now()
+    window_start = current_time - HOT_WINDOW
+    stale_before = current_time - HOT_SCORE_MAX_AGE
+
+    velocities = get_hot_velocities(current_time)
+    arxiv_velocities = velocities['arxiv']
+    github_velocities = velocities['github']
+
+    def is_stale(item, velocity: int) -> bool:
+        hot_score = getattr(item, 'hot_score', None)
+        return (
+            hot_score is None
+            or hot_score.velocity != velocity
+            or hot_score.computed_at < stale_before
+        )
+
+    arxiv_entries = [
+        entry for entry in (
+            ArxivEntry.objects
+            .filter(pk__in=list(arxiv_velocities), published__gte=window_start)
+            .select_related('hot_score')
+            .only('arxiv_id', 'published', 'hot_score')
+        )
+        if is_stale(entry, arxiv_velocities[entry.pk])
+    ]
+    github_repos = [
+        repo for repo in (
+            GithubRepo.objects
+            .filter(pk__in=list(github_velocities), pushed_at__gte=window_start)
+            .select_related('hot_score')
+            .only('repo_id', 'created_at', 'pushed_at', 'hot_score')
+        )
+        if is_stale(repo, github_velocities[repo.pk])
+    ]
+
+    new_scores: list[HotScore] = []
+    updated_scores: list[HotScore] = []
+
+    def stage(hot_score: HotScore, velocity: int, raw_score: float, timestamp: datetime):
+        is_new = hot_score.pk is None
+        hot_score.velocity = velocity
+        hot_score.raw_score = raw_score
+        hot_score.timestamp = timestamp
+        hot_score.computed_at = current_time
+        (new_scores if is_new else updated_scores).append(hot_score)
+
+    arxiv_scores = ranking.arxiv_hot_scores(
+        np.array([arxiv_velocities[entry.pk] for entry in arxiv_entries], dtype=np.float64),
+        ranking.to_timestamps(entry.published for entry in arxiv_entries),
+        current_time,
+    )
+    for entry, raw_score in zip(arxiv_entries, arxiv_scores):
+        hot_score = getattr(entry, 'hot_score', None) or HotScore(origin='arxiv', arxiv_entry=entry)
+        stage(hot_score, arxiv_velocities[entry.pk], float(raw_score), entry.published)
+
+    github_scores = ranking.github_hot_scores(
+        np.array([github_velocities[repo.pk] for repo in github_repos], dtype=np.float64),
+        ranking.to_timestamps(repo.created_at for repo in github_repos),
+        ranking.to_timestamps(repo.pushed_at for repo in github_repos),
+        current_time,
+    )
+    for repo, raw_score in zip(github_repos, github_scores):
+        hot_score = getattr(repo, 'hot_score', None) or HotScore(origin='github', github_repo=repo)
+        stage(hot_score, github_velocities[repo.pk], float(raw_score), repo.pushed_at)
+
+    with transaction.atomic():
+        # 删除超出时间窗口或者最近没有浏览的得分。
+        deleted, _ = HotScore.objects.filter(
+            Q(timestamp__lt=window_start)
+            | Q(origin='arxiv') & ~Q(arxiv_entry_id__in=list(arxiv_velocities))
+            | Q(origin='github') & ~Q(github_repo_id__in=list(github_velocities))
+        ).delete()
+        HotScore.objects.bulk_create(new_scores, batch_size=1000)
+        HotScore.objects.bulk_update(
+            updated_scores,
+            ['velocity', 'raw_score', 'timestamp', 'computed_at'],
+            batch_size=1000,
+        )
+
+        # 分别标准化两个来源的得分。
+        for origin in ('arxiv', 'github'):
+            normalize_hot_scores(origin)
+
+    return len(new_scores) + len(updated_scores), deleted
+
+
+def compute_hot_scores(limit: int, current_time: Optional[datetime] = None) -> list[HotScore]:
+    """
+    直接计算得分最高的 ``limit`` 个条目的热点追踪得分，不写入数据库。
+
+    用于 refreshhotscores 命令第一次运行之前，得分的计算方式与 ``refresh_hot_scores`` 相同。
+    """
+    current_time = current_time or now()
+    window_start = current_time - HOT_WINDOW
+    velocities = get_hot_velocities(current_time)
+
+    arxiv_entries = list(
+        ArxivEntry.objects
+        .filter(pk__in=list(velocities['arxiv']), published__gte=window_start)
+        .as_cards()
+    )
+    github_repos = list(
+        GithubRepo.objects
+        .filter(pk__in=list(velocities['github']), pushed_at__gte=window_start)
+        .as_cards()
+    )
+
+    arxiv_scores = ranking.z_scores(ranking.arxiv_hot_scores(
+        np.array([velocities['arxiv'][entry.pk] for entry in arxiv_entries], dtype=np.float64),
+        ranking.to_timestamps(entry.published for entry in arxiv_entries),
+        current_time,
+    ))
+    github_scores = ranking.z_scores(ranking.github_hot_scores(
+        np.array([velocities['github'][repo.pk] for repo in github_repos], dtype=np.float64),
+        ranking.to_timestamps(repo.created_at for repo in github_repos),
+        ranking.to_timestamps(repo.pushed_at for repo in github_repos),
+        current_time,
+    ))
+
+    hot_scores = [
+        HotScore(origin='arxiv', arxiv_entry=entry, timestamp=entry.published, score=score)
+        for entry, score in zip(arxiv_entries, arxiv_scores.tolist())
+    ] + [
+        HotScore(origin='github', github_repo=repo, timestamp=repo.pushed_at, score=score)
+        for repo, score in zip(github_repos, github_scores.tolist())
+    ]
+    scores = np.array([hot_score.score for hot_score in hot_scores], dtype=np.float64)
+    return [hot_scores[i] for i in ranking.top_k(scores, limit)]
+
+
+def normalize_hot_scores(origin: str, epsilon: float = 1e-6) -> None:
+    """
+    将某个来源的原始得分标准化为 z-score，与 ``normalize_scores`` 的结果一致。
+    """
+    scores = HotScore.objects.filter(origin=origin)
+    stats = scores.aggregate(
+        mean=Avg('raw_score'),
+        mean_square=Avg(F('raw_score') * F('raw_score')),
+    )
+    if stats['mean'] is None:
+        return
+
+    variance = max(stats['mean_square'] - stats['mean'] ** 2, 0.0)
+    std = variance ** 0.5 + epsilon
+    scores.update(score=(F('raw_score') - stats['mean']) / std)
@@ -0,0 +1,45 @@
+import logging
+from typing import Literal, Union, overload
+
+from pub.models import ArxivEntry, GithubRepo
+from utils import metrics
+
+logger = logging.getLogger(__name__)
+
+
+@overload
+def hydrate_hits(origin: Literal['arxiv'], entry_ids: list[str]) -> list[ArxivEntry]: ...
+
+
+@overload
+def hydrate_hits(origin: Literal['github'], entry_ids: list[str]) -> list[GithubRepo]: ...
+
+
+def hydrate_hits(origin: str, entry_ids: list[str]) -> list[Union[ArxivEntry, GithubRepo]]:
+    """
+    用一次查询加载推荐后端返回的条目的卡片字段，结果保持 ``entry_ids`` 的顺序。
+
+    arXiv 论文按 ``arxiv_id`` 查找，GitHub 仓库按 ``full_name`` 查找。数据库中不存在的条目会被丢弃，
+    并计入 ``feed.hydration.missing.<origin>`` 计数器，以便发现索引与数据库之间的偏差。
+    """
+    if not entry_ids:
+        return []
+
+    match origin:
+        case 'arxiv':
+            items = ArxivEntry.objects.as_cards().in_bulk(entry_ids)
+        case 'github':
+            items = {
+                repo.full_name: repo
+                for repo in GithubRepo.objects.as_cards().filter(full_name__in=entry_ids)
+            }
+        case _:
+            raise ValueError(f'Unknown origin: {origin}')
+
+    hydrated = [items[entry_id] for entry_id in entry_ids if entry_id in items]
+
+    if missing := len(set(entry_ids)) - len(items):
+        metrics.incr(f'feed.hydration.missing.{origin}', missing)
+        logger.warning('%d %s hits are missing from the database', missing, origin)
+
+    return hydrated
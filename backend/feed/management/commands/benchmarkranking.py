@@ -0,0 +1,87 @@
+import argparse
+import random
+import time
+from typing import Callable
+
+import numpy as np
+from django.core.management.base import BaseCommand
+from django.utils.timezone import now, timedelta
+
+from feed import ranking
+from feed.views import get_arxiv_hot_score, normalize_scores
+from pub.models import ArxivEntry
+
+
+class Command(BaseCommand):
+    help = '比较逐条计算和向量化计算热点追踪排序的耗时。'
+
+    def add_arguments(self, parser: argparse.ArgumentParser) -> None:
+        parser.add_argument('--sizes', type=int, nargs='*', default=[10000, 100000])
+        parser.add_argument('--repeat', type=int, default=3)
+        parser.add_argument('--top', type=int, default=50)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        top = options['top']
+
+        for size in options['sizes']:
+            current_time = now()
+            entries = [
+                ArxivEntry(
+                    arxiv_id=f'{i}',
+                    view_count=rng.randint(0, 1000),
+                    published=current_time - timedelta(seconds=rng.uniform(0, 30 * 86400)),
+                )
+                for i in range(size)
+            ]
+
+            def reference() -> list[str]:
+                candidates = [
+                    {'arxiv_id': entry.arxiv_id, '_score': get_arxiv_hot_score(entry)}
+                    for entry in entries
+                ]
+                normalize_scores(candidates)
+                candidates.sort(key=lambda candidate: candidate['_score'], reverse=True)
+                return [candidate['arxiv_id'] for candidate in candidates[:top]]
+
+            def vectorized() -> list[str]:
+                scores = ranking.z_scores(ranking.arxiv_hot_scores(
+                    np.fromiter((entry.view_count for entry in entries), dtype=np.float64),
+                    ranking.to_timestamps(entry.published for entry in entries),
+                    now(),
+                ))
+                return [entries[i].arxiv_id for i in ranking.top_k(scores, top)]
+
+            view_counts = np.fromiter((entry.view_count for entry in entries), dtype=np.float64)
+            published = ranking.to_timestamps(entry.published for entry in entries)
+
+            def vectorized_arrays() -> list[str]:
+                scores = ranking.z_scores(ranking.arxiv_hot_scores(view_counts, published, now()))
+                return [entries[i].arxiv_id for i in ranking.top_k(scores, top)]
+
+            reference_time, reference_ids = self.measure(reference, options['repeat'])
+            vectorized_time, vectorized_ids = self.measure(vectorized, options['repeat'])
+            arrays_time, _ = self.measure(vectorized_arrays, options['repeat'])
+            overlap = len(set(reference_ids) & set(vectorized_ids)) / max(len(reference_ids), 1)
+
+            self.stdout.write(
+                f'{size} candidates: '
+                f'reference {reference_time * 1000:.1f} ms, '
+                f'vectorized {vectorized_time * 1000:.1f} ms, '
+                f'speedup {reference_time / vectorized_time:.1f}x, '
+                f'scoring prebuilt arrays {arrays_time * 1000:.1f} ms, '
+                f'top-{top} overlap {overlap:.0%}'
+            )
+
+    def measure(self, fn: Callable[[], list[str]], repeat: int) -> tuple[float, list[str]]:
+        """
+        返回多次运行中最短的耗时和最后一次运行的结果。
+        """
+        best = float('inf')
+        result: list[str] = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = fn()
+            best = min(best, time.perf_counter() - start)
+        return best, result
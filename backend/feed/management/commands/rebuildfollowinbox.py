@@ -0,0 +1,31 @@
+import argparse
+
+from django.core.management.base import BaseCommand
+from tqdm import tqdm
+
+from feed.utils import rebuild_follow_inbox
+from sub.models import ScholarSubscription
+
+
+class Command(BaseCommand):
+    help = '根据学者关注关系重建用户的关注动态收件箱。'
+
+    def add_arguments(self, parser: argparse.ArgumentParser) -> None:
+        parser.add_argument('--user', type=int, nargs='*', help='只重建指定用户的收件箱')
+
+    def handle(self, *args, **options):
+        if options['user']:
+            user_ids = options['user']
+        else:
+            user_ids = list(
+                ScholarSubscription.objects
+                .values_list('subscriber_id', flat=True)
+                .distinct()
+            )
+
+        total = 0
+        for user_id in tqdm(user_ids, desc='Rebuilding follow inboxes'):
+            total += rebuild_follow_inbox(user_id)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Successfully rebuilt {len(user_ids)} follow inboxes ({total} items).'))
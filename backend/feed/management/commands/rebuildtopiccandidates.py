@@ -0,0 +1,28 @@
+import argparse
+
+from django.core.management.base import BaseCommand
+
+from feed.cache import invalidate_feed_cache
+from feed.topics import ORIGINS, list_missing_topics, rebuild_topic_candidates
+
+
+class Command(BaseCommand):
+    help = '从推荐后端重建话题的推荐候选列表。'
+
+    def add_arguments(self, parser: argparse.ArgumentParser) -> None:
+        parser.add_argument('--topic', nargs='*', help='只重建指定话题的候选列表')
+        parser.add_argument('--origin', choices=ORIGINS, nargs='*', help='只重建指定来源的候选')
+        parser.add_argument(
+            '--missing', action='store_true', help='只召回还没有候选列表的话题（如新订阅的话题）')
+
+    def handle(self, *args, **options):
+        topics = list_missing_topics() if options['missing'] else options['topic'] or None
+        updated = rebuild_topic_candidates(
+            topics=topics,
+            origins=tuple(options['origin'] or ORIGINS),
+        )
+        if updated:
+            invalidate_feed_cache()
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Successfully rebuilt candidates for {updated} topics.'))
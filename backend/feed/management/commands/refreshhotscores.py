@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from feed.cache import invalidate_feed_cache
+from feed.hot import refresh_hot_scores
+from pub.rollups import prune_view_rollups
+
+
+class Command(BaseCommand):
+    help = '增量刷新热点追踪得分，并清理过期的浏览汇总记录。'
+
+    def handle(self, *args, **options):
+        updated, deleted = refresh_hot_scores()
+        pruned = prune_view_rollups()
+        invalidate_feed_cache()
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Successfully refreshed hot scores ({updated} updated, {deleted} expired, '
+            f'{pruned} view rollups pruned).'))
@@ -0,0 +1,34 @@
+# Generated by Django 5.1.2 on 2026-10-17 20:44
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('pub', '0009_resourceclaim'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FollowInboxItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('timestamp', models.DateTimeField(verbose_name='发布时间')),
+                ('scholar_names', models.JSONField(default=list, verbose_name='关注的学者')),
+                ('arxiv_entry', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='pub.arxiventry', verbose_name='ArXiv 论文')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL, verbose_name='用户')),
+            ],
+            options={
+                'verbose_name': '关注动态',
+                'verbose_name_plural': '关注动态',
+                'indexes': [models.Index(fields=['user', '-timestamp'], name='feed_follow_user_id_82b92c_idx')],
+                'unique_together': {('user', 'arxiv_entry')},
+            },
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.1.2 on 2026-10-17 20:49
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feed', '0001_initial'),
+        ('pub', '0009_resourceclaim'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HotScore',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('origin', models.CharField(choices=[('arxiv', 'ArXiv Paper'), ('github', 'GitHub Repository')], max_length=10, verbose_name='来源')),
+                ('timestamp', models.DateTimeField(verbose_name='时间')),
+                ('view_count', models.IntegerField(verbose_name='计算时的浏览次数')),
+                ('raw_score', models.FloatField(verbose_name='原始得分')),
+                ('score', models.FloatField(default=0.0, verbose_name='标准化得分')),
+                ('computed_at', models.DateTimeField(verbose_name='计算时间')),
+                ('arxiv_entry', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='hot_score', to='pub.arxiventry', verbose_name='ArXiv 论文')),
+                ('github_repo', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='hot_score', to='pub.githubrepo', verbose_name='GitHub 仓库')),
+            ],
+            options={
+                'verbose_name': '热点追踪得分',
+                'verbose_name_plural': '热点追踪得分',
+                'indexes': [models.Index(fields=['-score'], name='feed_hotsco_score_2ab82f_idx')],
+            },
+        ),
+    ]
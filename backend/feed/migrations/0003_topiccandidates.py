@@ -0,0 +1,27 @@
+# Generated by Django 5.1.2 on 2026-10-17 21:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feed', '0002_hotscore'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TopicCandidates',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('topic', models.CharField(max_length=255, unique=True, verbose_name='话题')),
+                ('arxiv_hits', models.JSONField(default=list, verbose_name='ArXiv 论文候选')),
+                ('github_hits', models.JSONField(default=list, verbose_name='GitHub 仓库候选')),
+                ('computed_at', models.DateTimeField(verbose_name='计算时间')),
+            ],
+            options={
+                'verbose_name': '话题候选',
+                'verbose_name_plural': '话题候选',
+            },
+        ),
+    ]
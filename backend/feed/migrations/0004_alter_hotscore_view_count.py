@@ -0,0 +1,18 @@
+# Generated by Django 5.1.2 on 2026-10-17 21:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feed', '0003_topiccandidates'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='hotscore',
+            name='view_count',
+            field=models.IntegerField(verbose_name='计算时的浏览速度'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.2 on 2026-10-17 22:40
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feed', '0004_alter_hotscore_view_count'),
+    ]
+
+    operations = [
+        migrations.RenameField(
+            model_name='hotscore',
+            old_name='view_count',
+            new_name='velocity',
+        ),
+    ]
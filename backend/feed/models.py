@@ -1,3 +1,86 @@
-from django.db import models  # noqa: F401
+from django.conf import settings
+from django.db import models
 
 # Create your models here.
+
+
+class FollowInboxItem(models.Model):
+    """
+    关注动态收件箱，论文入库时按学者关注关系写入。
+    """
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, verbose_name='用户')
+    arxiv_entry = models.ForeignKey(
+        'pub.ArxivEntry', on_delete=models.CASCADE, verbose_name='ArXiv 论文')
+    timestamp = models.DateTimeField(verbose_name='发布时间')
+    scholar_names = models.JSONField(default=list, verbose_name='关注的学者')
+
+    class Meta:
+        verbose_name = '关注动态'
+        verbose_name_plural = '关注动态'
+        unique_together = ('user', 'arxiv_entry')
+        indexes = [
+            models.Index(fields=['user', '-timestamp']),
+        ]
+
+    def __str__(self):
+        return f'{self.user} <- {self.arxiv_entry_id}'
+
+
+class HotScore(models.Model):
+    """
+    热点追踪得分，由 refreshhotscores 命令定期增量刷新。
+    """
+    origin = models.CharField(
+        max_length=10,
+        choices=[
+            ('arxiv', 'ArXiv Paper'),
+            ('github', 'GitHub Repository'),
+        ],
+        verbose_name='来源',
+    )
+    arxiv_entry = models.OneToOneField(
+        'pub.ArxivEntry', on_delete=models.CASCADE, null=True, blank=True,
+        related_name='hot_score', verbose_name='ArXiv 论文')
+    github_repo = models.OneToOneField(
+        'pub.GithubRepo', on_delete=models.CASCADE, null=True, blank=True,
+        related_name='hot_score', verbose_name='GitHub 仓库')
+    timestamp = models.DateTimeField(verbose_name='时间')
+
+    velocity = models.IntegerField(verbose_name='计算时的浏览速度')
+    raw_score = models.FloatField(verbose_name='原始得分')
+    score = models.FloatField(default=0.0, verbose_name='标准化得分')
+    computed_at = models.DateTimeField(verbose_name='计算时间')
+
+    class Meta:
+        verbose_name = '热点追踪得分'
+        verbose_name_plural = '热点追踪得分'
+        indexes = [
+            models.Index(fields=['-score']),
+        ]
+
+    def __str__(self):
+        return f'{self.origin}:{self.arxiv_entry_id or self.github_repo_id} ({self.score:.3f})'
+
+    @property
+    def item(self):
+        return self.arxiv_entry if self.origin == 'arxiv' else self.github_repo
+
+
+class TopicCandidates(models.Model):
+    """
+    话题的推荐候选列表，由 rebuildtopiccandidates 命令在同步后批量重建。
+
+    候选列表的格式与推荐后端的搜索结果相同，按得分降序排列。
+    """
+    topic = models.CharField(max_length=255, unique=True, verbose_name='话题')
+    arxiv_hits = models.JSONField(default=list, verbose_name='ArXiv 论文候选')
+    github_hits = models.JSONField(default=list, verbose_name='GitHub 仓库候选')
+    computed_at = models.DateTimeField(verbose_name='计算时间')
+
+    class Meta:
+        verbose_name = '话题候选'
+        verbose_name_plural = '话题候选'
+
+    def __str__(self):
+        return self.topic
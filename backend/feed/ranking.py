@@ -0,0 +1,116 @@
+"""
+向量化的动态排序。
+
+得分公式与 views 中逐条计算的得分函数相同，后者作为参考实现保留。
+与参考实现不同的是，同一批候选使用同一个当前时间，且未来的时间按 0 天计算。
+"""
+from collections.abc import Iterable
+from datetime import datetime
+
+import numpy as np
+
+SECONDS_PER_DAY = 86400
+
+
+def to_timestamps(values: Iterable[datetime]) -> np.ndarray:
+    """
+    将时间转换为 Unix 时间戳数组。
+    """
+    return np.fromiter((value.timestamp() for value in values), dtype=np.float64)
+
+
+def days_since(timestamps: np.ndarray, current_time: datetime) -> np.ndarray:
+    """
+    计算经过的整天数，与 ``timedelta.days`` 一样向下取整。
+    """
+    elapsed = np.floor((current_time.timestamp() - timestamps) / SECONDS_PER_DAY)
+    return np.maximum(elapsed, 0)
+
+
+def arxiv_hot_scores(
+    view_counts: np.ndarray,
+    published: np.ndarray,
+    current_time: datetime,
+) -> np.ndarray:
+    """
+    批量计算 arXiv 论文的热点追踪得分，对应 ``get_arxiv_hot_score``。
+    """
+    elapsed_days = days_since(published, current_time)
+    freshness_scores = 1 / (1 + elapsed_days) ** 0.4
+    return view_counts * freshness_scores
+
+
+def github_hot_scores(
+    view_counts: np.ndarray,
+    created_at: np.ndarray,
+    pushed_at: np.ndarray,
+    current_time: datetime,
+) -> np.ndarray:
+    """
+    批量计算 GitHub 仓库的热点追踪得分，对应 ``get_github_hot_score``。
+    """
+    created_days = days_since(created_at, current_time)
+    pushed_days = days_since(pushed_at, current_time)
+    freshness_scores = 0.5 / (1 + pushed_days) ** 0.5 + 0.5 / (1 + created_days) ** 0.3
+    return view_counts * freshness_scores
+
+
+def arxiv_subscription_scores(
+    topic_score_sums: np.ndarray,
+    published: np.ndarray,
+    current_time: datetime,
+) -> np.ndarray:
+    """
+    批量计算 arXiv 论文的订阅推荐得分，对应 ``get_arxiv_subscription_score``。
+    """
+    elapsed_days = days_since(published, current_time)
+    freshness_scores = 1 / (1 + elapsed_days)
+    return 0.5 * topic_score_sums + 0.5 * freshness_scores
+
+
+def github_subscription_scores(
+    topic_score_sums: np.ndarray,
+    topic_counts: np.ndarray,
+    created_at: np.ndarray,
+    pushed_at: np.ndarray,
+    current_time: datetime,
+) -> np.ndarray:
+    """
+    批量计算 GitHub 仓库的订阅推荐得分，对应 ``get_github_subscription_score``。
+    """
+    overall_topic_scores = topic_score_sums / (1 + topic_counts) ** 0.5
+
+    created_days = days_since(created_at, current_time)
+    pushed_days = days_since(pushed_at, current_time)
+    freshness_scores = 0.5 / (1 + pushed_days) + 0.5 / (1 + created_days)
+
+    return 0.5 * overall_topic_scores + 0.5 * freshness_scores
+
+
+def z_scores(
+    scores: np.ndarray,
+    mean: float = 0.0,
+    std: float = 1.0,
+    epsilon: float = 1e-6,
+) -> np.ndarray:
+    """
+    标准化得分，对应 ``normalize_scores``。
+    """
+    if not len(scores):
+        return scores
+    return mean + std * (scores - scores.mean()) / (scores.std() + epsilon)
+
+
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """
+    选出得分最高的 ``k`` 个下标并按得分降序排列，得分相同时下标小的在前。
+    """
+    k = min(k, len(scores))
+    if k == 0:
+        return np.zeros(0, dtype=np.intp)
+
+    if k < len(scores):
+        indices = np.argpartition(-scores, k - 1)[:k]
+    else:
+        indices = np.arange(len(scores))
+    return indices[np.lexsort((indices, -scores[indices]))]
@@ -4,7 +4,7 @@ from drf_spectacular.utils import (PolymorphicProxySerializer,
                                    extend_schema_field)
 from rest_framework import serializers
 
-from pub.serializers import ArxivEntrySerializer, GithubRepoSerializer
+from pub.serializers import ArxivEntryCardSerializer, GithubRepoCardSerializer
 
 
 class FeedSerializer(serializers.Serializer):
@@ -18,17 +18,17 @@ class FeedSerializer(serializers.Serializer):
     @extend_schema_field(PolymorphicProxySerializer(
         component_name='FeedItem',
         serializers=[
-            ArxivEntrySerializer,
-            GithubRepoSerializer,
+            ArxivEntryCardSerializer,
+            GithubRepoCardSerializer,
         ],
         resource_type_field_name=None,
     ))
     def get_item(self, obj: dict[str, Any]):
         match obj['origin']:
             case 'arxiv':
-                return ArxivEntrySerializer(obj['item']).data
+                return ArxivEntryCardSerializer(obj['item'], context=self.context).data
             case 'github':
-                return GithubRepoSerializer(obj['item']).data
+                return GithubRepoCardSerializer(obj['item'], context=self.context).data
 
 
 class FollowSourceSerializer(serializers.Serializer):
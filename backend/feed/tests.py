@@ -1,3 +1,772 @@
-from django.test import TestCase  # noqa: F401
+import json
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import StringIO
+from pathlib import Path
+from typing import Any
+from unittest import mock
+
+import numpy as np
+import requests
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils.timezone import now, timedelta
+from rest_framework import status
+from rest_framework.test import APIClient, APITestCase
+
+from crawler.arxiv import save_results_to_db
+from pub.models import (SUMMARY_EXCERPT_LENGTH, ArxivEntry, ArxivEntryAuthor,
+                        GithubRepo)
+from pub.rollups import view_rollups
+from user.models import User
+from utils import metrics
+from utils.feed_engine import (FeedEngineUnavailable, circuit_breaker,
+                               post_json, session)
+from utils.local_engine import LocalFeedEngine
+
+from . import ranking
+from .cache import (FEED_CACHE_GENERATION_KEY, get_cached_feed,
+                    invalidate_feed_cache)
+from .hot import refresh_hot_scores
+from .models import FollowInboxItem, HotScore, TopicCandidates
+from .topics import rebuild_topic_candidates
+from .utils import merge_topic_hits, rebuild_follow_inbox
+from .views import (get_arxiv_hot_score, get_arxiv_subscription_score,
+                    get_github_hot_score, get_github_subscription_score,
+                    normalize_scores)
 
 # Create your tests here.
+
+
+def create_arxiv_entry(arxiv_id: str, published: str, authors: list[str]) -> ArxivEntry:
+    entry = ArxivEntry.objects.create(
+        arxiv_id=arxiv_id,
+        title=f'Paper {arxiv_id}',
+        summary='Test summary',
+        authors=[{'name': name} for name in authors],
+        published=published,
+        updated=published,
+        primary_category='cs.LG',
+        categories=['cs.LG'],
+        link=f'http://arxiv.org/abs/{arxiv_id}',
+        pdf=f'http://arxiv.org/pdf/{arxiv_id}',
+    )
+    ArxivEntryAuthor.objects.bulk_create(entry.make_authors())
+    return entry
+
+
+class FollowFeedTests(APITestCase):
+    client: APIClient
+
+    def setUp(self) -> None:
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.client.force_authenticate(user=self.user)
+
+        create_arxiv_entry('2401.00001v1', '2024-01-01T00:00:00Z', ['Alice Smith'])
+        create_arxiv_entry('2401.00002v1', '2024-01-02T00:00:00Z', ['Bob Jones'])
+        create_arxiv_entry('2401.00003v1', '2024-01-03T00:00:00Z', ['Alice Smith', 'Bob Jones'])
+        create_arxiv_entry('2401.00004v1', '2024-01-04T00:00:00Z', ['Carol White'])
+
+    def subscribe(self, scholar_name: str) -> int:
+        response = self.client.post(
+            reverse('sub:scholar_subscriptions'), {'scholar_name': scholar_name})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return response.data['id']
+
+    def get_follow_feed(self):
+        response = self.client.get(reverse('feed:get_follow_feed'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def assert_follow_feed(self, data):
+        self.assertEqual(
+            [item['item']['arxiv_id'] for item in data],
+            ['2401.00003v1', '2401.00002v1', '2401.00001v1'],
+        )
+        self.assertEqual(data[0]['source']['scholar_names'], ['Alice Smith', 'Bob Jones'])
+        self.assertEqual(data[1]['source']['scholar_names'], ['Bob Jones'])
+        self.assertEqual(data[2]['source']['scholar_names'], ['Alice Smith'])
+
+    def test_follow_feed(self):
+        """测试关注学者后收件箱按时间倒序合并多个学者的论文"""
+        self.subscribe('Alice Smith')
+        self.subscribe('Bob Jones')
+        self.assert_follow_feed(self.get_follow_feed())
+
+    def test_follow_feed_query_count(self):
+        """测试关注动态的查询次数与关注的学者数量无关"""
+        self.subscribe('Alice Smith')
+        for i in range(20):
+            self.subscribe(f'Scholar {i}')
+
+        # 收件箱和论文卡片各一次查询。
+        with self.assertNumQueries(2):
+            self.get_follow_feed()
+
+    def test_unsubscribe_prunes_inbox(self):
+        """测试取消关注学者后移除仅由该学者带来的论文"""
+        self.subscribe('Alice Smith')
+        subscription_id = self.subscribe('Bob Jones')
+
+        response = self.client.delete(
+            reverse('sub:scholar_subscription', kwargs={'pk': subscription_id}))
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+
+        data = self.get_follow_feed()
+        self.assertEqual(
+            [item['item']['arxiv_id'] for item in data],
+            ['2401.00003v1', '2401.00001v1'],
+        )
+        self.assertEqual(data[0]['source']['scholar_names'], ['Alice Smith'])
+
+    def ingest(self, authors: list[str]):
+        save_results_to_db([{
+            'arxiv_id': '2401.00005v1',
+            'title': 'New Paper',
+            'summary': 'Test summary',
+            'authors': [{'name': name} for name in authors],
+            'published': '2024-01-05T00:00:00Z',
+            'updated': '2024-01-05T00:00:00Z',
+            'primary_category': 'cs.LG',
+            'categories': ['cs.LG'],
+            'link': 'http://arxiv.org/abs/2401.00005v1',
+            'pdf': 'http://arxiv.org/pdf/2401.00005v1',
+        }])
+
+    def test_ingest_fans_out_to_followers(self):
+        """测试新论文入库时写入关注者的收件箱"""
+        self.subscribe('Carol White')
+
+        self.ingest(['Carol White', 'Dave Brown'])
+
+        data = self.get_follow_feed()
+        self.assertEqual(
+            [item['item']['arxiv_id'] for item in data],
+            ['2401.00005v1', '2401.00004v1'],
+        )
+        self.assertEqual(data[0]['source']['scholar_names'], ['Carol White'])
+
+    def test_ingest_merges_scholar_names(self):
+        """测试重新入库的论文增加了被关注的作者时，已有的收件箱条目合并学者"""
+        self.subscribe('Carol White')
+        self.subscribe('Dave Brown')
+
+        self.ingest(['Carol White'])
+        self.ingest(['Carol White', 'Dave Brown'])
+
+        data = self.get_follow_feed()
+        self.assertEqual(data[0]['item']['arxiv_id'], '2401.00005v1')
+        self.assertEqual(data[0]['source']['scholar_names'], ['Carol White', 'Dave Brown'])
+
+    def test_rebuild_follow_inbox(self):
+        """测试重建收件箱与逐个关注的结果一致"""
+        self.subscribe('Alice Smith')
+        self.subscribe('Bob Jones')
+        FollowInboxItem.objects.all().delete()
+
+        call_command('rebuildfollowinbox', stdout=StringIO())
+        self.assert_follow_feed(self.get_follow_feed())
+
+    def test_rebuild_without_window_functions(self):
+        """测试不支持窗口函数的数据库上的召回结果一致"""
+        self.subscribe('Alice Smith')
+        self.subscribe('Bob Jones')
+
+        with mock.patch.object(connection.features, 'supports_over_clause', False):
+            rebuild_follow_inbox(self.user.id)
+        self.assert_follow_feed(self.get_follow_feed())
+
+
+def mock_feed_engine(results: dict[str, list], failures: tuple[str, ...] = ()):
+    """
+    模拟推荐后端，``results`` 为各接口对每个查询返回的结果。
+    """
+    def post(url, json=None, **kwargs):
+        if url in failures:
+            raise requests.ConnectionError(f'{url} is down')
+        response = mock.Mock()
+        response.json.return_value = [results.get(url, []) for _ in json['queries']]
+        return response
+
+    return mock.patch('utils.feed_engine.session.post', side_effect=post)
+
+
+class SearchFeedTests(APITestCase):
+    client: APIClient
+
+    def setUp(self) -> None:
+        cache.clear()
+        create_arxiv_entry('2401.00001v1', '2024-01-01T00:00:00Z', ['Alice Smith'])
+        create_arxiv_entry('2401.00002v1', '2024-01-02T00:00:00Z', ['Bob Jones'])
+
+    def test_search_with_partial_results(self):
+        """测试推荐后端的一个接口失败时仍返回其他接口的结果"""
+        arxiv_results = [
+            {'entry_id': '2401.00002v1', 'score': 0.9},
+            {'entry_id': '2401.00001v1', 'score': 0.8},
+        ]
+        with mock_feed_engine({'/arxiv/search': arxiv_results}, failures=('/github/search',)):
+            response = self.client.get(reverse('feed:get_search_results'), {'q': 'attention'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [item['item']['arxiv_id'] for item in response.data],
+            ['2401.00002v1', '2401.00001v1'],
+        )
+
+    def test_search_returns_cards(self):
+        """测试搜索结果只包含卡片字段，并支持只返回部分字段"""
+        ArxivEntry.objects.filter(arxiv_id='2401.00001v1').update(summary='x' * 1000)
+        arxiv_results = [{'entry_id': '2401.00001v1', 'score': 0.9}]
+
+        with mock_feed_engine({'/arxiv/search': arxiv_results}):
+            response = self.client.get(reverse('feed:get_search_results'), {'q': 'attention'})
+        self.assertEqual(response.data[0]['item']['summary'], 'x' * SUMMARY_EXCERPT_LENGTH)
+
+        with mock_feed_engine({'/arxiv/search': arxiv_results}):
+            response = self.client.get(
+                reverse('feed:get_search_results'), {'q': 'attention', 'fields': 'arxiv_id,title'})
+        self.assertEqual(set(response.data[0]['item']), {'arxiv_id', 'title'})
+
+    def test_search_drops_missing_hits(self):
+        """测试数据库中不存在的搜索结果被丢弃并计数"""
+        arxiv_results = [
+            {'entry_id': '2401.00002v1', 'score': 0.9},
+            {'entry_id': '2401.99999v1', 'score': 0.8},
+            {'entry_id': '2401.00001v1', 'score': 0.7},
+        ]
+        missing_before = metrics.get_counters().get('feed.hydration.missing.arxiv', 0)
+
+        with mock_feed_engine({'/arxiv/search': arxiv_results}):
+            response = self.client.get(reverse('feed:get_search_results'), {'q': 'attention'})
+
+        self.assertEqual(
+            [item['item']['arxiv_id'] for item in response.data],
+            ['2401.00002v1', '2401.00001v1'],
+        )
+        missing_after = metrics.get_counters().get('feed.hydration.missing.arxiv', 0)
+        self.assertEqual(missing_after - missing_before, 1)
+
+
+class LocalFeedEngineTests(APITestCase):
+    client: APIClient
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.engine_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.engine_dir.cleanup)
+
+        settings_override = override_settings(
+            FEED_ENGINE_URL='local://',
+            FEED_ENGINE_LOCAL_PATH=Path(self.engine_dir.name),
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        create_arxiv_entry('2401.00001v1', '2024-01-01T00:00:00Z', ['Alice Smith'])
+        create_arxiv_entry('2401.00002v1', '2024-01-02T00:00:00Z', ['Bob Jones'])
+        ArxivEntry.objects.filter(arxiv_id='2401.00001v1').update(
+            title='Graph neural networks for molecules',
+            summary='We apply message passing graph networks to molecular property prediction.',
+        )
+        ArxivEntry.objects.filter(arxiv_id='2401.00002v1').update(
+            title='Diffusion models for image synthesis',
+            summary='Denoising diffusion produces high quality images.',
+        )
+        call_command('syncarxiv', stdout=StringIO(), stderr=StringIO())
+
+    def search(self, queries: list[str], max_results: int = 10):
+        response = session.post(
+            '/arxiv/search', json={'queries': queries, 'max_results': max_results})
+        response.raise_for_status()
+        return response.json()
+
+    def test_search(self):
+        """测试同步后的论文可以被多个查询检索，得分在 [0, 1] 内且按得分降序"""
+        graph_hits, diffusion_hits, unknown_hits = self.search(
+            ['graph neural networks', 'image diffusion', 'quantum chromodynamics'])
+
+        self.assertEqual(graph_hits[0]['entry_id'], '2401.00001v1')
+        self.assertEqual(diffusion_hits[0]['entry_id'], '2401.00002v1')
+        self.assertEqual(unknown_hits, [])
+        for hits in (graph_hits, diffusion_hits):
+            scores = [hit['score'] for hit in hits]
+            self.assertEqual(scores, sorted(scores, reverse=True))
+            self.assertTrue(all(0 < score <= 1 for score in scores))
+
+        self.assertEqual(len(self.search(['for'], max_results=1)[0]), 1)
+
+    def test_search_feed(self):
+        """测试搜索接口使用进程内的推荐后端"""
+        response = self.client.get(reverse('feed:get_search_results'), {'q': 'diffusion models'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data[0]['item']['arxiv_id'], '2401.00002v1')
+
+    def test_persistence(self):
+        """测试同步命令保存的索引可以被其他进程加载，其他进程保存后重新加载"""
+        other = LocalFeedEngine(Path(self.engine_dir.name))
+        self.assertEqual(len(other.indexes['arxiv']), 2)
+
+        other.handle('/arxiv/batch', [
+            {'entry_id': '2401.00003v1', 'content': 'Title: Protein folding\n'},
+        ])
+        other.handle('/save', None)
+        self.assertEqual(self.search(['protein folding'])[0][0]['entry_id'], '2401.00003v1')
+
+    def test_unknown_endpoint(self):
+        """测试未知接口返回 404"""
+        response = session.post('/unknown', json={})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class SubscriptionFeedTests(APITestCase):
+    client: APIClient
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        create_arxiv_entry('2401.00001v1', '2024-01-01T00:00:00Z', ['Alice Smith'])
+        create_arxiv_entry('2401.00002v1', '2024-01-02T00:00:00Z', ['Bob Jones'])
+
+    def get_subscription_feed(self):
+        with mock.patch('utils.feed_engine.session.post') as engine:
+            response = self.client.get(reverse('feed:get_subscription_feed'))
+        engine.assert_not_called()
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def test_subscription_feed(self):
+        """测试订阅推荐只读取预先计算的话题候选"""
+        arxiv_results = [
+            {'entry_id': '2401.00001v1', 'score': 0.9},
+            {'entry_id': '2401.00002v1', 'score': 0.7},
+        ]
+        with mock_feed_engine({'/arxiv/search': arxiv_results}):
+            self.assertEqual(rebuild_topic_candidates(), 3)
+
+        data = self.get_subscription_feed()
+        self.assertEqual(
+            [item['item']['arxiv_id'] for item in data], ['2401.00001v1', '2401.00002v1'])
+        self.assertEqual(len(data[0]['source']['topics']), 3)
+
+    def test_rebuild_with_partial_results(self):
+        """测试推荐后端的一个接口失败时保留该来源原有的候选"""
+        arxiv_results = [{'entry_id': '2401.00001v1', 'score': 0.9}]
+        with mock_feed_engine({'/arxiv/search': arxiv_results}, failures=('/github/search',)):
+            rebuild_topic_candidates()
+        with mock_feed_engine({}, failures=('/arxiv/search',)):
+            rebuild_topic_candidates()
+
+        data = self.get_subscription_feed()
+        self.assertEqual(len(data), 1)
+        self.assertEqual(data[0]['item']['arxiv_id'], '2401.00001v1')
+
+    @mock.patch('utils.bulk.supports_bulk_create_unique_fields', return_value=False)
+    def test_rebuild_without_unique_fields(self, _):
+        """测试数据库不支持按唯一字段更新冲突（MySQL）时更新已有的候选"""
+        self.test_rebuild_with_partial_results()
+        self.assertEqual(TopicCandidates.objects.count(), 3)
+
+    def test_subscribe_new_topic(self):
+        """测试订阅新话题时不访问推荐后端，定期任务只召回还没有候选的话题，取消订阅后重建时删除"""
+        self.client.force_authenticate(user=self.user)
+        with mock_feed_engine({'/arxiv/search': []}):
+            rebuild_topic_candidates()
+
+        arxiv_results = [{'entry_id': '2401.00002v1', 'score': 0.9}]
+        with mock_feed_engine({'/arxiv/search': arxiv_results}) as engine:
+            response = self.client.post(
+                reverse('sub:topic_subscriptions'), {'topic': 'Diffusion Models'})
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+            engine.assert_not_called()
+
+            call_command('rebuildtopiccandidates', '--missing', stdout=StringIO())
+        # 一次请求召回两个来源
+        self.assertEqual(engine.call_count, 2)
+        self.assertEqual(engine.call_args.kwargs['json']['queries'], ['Diffusion Models'])
+
+        data = self.get_subscription_feed()
+        self.assertEqual(data[0]['item']['arxiv_id'], '2401.00002v1')
+        self.assertEqual(data[0]['source']['topics'], ['Diffusion Models'])
+
+        self.user.topicsubscription_set.all().delete()
+        with mock_feed_engine({}):
+            rebuild_topic_candidates()
+        self.assertFalse(TopicCandidates.objects.filter(topic='Diffusion Models').exists())
+
+    def test_merge_topic_hits(self):
+        """测试按得分归并话题候选并限制候选数"""
+        candidates = merge_topic_hits({
+            'a': [{'entry_id': 'x', 'score': 0.9}, {'entry_id': 'y', 'score': 0.5}],
+            'b': [{'entry_id': 'z', 'score': 0.8}, {'entry_id': 'x', 'score': 0.4}],
+        }, limit=2)
+        self.assertEqual(candidates, {'x': {'a': 0.9, 'b': 0.4}, 'z': {'b': 0.8}})
+
+
+def make_engine_response(status_code: int, data: Any = None) -> requests.Response:
+    response = requests.Response()
+    response.status_code = status_code
+    response._content = json.dumps(data).encode()
+    return response
+
+
+@override_settings(FEED_ENGINE_RETRY_BACKOFF=0.001)
+class FeedEngineClientTests(APITestCase):
+    client: APIClient
+
+    search_payload = {'queries': ['attention'], 'max_results': 10}
+
+    def setUp(self) -> None:
+        cache.clear()
+        circuit_breaker.reset()
+        self.addCleanup(circuit_breaker.reset)
+
+    def mock_transport(self, *outcomes):
+        return mock.patch('requests.Session.request', side_effect=outcomes)
+
+    def test_retries_search(self):
+        """测试搜索请求在连接失败和网关错误时重试"""
+        hits = [[{'entry_id': '2401.00001v1', 'score': 0.9}]]
+        with self.mock_transport(
+            requests.ConnectionError(), make_engine_response(503), make_engine_response(200, hits),
+        ) as transport:
+            self.assertEqual(post_json('/arxiv/search', self.search_payload), hits)
+        self.assertEqual(transport.call_count, 3)
+
+    def test_does_not_retry_batch(self):
+        """测试非幂等的请求和客户端错误不重试"""
+        with self.mock_transport(requests.ConnectionError()) as transport:
+            with self.assertRaises(requests.ConnectionError):
+                post_json('/arxiv/batch', [])
+        self.assertEqual(transport.call_count, 1)
+
+        with self.mock_transport(make_engine_response(400)) as transport:
+            with self.assertRaises(requests.HTTPError):
+                post_json('/arxiv/search', self.search_payload)
+        self.assertEqual(transport.call_count, 1)
+
+    def test_single_flight(self):
+        """测试并发的相同搜索请求只发送一次并共享结果"""
+        hits = [[{'entry_id': '2401.00001v1', 'score': 0.9}]]
+        release = threading.Event()
+
+        def post(url, json=None, **kwargs):
+            release.wait(timeout=5)
+            return make_engine_response(200, hits)
+
+        counters_before = metrics.get_counters()
+        payloads = [
+            {'queries': ['Machine Learning'], 'max_results': 10},
+            {'queries': ['  machine   learning '], 'max_results': 10},
+            {'queries': ['Machine Learning'], 'max_results': 10},
+            {'queries': ['Machine Learning'], 'max_results': 20},
+        ]
+        with mock.patch('utils.feed_engine.session.post', side_effect=post) as engine:
+            with ThreadPoolExecutor(max_workers=len(payloads)) as executor:
+                futures = [
+                    executor.submit(post_json, '/arxiv/search', payload)
+                    for payload in payloads
+                ]
+                while metrics.get_counters().get('feed_engine.singleflight.merged', 0) \
+                        < counters_before.get('feed_engine.singleflight.merged', 0) + 2:
+                    time.sleep(0.01)
+                release.set()
+                results = [future.result() for future in futures]
+
+        self.assertEqual(engine.call_count, 2)
+        self.assertEqual(results, [hits] * len(payloads))
+        counters_after = metrics.get_counters()
+        self.assertEqual(
+            counters_after['feed_engine.singleflight.calls']
+            - counters_before.get('feed_engine.singleflight.calls', 0),
+            2,
+        )
+
+    def test_single_flight_shares_errors(self):
+        """测试合并的请求共享失败结果，且失败后不影响之后的请求"""
+        release = threading.Event()
+
+        def post(url, json=None, **kwargs):
+            release.wait(timeout=5)
+            raise requests.HTTPError('bad request')
+
+        merged_before = metrics.get_counters().get('feed_engine.singleflight.merged', 0)
+        with mock.patch('utils.feed_engine.session.post', side_effect=post):
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                futures = [
+                    executor.submit(post_json, '/arxiv/search', self.search_payload)
+                    for _ in range(2)
+                ]
+                while metrics.get_counters().get('feed_engine.singleflight.merged', 0) \
+                        == merged_before:
+                    time.sleep(0.01)
+                release.set()
+                for future in futures:
+                    self.assertRaises(requests.HTTPError, future.result)
+
+        with self.mock_transport(make_engine_response(200, [[]])):
+            self.assertEqual(post_json('/arxiv/search', self.search_payload), [[]])
+
+    @override_settings(FEED_ENGINE_BREAKER_THRESHOLD=2, FEED_ENGINE_RETRIES=0)
+    def test_circuit_breaker(self):
+        """测试连续失败后熔断，冷却后试探请求成功则恢复"""
+        with self.mock_transport(requests.Timeout(), make_engine_response(500)) as transport:
+            with self.assertRaises(requests.Timeout):
+                post_json('/arxiv/search', self.search_payload)
+            with self.assertRaises(requests.HTTPError):
+                post_json('/arxiv/search', self.search_payload)
+            with self.assertRaises(FeedEngineUnavailable):
+                post_json('/arxiv/search', self.search_payload)
+        self.assertEqual(transport.call_count, 2)
+        self.assertTrue(circuit_breaker.is_open)
+
+        with override_settings(FEED_ENGINE_BREAKER_COOLDOWN=0):
+            with self.mock_transport(make_engine_response(200, [[]])):
+                self.assertEqual(post_json('/arxiv/search', self.search_payload), [[]])
+        self.assertFalse(circuit_breaker.is_open)
+
+    @override_settings(FEED_ENGINE_BREAKER_THRESHOLD=1)
+    def test_feed_degrades_when_engine_is_unavailable(self):
+        """测试推荐后端不可用且没有话题候选时，订阅推荐退化为热点追踪，搜索只返回作者搜索结果"""
+        create_arxiv_entry('2401.00001v1', now().isoformat(), ['Alice Smith'])
+        view_rollups.add('arxiv', '2401.00001v1', 'user:1')
+        view_rollups.flush()
+        refresh_hot_scores()
+
+        with self.mock_transport(requests.ConnectionError()):
+            with self.assertRaises(requests.ConnectionError):
+                post_json('/arxiv/batch', [])
+        self.assertTrue(circuit_breaker.is_open)
+
+        with self.mock_transport() as transport:
+            response = self.client.get(reverse('feed:get_subscription_feed'))
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(response.data[0]['item']['arxiv_id'], '2401.00001v1')
+            self.assertEqual(response.data[0]['source']['topics'], [])
+
+            response = self.client.get(reverse('feed:get_search_results'), {'q': 'Alice Smith'})
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(
+                [item['item']['arxiv_id'] for item in response.data], ['2401.00001v1'])
+        transport.assert_not_called()
+
+
+class HotFeedTests(APITestCase):
+    client: APIClient
+
+    def setUp(self) -> None:
+        cache.clear()
+        recent = now() - timedelta(days=1)
+        self.entries = [
+            create_arxiv_entry(f'2401.0000{i}v1', recent.isoformat(), ['Alice Smith'])
+            for i in range(1, 4)
+        ]
+        create_arxiv_entry('2301.00001v1', (now() - timedelta(days=60)).isoformat(), ['Bob Jones'])
+        for entry in ArxivEntry.objects.all():
+            self.add_views(entry.arxiv_id, 1)
+        self.add_views('2401.00002v1', 10)
+
+    def add_views(self, arxiv_id: str, viewers: int, repeat: int = 1):
+        for i in range(viewers):
+            for _ in range(repeat):
+                view_rollups.add('arxiv', arxiv_id, f'ip:{arxiv_id}-{i}')
+        view_rollups.flush()
+
+    def get_hot_feed(self):
+        response = self.client.get(reverse('feed:get_hot_feed'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [item['item']['arxiv_id'] for item in response.data]
+
+    def test_hot_feed(self):
+        """测试热点追踪按预先计算的得分排序"""
+        call_command('refreshhotscores', stdout=StringIO())
+
+        arxiv_ids = self.get_hot_feed()
+        self.assertEqual(len(arxiv_ids), 3)
+        self.assertEqual(arxiv_ids[0], '2401.00002v1')
+
+    def test_refresh_only_recomputes_changed_scores(self):
+        """测试增量刷新只重新计算浏览速度变化的得分"""
+        self.assertEqual(refresh_hot_scores(), (3, 0))
+        self.assertEqual(refresh_hot_scores(), (0, 0))
+
+        self.add_views('2401.00003v1', 100)
+        self.assertEqual(refresh_hot_scores(), (1, 0))
+        self.assertEqual(self.get_hot_feed()[0], '2401.00003v1')
+
+    def test_repeated_views_do_not_inflate_scores(self):
+        """测试同一访客的重复浏览不会推高热点得分"""
+        self.add_views('2401.00003v1', 1, repeat=100)
+        refresh_hot_scores()
+        self.assertEqual(self.get_hot_feed()[0], '2401.00002v1')
+
+    def test_hot_feed_is_cached(self):
+        """测试热点追踪在刷新得分前返回缓存的结果"""
+        call_command('refreshhotscores', stdout=StringIO())
+        self.assertEqual(self.get_hot_feed()[0], '2401.00002v1')
+
+        self.add_views('2401.00003v1', 100)
+        refresh_hot_scores()
+        with self.assertNumQueries(0):
+            self.assertEqual(self.get_hot_feed()[0], '2401.00002v1')
+
+        call_command('refreshhotscores', stdout=StringIO())
+        self.assertEqual(self.get_hot_feed()[0], '2401.00003v1')
+
+    def test_refresh_expires_old_scores(self):
+        """测试超出时间窗口或者最近没有浏览的得分被删除"""
+        refresh_hot_scores()
+        self.assertEqual(refresh_hot_scores(now() + timedelta(days=10)), (0, 3))
+        self.assertFalse(HotScore.objects.exists())
+
+    def test_seed_velocity_from_view_count(self):
+        """测试浏览汇总覆盖速度窗口之前用累计浏览次数作为浏览速度，覆盖之后只使用浏览汇总"""
+        ArxivEntry.objects.filter(arxiv_id='2401.00003v1').update(view_count=1000)
+        refresh_hot_scores()
+        self.assertEqual(self.get_hot_feed()[0], '2401.00003v1')
+        self.assertEqual(HotScore.objects.get(arxiv_entry='2401.00003v1').velocity, 1000)
+
+        refresh_hot_scores(now() + timedelta(days=7))
+        self.assertEqual(HotScore.objects.get(arxiv_entry='2401.00003v1').velocity, 1)
+
+    def test_hot_feed_without_scores(self):
+        """测试还没有刷新得分时直接计算热点追踪"""
+        arxiv_ids = self.get_hot_feed()
+        self.assertEqual(len(arxiv_ids), 3)
+        self.assertEqual(arxiv_ids[0], '2401.00002v1')
+        self.assertFalse(HotScore.objects.exists())
+
+
+class RankingTests(TestCase):
+    def setUp(self) -> None:
+        current_time = now()
+        self.entries = [
+            ArxivEntry(arxiv_id=f'{i}', view_count=view_count, published=current_time - age)
+            for i, (view_count, age) in enumerate([
+                (10, timedelta(hours=1)),
+                (50, timedelta(days=3, hours=2)),
+                (5, timedelta(days=20)),
+                (50, timedelta(days=3, hours=2)),
+            ])
+        ]
+        self.repos = [
+            GithubRepo(
+                repo_id=i, full_name=f'owner/repo{i}', view_count=view_count,
+                created_at=current_time - created_age, pushed_at=current_time - pushed_age,
+            )
+            for i, (view_count, created_age, pushed_age) in enumerate([
+                (3, timedelta(days=400), timedelta(days=1)),
+                (8, timedelta(days=30), timedelta(days=10)),
+            ])
+        ]
+
+    def test_hot_scores_match_reference(self):
+        """测试向量化的热点追踪得分与逐条计算的结果一致"""
+        current_time = now()
+        arxiv_scores = ranking.arxiv_hot_scores(
+            np.array([entry.view_count for entry in self.entries]),
+            ranking.to_timestamps(entry.published for entry in self.entries),
+            current_time,
+        )
+        np.testing.assert_allclose(
+            arxiv_scores, [get_arxiv_hot_score(entry) for entry in self.entries])
+
+        github_scores = ranking.github_hot_scores(
+            np.array([repo.view_count for repo in self.repos]),
+            ranking.to_timestamps(repo.created_at for repo in self.repos),
+            ranking.to_timestamps(repo.pushed_at for repo in self.repos),
+            current_time,
+        )
+        np.testing.assert_allclose(
+            github_scores, [get_github_hot_score(repo) for repo in self.repos])
+
+    def test_subscription_scores_match_reference(self):
+        """测试向量化的订阅推荐得分与逐条计算的结果一致"""
+        current_time = now()
+        topic_scores = [{'a': 0.9, 'b': 0.7}, {'a': 0.6}]
+
+        arxiv_scores = ranking.arxiv_subscription_scores(
+            np.array([sum(scores.values()) for scores in topic_scores]),
+            ranking.to_timestamps(entry.published for entry in self.entries[:2]),
+            current_time,
+        )
+        np.testing.assert_allclose(arxiv_scores, [
+            get_arxiv_subscription_score(
+                {'arxiv_id': entry.arxiv_id, 'topic_scores': scores}, entry)
+            for entry, scores in zip(self.entries, topic_scores)
+        ])
+
+        github_scores = ranking.github_subscription_scores(
+            np.array([sum(scores.values()) for scores in topic_scores]),
+            np.array([len(scores) for scores in topic_scores]),
+            ranking.to_timestamps(repo.created_at for repo in self.repos),
+            ranking.to_timestamps(repo.pushed_at for repo in self.repos),
+            current_time,
+        )
+        np.testing.assert_allclose(github_scores, [
+            get_github_subscription_score(
+                {'full_name': repo.full_name, 'topic_scores': scores}, repo)
+            for repo, scores in zip(self.repos, topic_scores)
+        ])
+
+    def test_z_scores_and_top_k(self):
+        """测试标准化得分与 normalize_scores 一致，前 k 个按得分降序且保持并列的原有顺序"""
+        candidates = [{'_score': float(score)} for score in [3, 1, 4, 1, 5, 9, 2, 6, 5]]
+        scores = ranking.z_scores(np.array([candidate['_score'] for candidate in candidates]))
+        normalize_scores(candidates)
+        np.testing.assert_allclose(scores, [candidate['_score'] for candidate in candidates])
+
+        self.assertEqual(ranking.top_k(scores, 4).tolist(), [5, 7, 4, 8])
+        self.assertEqual(ranking.top_k(scores, 100).tolist(), [5, 7, 4, 8, 2, 0, 6, 1, 3])
+        self.assertEqual(ranking.top_k(np.array([]), 5).tolist(), [])
+
+    def test_benchmark_command(self):
+        """测试基准测试命令可以运行"""
+        out = StringIO()
+        call_command('benchmarkranking', sizes=[200], repeat=1, stdout=out)
+        self.assertIn('200 candidates', out.getvalue())
+        self.assertIn('top-50 overlap 100%', out.getvalue())
+
+
+class FeedCacheTests(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.compute = mock.Mock(side_effect=[['first'], ['second']])
+
+    def test_serves_fresh_payload(self):
+        """测试缓存新鲜时不重新计算"""
+        self.assertEqual(get_cached_feed('hot', 'default', self.compute), ['first'])
+        self.assertEqual(get_cached_feed('hot', 'default', self.compute), ['first'])
+        self.assertEqual(self.compute.call_count, 1)
+
+    @override_settings(FEED_CACHE_TTL=0)
+    def test_stale_while_revalidate(self):
+        """测试缓存过期后只有持有刷新锁的请求重新计算，其他请求返回旧的结果"""
+        self.assertEqual(get_cached_feed('hot', 'default', self.compute), ['first'])
+
+        lock_key = f'feed:{cache.get(FEED_CACHE_GENERATION_KEY)}:hot:default:lock'
+        cache.add(lock_key, True)
+        self.assertEqual(get_cached_feed('hot', 'default', self.compute), ['first'])
+        self.assertEqual(self.compute.call_count, 1)
+
+        cache.delete(lock_key)
+        self.assertEqual(get_cached_feed('hot', 'default', self.compute), ['second'])
+
+    def test_miss_keeps_other_lock(self):
+        """测试缓存缺失时计算的请求不会释放其他请求持有的刷新锁"""
+        lock_key = f'feed:{cache.get_or_set(FEED_CACHE_GENERATION_KEY, 0)}:hot:default:lock'
+        cache.add(lock_key, True)
+        self.assertEqual(get_cached_feed('hot', 'default', self.compute), ['first'])
+        self.assertTrue(cache.get(lock_key))
+
+    def test_invalidate(self):
+        """测试失效后重新计算"""
+        get_cached_feed('hot', 'default', self.compute)
+        invalidate_feed_cache()
+        self.assertEqual(get_cached_feed('hot', 'default', self.compute), ['second'])
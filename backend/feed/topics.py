@@ -0,0 +1,92 @@
+from itertools import batched
+from typing import Iterable, Optional
+
+from django.utils.timezone import now
+
+from sub.models import TopicSubscription
+from utils.bulk import bulk_upsert
+from utils.feed_engine import post_json_concurrently
+
+from .constants import DEFAULT_TOPICS
+from .models import TopicCandidates
+
+# 每个话题保存的候选数。
+TOPIC_CANDIDATES_SIZE = 10
+
+# 每次向推荐后端查询的话题数。
+TOPIC_QUERY_BATCH_SIZE = 32
+
+ORIGINS = ('arxiv', 'github')
+
+
+def list_candidate_topics() -> list[str]:
+    """
+    列出需要维护候选列表的话题，包括默认话题和所有被订阅的话题。
+    """
+    subscribed_topics = TopicSubscription.objects.values_list('topic', flat=True).distinct()
+    return list(dict.fromkeys([*DEFAULT_TOPICS, *subscribed_topics]))
+
+
+def list_missing_topics() -> list[str]:
+    """
+    列出还没有候选列表的话题，例如刚被第一次订阅的话题。
+    """
+    computed_topics = set(TopicCandidates.objects.values_list('topic', flat=True))
+    return [topic for topic in list_candidate_topics() if topic not in computed_topics]
+
+
+def rebuild_topic_candidates(
+    topics: Optional[Iterable[str]] = None,
+    origins: tuple[str, ...] = ORIGINS,
+) -> int:
+    """
+    从推荐后端重新召回话题的候选列表，返回更新的话题数。
+
+    未指定话题时重建所有需要维护的话题，并删除不再被订阅的话题。
+    某个来源召回失败时保留该来源原有的候选。
+    """
+    prune = topics is None
+    topics = list_candidate_topics() if topics is None else list(dict.fromkeys(topics))
+    computed_at = now()
+    updated = 0
+
+    for batch in batched(topics, TOPIC_QUERY_BATCH_SIZE):
+        payload = {
+            'queries': list(batch),
+            'max_results': TOPIC_CANDIDATES_SIZE,
+        }
+        results = post_json_concurrently([
+            (f'/{origin}/search', payload)
+            for origin in origins
+        ])
+        hits_by_field = {
+            f'{origin}_hits': search_results
+            for origin, search_results in zip(origins, results)
+            if search_results is not None
+        }
+        if not hits_by_field:
+            continue
+
+        rows = [
+            TopicCandidates(
+                topic=topic,
+                computed_at=computed_at,
+                **{
+                    field: sorted(search_results[i], key=lambda hit: hit['score'], reverse=True)
+                    for field, search_results in hits_by_field.items()
+                },
+            )
+            for i, topic in enumerate(batch)
+        ]
+        bulk_upsert(TopicCandidates, rows, ['topic'], [*hits_by_field, 'computed_at'])
+        updated += len(rows)
+
+    if prune:
+        (
+            TopicCandidates.objects
+            .exclude(topic__in=DEFAULT_TOPICS)
+            .exclude(topic__in=TopicSubscription.objects.values('topic'))
+            .delete()
+        )
+
+    return updated
@@ -0,0 +1,297 @@
+import heapq
+from collections.abc import Iterable, Iterator
+from functools import reduce
+from operator import itemgetter, or_
+from typing import Any
+
+from django.db import connection, transaction
+from django.db.models import F, Q, QuerySet, Window
+from django.db.models.functions import RowNumber
+
+from pub.models import ArxivEntry, ArxivEntryAuthor
+from pub.utils import normalize_author
+from sub.models import ScholarSubscription
+
+from .models import FollowInboxItem
+
+AuthorKey = tuple[str, str]
+
+AUTHOR_ROW_FIELDS = ('first_name', 'last_name', 'arxiv_entry_id')
+
+
+def group_scholar_names(scholar_names: Iterable[str]) -> dict[AuthorKey, list[str]]:
+    """
+    按标准化后的姓名对学者分组，同名的学者共享同一个召回流。
+    """
+    groups: dict[AuthorKey, list[str]] = {}
+    for scholar_name in scholar_names:
+        normalized = normalize_author(scholar_name)
+        key = (normalized['first_name'], normalized['last_name'])
+        groups.setdefault(key, []).append(scholar_name)
+    return groups
+
+
+def recall_scholar_entries(
+    author_keys: Iterable[AuthorKey],
+    limit: int = 10,
+) -> dict[AuthorKey, list[ArxivEntry]]:
+    """
+    批量召回每位学者的最新论文，每个学者的论文按发布时间倒序排列。
+
+    数据库支持窗口函数时用一次查询取出每位学者的前 ``limit`` 篇论文，
+    否则在支持的数据库上用 UNION ALL 合并各学者的查询，最后才退化为逐个学者查询。
+    """
+    author_keys = list(dict.fromkeys(author_keys))
+    streams: dict[AuthorKey, list[ArxivEntry]] = {key: [] for key in author_keys}
+    if not author_keys:
+        return streams
+
+    if connection.features.supports_over_clause:
+        rows = _filter_authors(author_keys).annotate(
+            rank=Window(
+                RowNumber(),
+                partition_by=[F('first_name'), F('last_name')],
+                order_by=F('arxiv_entry__published').desc(),
+            ),
+        ).filter(rank__lte=limit).values_list(*AUTHOR_ROW_FIELDS)
+    elif connection.features.supports_slicing_ordering_in_compound:
+        querysets = [
+            _filter_authors([key]).values_list(*AUTHOR_ROW_FIELDS)[:limit]
+            for key in author_keys
+        ]
+        rows = querysets[0].union(*querysets[1:], all=True)
+    else:
+        rows = [
+            row
+            for key in author_keys
+            for row in _filter_authors([key]).values_list(*AUTHOR_ROW_FIELDS)[:limit]
+        ]
+
+    rows = list(rows)
+    entries = ArxivEntry.objects.in_bulk({arxiv_id for _, _, arxiv_id in rows})
+
+    for first_name, last_name, arxiv_id in rows:
+        if entry := entries.get(arxiv_id):
+            streams[(first_name, last_name)].append(entry)
+
+    for stream in streams.values():
+        stream.sort(key=lambda entry: entry.published, reverse=True)
+
+    return streams
+
+
+def _filter_authors(author_keys: list[AuthorKey]) -> QuerySet[ArxivEntryAuthor]:
+    condition = reduce(or_, (
+        Q(first_name=first_name, last_name=last_name)
+        for first_name, last_name in author_keys
+    ))
+    return (
+        ArxivEntryAuthor.objects
+        .filter(condition)
+        .order_by('-arxiv_entry__published')
+    )
+
+
+def merge_scholar_streams(
+    streams: dict[AuthorKey, list[ArxivEntry]],
+    scholar_names: dict[AuthorKey, list[str]],
+) -> list[tuple[ArxivEntry, list[str]]]:
+    """
+    用大小为学者数的堆归并各学者的论文流，按发布时间倒序返回去重后的论文及其来源学者。
+    """
+    def tagged(key: AuthorKey) -> Iterator[tuple[ArxivEntry, AuthorKey]]:
+        for entry in streams[key]:
+            yield entry, key
+
+    merged = heapq.merge(
+        *(tagged(key) for key in streams),
+        key=lambda item: item[0].published,
+        reverse=True,
+    )
+
+    results: dict[str, tuple[ArxivEntry, list[str]]] = {}
+    for entry, key in merged:
+        if result := results.get(entry.arxiv_id):
+            result[1].extend(scholar_names[key])
+        else:
+            results[entry.arxiv_id] = (entry, list(scholar_names[key]))
+
+    return list(results.values())
+
+
+def merge_topic_hits(
+    topic_hits: dict[str, list[dict[str, Any]]],
+    limit: int,
+) -> dict[str, dict[str, float]]:
+    """
+    用大小为话题数的堆按得分从高到低归并各话题的候选列表，返回得分最高的前 ``limit`` 个候选
+    及其在各话题下的得分。
+    """
+    def tagged(topic: str) -> Iterator[tuple[float, str, str]]:
+        for hit in topic_hits[topic]:
+            yield hit['score'], hit['entry_id'], topic
+
+    merged = heapq.merge(
+        *(tagged(topic) for topic in topic_hits),
+        key=itemgetter(0),
+        reverse=True,
+    )
+
+    candidates: dict[str, dict[str, float]] = {}
+    for score, entry_id, topic in merged:
+        topic_scores = candidates.get(entry_id)
+        if topic_scores is None:
+            if len(candidates) >= limit:
+                continue
+            topic_scores = candidates[entry_id] = {}
+        topic_scores[topic] = score
+
+    return candidates
+
+
+FollowerIndex = dict[AuthorKey, list[tuple[int, str]]]
+
+FOLLOW_INBOX_BACKFILL_SIZE = 10
+
+
+def build_follower_index() -> FollowerIndex:
+    """
+    构建从标准化作者姓名到关注者的倒排索引。
+    """
+    index: FollowerIndex = {}
+    subscriptions = ScholarSubscription.objects.values_list('subscriber_id', 'scholar_name')
+    for subscriber_id, scholar_name in subscriptions:
+        normalized = normalize_author(scholar_name)
+        key = (normalized['first_name'], normalized['last_name'])
+        index.setdefault(key, []).append((subscriber_id, scholar_name))
+    return index
+
+
+def fan_out_follow_inbox(
+    authors: Iterable[ArxivEntryAuthor],
+    follower_index: FollowerIndex | None = None,
+) -> int:
+    """
+    将新入库的论文写入关注了其作者的用户的收件箱，返回写入的条目数。
+    收件箱中已有的条目合并新的学者，例如论文的新版本增加了其他被关注的作者。
+    """
+    if follower_index is None:
+        follower_index = build_follower_index()
+
+    items: dict[tuple[int, str], FollowInboxItem] = {}
+    for author in authors:
+        followers = follower_index.get((author.first_name, author.last_name), [])
+        for user_id, scholar_name in followers:
+            entry = author.arxiv_entry
+            item = items.get((user_id, entry.arxiv_id))
+            if item is None:
+                item = items[(user_id, entry.arxiv_id)] = FollowInboxItem(
+                    user_id=user_id,
+                    arxiv_entry=entry,
+                    timestamp=entry.published,
+                )
+            if scholar_name not in item.scholar_names:
+                item.scholar_names.append(scholar_name)
+
+    updated_items: list[FollowInboxItem] = []
+    existing_items = FollowInboxItem.objects.filter(
+        user_id__in={user_id for user_id, _ in items},
+        arxiv_entry__in={arxiv_id for _, arxiv_id in items},
+    )
+    for existing in existing_items:
+        item = items.pop((existing.user_id, existing.arxiv_entry_id), None)
+        if item is None:
+            continue
+        new_names = [name for name in item.scholar_names if name not in existing.scholar_names]
+        if new_names:
+            existing.scholar_names.extend(new_names)
+            updated_items.append(existing)
+
+    FollowInboxItem.objects.bulk_update(updated_items, ['scholar_names'])
+    FollowInboxItem.objects.bulk_create(items.values(), ignore_conflicts=True)
+    return len(items) + len(updated_items)
+
+
+def backfill_follow_inbox(user_id: int, scholar_name: str) -> None:
+    """
+    用户关注学者后，将学者最近的论文补充到用户的收件箱。
+    """
+    (key, names), = group_scholar_names([scholar_name]).items()
+    entries = recall_scholar_entries([key], limit=FOLLOW_INBOX_BACKFILL_SIZE)[key]
+
+    existing_by_entry = {
+        item.arxiv_entry_id: item
+        for item in FollowInboxItem.objects.filter(user_id=user_id, arxiv_entry__in=entries)
+    }
+
+    new_items: list[FollowInboxItem] = []
+    updated_items: list[FollowInboxItem] = []
+    for entry in entries:
+        if item := existing_by_entry.get(entry.arxiv_id):
+            if scholar_name not in item.scholar_names:
+                item.scholar_names.append(scholar_name)
+                updated_items.append(item)
+        else:
+            new_items.append(FollowInboxItem(
+                user_id=user_id,
+                arxiv_entry=entry,
+                timestamp=entry.published,
+                scholar_names=list(names),
+            ))
+
+    FollowInboxItem.objects.bulk_create(new_items, ignore_conflicts=True)
+    FollowInboxItem.objects.bulk_update(updated_items, ['scholar_names'])
+
+
+def prune_follow_inbox(user_id: int, scholar_name: str) -> None:
+    """
+    用户取消关注学者后，从收件箱中移除仅由该学者带来的论文。
+    """
+    normalized = normalize_author(scholar_name)
+    items = FollowInboxItem.objects.filter(
+        user_id=user_id,
+        arxiv_entry__arxiventryauthor__first_name=normalized['first_name'],
+        arxiv_entry__arxiventryauthor__last_name=normalized['last_name'],
+    ).distinct()
+
+    deleted_ids: list[int] = []
+    updated_items: list[FollowInboxItem] = []
+    for item in items:
+        if scholar_name not in item.scholar_names:
+            continue
+        item.scholar_names.remove(scholar_name)
+        if item.scholar_names:
+            updated_items.append(item)
+        else:
+            deleted_ids.append(item.pk)
+
+    FollowInboxItem.objects.filter(pk__in=deleted_ids).delete()
+    FollowInboxItem.objects.bulk_update(updated_items, ['scholar_names'])
+
+
+def rebuild_follow_inbox(user_id: int) -> int:
+    """
+    根据用户当前关注的学者重建其收件箱，返回写入的条目数。
+    """
+    scholar_names = group_scholar_names(
+        ScholarSubscription.objects
+        .filter(subscriber_id=user_id)
+        .values_list('scholar_name', flat=True)
+    )
+    streams = recall_scholar_entries(scholar_names.keys(), limit=FOLLOW_INBOX_BACKFILL_SIZE)
+
+    items = [
+        FollowInboxItem(
+            user_id=user_id,
+            arxiv_entry=entry,
+            timestamp=entry.published,
+            scholar_names=names,
+        )
+        for entry, names in merge_scholar_streams(streams, scholar_names)
+    ]
+
+    with transaction.atomic():
+        FollowInboxItem.objects.filter(user_id=user_id).delete()
+        FollowInboxItem.objects.bulk_create(items)
+
+    return len(items)
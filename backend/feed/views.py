@@ -1,6 +1,10 @@
 from datetime import datetime
-from typing import TypedDict, Union
+from typing import Any, Optional, TypedDict, Union
 
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Prefetch
 from django.utils.timezone import now, timedelta
 from drf_spectacular.utils import OpenApiResponse, extend_schema
 from rest_framework.decorators import api_view, permission_classes
@@ -10,12 +14,21 @@ from rest_framework.response import Response
 
 from pub.models import ArxivEntry, GithubRepo
 from pub.utils import normalize_author
-from sub.models import ScholarSubscription, TopicSubscription
+from sub.models import TopicSubscription
 from utils.exceptions import ErrorSerializer
-from utils.feed_engine import session
-
+from utils.feed_engine import post_json_concurrently
+
+from . import ranking
+from .cache import get_cached_feed
+from .constants import DEFAULT_TOPICS
+from .hot import compute_hot_scores
+from .hydration import hydrate_hits
+from .models import FollowInboxItem, HotScore, TopicCandidates
 from .serializers import (FollowFeedSerializer, HotFeedSerializer,
                           SearchResultSerializer, SubscriptionFeedSerializer)
+from .utils import merge_topic_hits
+
+FOLLOW_FEED_SIZE = 100
 
 
 class FollowSource(TypedDict):
@@ -45,50 +58,32 @@ def get_follow_feed(request: Request):
     """
     获取关注动态。
     """
-    # 获取用户关注的学者。
-    followed_scholar_names = (
-        ScholarSubscription.objects
-        .filter(subscriber=request.user)
-        .values_list('scholar_name', flat=True)
+    # 从收件箱中读取最新的关注动态。
+    inbox_items = (
+        FollowInboxItem.objects
+        .filter(user=request.user)
+        .prefetch_related(Prefetch('arxiv_entry', queryset=ArxivEntry.objects.as_cards()))
+        .order_by('-timestamp')[:FOLLOW_FEED_SIZE]
     )
 
-    candidates: list[FollowCandidate] = []
-    candidate_arxiv_entries: dict[str, FollowCandidate] = {}
-
-    for scholar_name in followed_scholar_names:
-        # 召回学者的最新论文。
-        normalized = normalize_author(scholar_name)
-        arxiv_entries = ArxivEntry.objects.filter(
-            arxiventryauthor__first_name=normalized['first_name'],
-            arxiventryauthor__last_name=normalized['last_name'],
-        ).order_by('-published')[:10]
-
-        for entry in arxiv_entries:
-            # 检查论文是否已经在其他学者的动态中。
-            if candidate := candidate_arxiv_entries.get(entry.arxiv_id):
-                candidate['source']['scholar_names'].append(scholar_name)
-                continue
-
-            # 将论文加入候选集。
-            candidate = {
-                'origin': 'arxiv',
-                'item': entry,
-                'timestamp': entry.published,
-                'source': {
-                    'scholar_names': [scholar_name],
-                },
-            }
-            candidates.append(candidate)
-            candidate_arxiv_entries[entry.arxiv_id] = candidate
-
-    # 按时间顺序排序候选集。
-    sorted_candidates = sorted(
-        candidate_arxiv_entries.values(),
-        key=lambda candidate: candidate['timestamp'],
-        reverse=True,
-    )
+    sorted_candidates: list[FollowCandidate] = [
+        {
+            'origin': 'arxiv',
+            'item': item.arxiv_entry,
+            'timestamp': item.timestamp,
+            'source': {
+                'scholar_names': item.scholar_names,
+            },
+        }
+        for item in inbox_items
+    ]
+
+    serializer = FollowFeedSerializer(sorted_candidates, many=True, context={'request': request})
+    return Response(serializer.data)
 
-    return Response(FollowFeedSerializer(sorted_candidates, many=True).data)
+
+# 每个来源参与排序的候选数上限，避免订阅大量话题的用户一次加载过多条目。
+SUBSCRIPTION_CANDIDATES_LIMIT = 500
 
 
 class SubscriptionSource(TypedDict):
@@ -140,91 +135,112 @@ def get_subscription_feed(request: Request):
         )
 
     if not subscribed_topics:
-        # TODO: 从话题推荐模型中获取推荐的话题。
-        subscribed_topics = ['Machine Learning', 'Computer Vision', 'Natural Language Processing']
+        # 未订阅话题的用户看到的推荐完全相同，因此共享缓存。
+        data = get_cached_feed(
+            'subscription', get_cache_variant(request),
+            lambda: compute_subscription_feed(request, DEFAULT_TOPICS),
+        )
+        return Response(data)
 
-    search_payload = {
-        'queries': subscribed_topics,
-        'max_results': 10,
-    }
+    return Response(compute_subscription_feed(request, subscribed_topics))
 
-    candidates: list[SubscriptionCandidate] = []
 
-    # 从推荐后端中获取推荐的 arXiv 论文。
-    response = session.post('/arxiv/search', json=search_payload)
-    response.raise_for_status()
-    search_results = response.json()
+def compute_subscription_feed(
+        request: Request,
+        subscribed_topics: list[str]) -> list[dict[str, Any]]:
+    """
+    计算订阅了给定话题的用户的订阅推荐。
+    """
+    # 读取预先计算的话题候选列表，请求路径上不访问推荐后端。
+    topic_candidates = list(TopicCandidates.objects.filter(topic__in=subscribed_topics))
+
+    if not topic_candidates:
+        # 话题候选尚未计算时退化为只依赖本地数据的热点追踪。
+        hot_candidates = [
+            {**candidate, 'source': {'topics': []}}
+            for candidate in list_hot_candidates()
+        ]
+        serializer = SubscriptionFeedSerializer(
+            hot_candidates, many=True, context={'request': request})
+        return serializer.data
 
-    arxiv_candidates: dict[str, ArxivSubscriptionCandidate] = {}
+    candidates: list[SubscriptionCandidate] = []
 
-    for topic, search_result in zip(subscribed_topics, search_results):
-        for entry in search_result:
-            candidate = arxiv_candidates.setdefault(entry['entry_id'], {
-                'arxiv_id': entry['entry_id'],
-                'topic_scores': {},
-            })
-            candidate['topic_scores'][topic] = entry['score']
+    arxiv_candidates: dict[str, ArxivSubscriptionCandidate] = {
+        arxiv_id: {
+            'arxiv_id': arxiv_id,
+            'topic_scores': topic_scores,
+        }
+        for arxiv_id, topic_scores in merge_topic_hits(
+            {row.topic: row.arxiv_hits for row in topic_candidates},
+            limit=SUBSCRIPTION_CANDIDATES_LIMIT,
+        ).items()
+    }
 
-    for candidate in arxiv_candidates.values():
-        try:
-            arxiv_entry = ArxivEntry.objects.get(arxiv_id=candidate['arxiv_id'])
-        except ArxivEntry.DoesNotExist:
-            continue
+    current_time = now()
 
-        score = get_arxiv_subscription_score(candidate, arxiv_entry)
+    arxiv_entries = hydrate_hits('arxiv', list(arxiv_candidates))
+    arxiv_topic_scores = [
+        arxiv_candidates[entry.arxiv_id]['topic_scores'] for entry in arxiv_entries
+    ]
+    arxiv_scores = ranking.arxiv_subscription_scores(
+        np.array([sum(topic_scores.values()) for topic_scores in arxiv_topic_scores]),
+        ranking.to_timestamps(entry.published for entry in arxiv_entries),
+        current_time,
+    )
 
+    for arxiv_entry, topic_scores, score in zip(arxiv_entries, arxiv_topic_scores, arxiv_scores):
         candidates.append({
             'origin': 'arxiv',
             'item': arxiv_entry,
             'timestamp': arxiv_entry.published,
             'source': {
-                'topics': list_top_topics(candidate['topic_scores']),
+                'topics': list_top_topics(topic_scores),
             },
-            '_score': score,
+            '_score': float(score),
         })
 
-    # 从推荐后端中获取推荐的 GitHub 仓库。
-    response = session.post('/github/search', json=search_payload)
-    response.raise_for_status()
-    search_results = response.json()
-
-    github_candidates: dict[str, GithubSubscriptionCandidate] = {}
-
-    for topic, search_result in zip(subscribed_topics, search_results):
-        for entry in search_result:
-            candidate = github_candidates.setdefault(entry['entry_id'], {
-                'full_name': entry['entry_id'],
-                'topic_scores': {},
-            })
-            candidate['topic_scores'][topic] = entry['score']
-
-    for candidate in github_candidates.values():
-        try:
-            github_repo = GithubRepo.objects.get(full_name=candidate['full_name'])
-        except GithubRepo.DoesNotExist:
-            continue
+    github_candidates: dict[str, GithubSubscriptionCandidate] = {
+        full_name: {
+            'full_name': full_name,
+            'topic_scores': topic_scores,
+        }
+        for full_name, topic_scores in merge_topic_hits(
+            {row.topic: row.github_hits for row in topic_candidates},
+            limit=SUBSCRIPTION_CANDIDATES_LIMIT,
+        ).items()
+    }
 
-        score = get_github_subscription_score(candidate, github_repo)
+    github_repos = hydrate_hits('github', list(github_candidates))
+    github_topic_scores = [
+        github_candidates[repo.full_name]['topic_scores'] for repo in github_repos
+    ]
+    github_scores = ranking.github_subscription_scores(
+        np.array([sum(topic_scores.values()) for topic_scores in github_topic_scores]),
+        np.array([len(topic_scores) for topic_scores in github_topic_scores]),
+        ranking.to_timestamps(repo.created_at for repo in github_repos),
+        ranking.to_timestamps(repo.pushed_at for repo in github_repos),
+        current_time,
+    )
 
+    for github_repo, topic_scores, score in zip(github_repos, github_topic_scores, github_scores):
         candidates.append({
             'origin': 'github',
             'item': github_repo,
             'timestamp': github_repo.pushed_at,
             'source': {
-                'topics': list_top_topics(candidate['topic_scores']),
+                'topics': list_top_topics(topic_scores),
             },
-            '_score': score,
+            '_score': float(score),
         })
 
-    # 按得分排序候选集。
-    sorted_candidates = sorted(
-        candidates,
-        key=lambda candidate: candidate['_score'],
-        reverse=True,
-    )
-    sorted_candidates = sorted_candidates[:50]
+    # 选出得分最高的 50 个候选。
+    scores = np.array([candidate['_score'] for candidate in candidates])
+    sorted_candidates = [candidates[i] for i in ranking.top_k(scores, 50)]
 
-    return Response(SubscriptionFeedSerializer(sorted_candidates, many=True).data)
+    serializer = SubscriptionFeedSerializer(
+        sorted_candidates, many=True, context={'request': request})
+    return serializer.data
 
 
 def get_arxiv_subscription_score(
@@ -275,6 +291,10 @@ def list_top_topics(topic_scores: dict[str, float], top_n: int = 3) -> list[str]
     )[:top_n]
 
 
+# 热点得分尚未计算时直接计算的结果的缓存键。
+LIVE_HOT_SCORES_CACHE_KEY = 'feed:hot:live'
+
+
 class HotCandidate(TypedDict):
     origin: str
     item: Union[ArxivEntry, GithubRepo]
@@ -298,44 +318,48 @@ def get_hot_feed(request: Request):
     """
     获取热点追踪。
     """
-    # 获取最近 30 天的 arXiv 论文和 GitHub 仓库。
-    one_week_ago = now() - timedelta(days=30)
-    arxiv_entries = ArxivEntry.objects.filter(published__gte=one_week_ago, view_count__gt=0)
-    github_repos = GithubRepo.objects.filter(pushed_at__gte=one_week_ago, view_count__gt=0)
-
-    # 计算热点追踪得分。
-    arxiv_candidates: list[HotCandidate] = []
-    for entry in arxiv_entries:
-        score = get_arxiv_hot_score(entry)
-        arxiv_candidates.append({
-            'origin': 'arxiv',
-            'item': entry,
-            'timestamp': entry.published,
-            '_score': score,
-        })
-
-    github_candidates: list[HotCandidate] = []
-    for repo in github_repos:
-        score = get_github_hot_score(repo)
-        github_candidates.append({
-            'origin': 'github',
-            'item': repo,
-            'timestamp': repo.pushed_at,
-            '_score': score,
-        })
+    data = get_cached_feed('hot', get_cache_variant(request), lambda: compute_hot_feed(request))
+    return Response(data)
 
-    # 分别标准化两个集合的得分。
-    normalize_scores(arxiv_candidates)
-    normalize_scores(github_candidates)
 
-    # 按得分排序候选集。
-    candidates = arxiv_candidates + github_candidates
-    candidates.sort(key=lambda candidate: candidate['_score'], reverse=True)
+def compute_hot_feed(request: Request) -> list[dict[str, Any]]:
+    """
+    计算热点追踪，结果对所有用户相同。
+    """
+    candidates = list_hot_candidates()
+    return HotFeedSerializer(candidates, many=True, context={'request': request}).data
 
-    # 选取得分最高的 50 个候选。
-    candidates = candidates[:50]
 
-    return Response(HotFeedSerializer(candidates, many=True).data)
+def list_hot_candidates() -> list[HotCandidate]:
+    """
+    读取预先计算的最近 30 天内得分最高的 50 个候选。
+    """
+    hot_scores = list(
+        HotScore.objects
+        .filter(timestamp__gte=now() - timedelta(days=30))
+        .prefetch_related(
+            Prefetch('arxiv_entry', queryset=ArxivEntry.objects.as_cards()),
+            Prefetch('github_repo', queryset=GithubRepo.objects.as_cards()),
+        )
+        .order_by('-score')[:50]
+    )
+    if not hot_scores and not HotScore.objects.exists():
+        # 得分尚未计算（如刚部署、refreshhotscores 还没有运行）时直接计算，
+        # 结果缓存 FEED_CACHE_TTL 秒，避免每次请求都重新计算。
+        hot_scores = cache.get(LIVE_HOT_SCORES_CACHE_KEY)
+        if hot_scores is None:
+            hot_scores = compute_hot_scores(50)
+            cache.set(LIVE_HOT_SCORES_CACHE_KEY, hot_scores, timeout=settings.FEED_CACHE_TTL)
+
+    return [
+        {
+            'origin': hot_score.origin,
+            'item': hot_score.item,
+            'timestamp': hot_score.timestamp,
+            '_score': hot_score.score,
+        }
+        for hot_score in hot_scores
+    ]
 
 
 def get_arxiv_hot_score(arxiv_entry: ArxivEntry) -> float:
@@ -391,6 +415,15 @@ def normalize_scores(
         candidate['_score'] = mean + std * z_score
 
 
+def normalize_candidate_scores(candidates: list[SupportsScore]) -> None:
+    """
+    用向量化的方式标准化候选集的得分，结果与 ``normalize_scores`` 相同。
+    """
+    scores = ranking.z_scores(np.array([candidate['_score'] for candidate in candidates]))
+    for candidate, score in zip(candidates, scores):
+        candidate['_score'] = float(score)
+
+
 class SearchResult(TypedDict):
     origin: str
     item: Union[ArxivEntry, GithubRepo]
@@ -422,7 +455,7 @@ def get_search_results(request: Request):
 
     # 按作者搜索 arXiv 论文。
     normalized = normalize_author(query)
-    arxiv_entries = ArxivEntry.objects.filter(
+    arxiv_entries = ArxivEntry.objects.as_cards().filter(
         arxiventryauthor__first_name=normalized['first_name'],
         arxiventryauthor__last_name=normalized['last_name'],
     ).order_by('-published')[:20]
@@ -440,61 +473,69 @@ def get_search_results(request: Request):
         'max_results': 50,
     }
 
-    # 从推荐后端中获取 arXiv 论文。
-    response = session.post('/arxiv/search', json=search_payload)
-    response.raise_for_status()
-    arxiv_search_results = response.json()[0]
+    # 并发地从推荐后端中获取 arXiv 论文和 GitHub 仓库，超时的一方按空结果处理。
+    arxiv_search_results, github_search_results = post_json_concurrently([
+        ('/arxiv/search', search_payload),
+        ('/github/search', search_payload),
+    ])
+
     arxiv_candidates: list[SearchResult] = []
 
     # print("arxiv scores:", [entry['score'] for entry in arxiv_search_results])
 
-    for entry in arxiv_search_results:
-        if entry['score'] < 0.6:
-            break
-
-        try:
-            arxiv_entry = ArxivEntry.objects.get(arxiv_id=entry['entry_id'])
-        except ArxivEntry.DoesNotExist:
-            continue
+    arxiv_scores = filter_search_hits(arxiv_search_results)
 
+    for arxiv_entry in hydrate_hits('arxiv', list(arxiv_scores)):
         arxiv_candidates.append({
             'origin': 'arxiv',
             'item': arxiv_entry,
             'timestamp': arxiv_entry.published,
-            '_score': entry['score'],
+            '_score': arxiv_scores[arxiv_entry.arxiv_id],
         })
 
-    normalize_scores(arxiv_candidates)
+    normalize_candidate_scores(arxiv_candidates)
     search_results.extend(arxiv_candidates)
 
-    # 从推荐后端中获取 GitHub 仓库。
-    response = session.post('/github/search', json=search_payload)
-    response.raise_for_status()
-    github_search_results = response.json()[0]
     github_candidates: list[SearchResult] = []
 
     # print("github scores:", [entry['score'] for entry in github_search_results])
 
-    for entry in github_search_results:
-        if entry['score'] < 0.6:
-            break
-
-        try:
-            github_repo = GithubRepo.objects.get(full_name=entry['entry_id'])
-        except GithubRepo.DoesNotExist:
-            continue
+    github_scores = filter_search_hits(github_search_results)
 
+    for github_repo in hydrate_hits('github', list(github_scores)):
         github_candidates.append({
             'origin': 'github',
             'item': github_repo,
             'timestamp': github_repo.pushed_at,
-            '_score': entry['score'],
+            '_score': github_scores[github_repo.full_name],
         })
 
-    normalize_scores(github_candidates)
+    normalize_candidate_scores(github_candidates)
     search_results.extend(github_candidates)
 
     # 按得分排序搜索结果。
     search_results.sort(key=lambda result: result['_score'], reverse=True)
 
-    return Response(SearchResultSerializer(search_results, many=True).data)
+    serializer = SearchResultSerializer(search_results, many=True, context={'request': request})
+    return Response(serializer.data)
+
+
+def get_cache_variant(request: Request) -> str:
+    """
+    缓存的动态按请求的字段区分。
+    """
+    return f"fields={request.query_params.get('fields', '')}"
+
+
+def filter_search_hits(
+        search_results: Optional[list[list[dict[str, Any]]]],
+        min_score: float = 0.6) -> dict[str, float]:
+    """
+    取出单个查询的搜索结果中得分不低于 ``min_score`` 的条目，返回按得分降序排列的条目 ID 到得分的映射。
+    """
+    hits: dict[str, float] = {}
+    for entry in search_results[0] if search_results else []:
+        if entry['score'] < min_score:
+            break
+        hits.setdefault(entry['entry_id'], entry['score'])
+    return hits
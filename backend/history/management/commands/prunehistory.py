@@ -0,0 +1,21 @@
+import argparse
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from history.utils import prune_history
+
+
+class Command(BaseCommand):
+    help = '清理资源已被删除的浏览历史，并限制每个用户保留的记录数。'
+
+    def add_arguments(self, parser: argparse.ArgumentParser) -> None:
+        parser.add_argument('--max-per-user', type=int, default=settings.HISTORY_MAX_PER_USER,
+                            help='每个用户保留的记录数')
+        parser.add_argument('--chunk-size', type=int, default=1000, help='每次删除的记录数')
+
+    def handle(self, *args, **options):
+        orphaned, capped = prune_history(options['max_per_user'], options['chunk_size'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Successfully pruned history ({orphaned} orphaned, {capped} over the per-user cap).'))
@@ -0,0 +1,52 @@
+# Generated by Django 5.1.2 on 2026-10-17 21:13
+
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def dedupe_history(apps, schema_editor):
+    """
+    每个用户对每个资源只保留最近一次的记录。
+    """
+    History = apps.get_model('history', 'History')
+
+    for field in ('arxiv_entry', 'github_repo'):
+        duplicates = (
+            History.objects
+            .filter(**{f'{field}__isnull': False})
+            .values('user', field)
+            .annotate(count=Count('id'))
+            .filter(count__gt=1)
+        )
+        for duplicate in duplicates:
+            records = History.objects.filter(user=duplicate['user'], **{field: duplicate[field]})
+            keep = records.order_by('-viewed_at', '-id').values_list('id', flat=True).first()
+            records.exclude(id=keep).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('history', '0002_alter_history_options'),
+        ('pub', '0010_viewrollup'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='history',
+            name='viewed_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.RunPython(dedupe_history, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='history',
+            constraint=models.UniqueConstraint(fields=('user', 'arxiv_entry'), name='unique_user_arxiv_entry_history'),
+        ),
+        migrations.AddConstraint(
+            model_name='history',
+            constraint=models.UniqueConstraint(fields=('user', 'github_repo'), name='unique_user_github_repo_history'),
+        ),
+    ]
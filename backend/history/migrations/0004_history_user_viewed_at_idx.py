@@ -0,0 +1,20 @@
+# Generated by Django 5.1.2 on 2026-10-17 21:15
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('history', '0003_dedupe_history'),
+        ('pub', '0010_viewrollup'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='history',
+            index=models.Index(fields=['user', '-viewed_at'], name='history_user_viewed_at_idx'),
+        ),
+    ]
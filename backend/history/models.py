@@ -1,5 +1,24 @@
 from django.conf import settings
 from django.db import models
+from django.db.models.functions import Substr
+from django.utils.timezone import now
+
+from pub.models import (ARXIV_CARD_FIELDS, GITHUB_CARD_FIELDS,
+                        SUMMARY_EXCERPT_LENGTH)
+
+
+class HistoryQuerySet(models.QuerySet):
+    def with_cards(self):
+        """
+        用一条联表查询加载卡片需要的资源字段，摘要截断后作为 ``arxiv_summary_excerpt``。
+        """
+        return self.select_related('arxiv_entry', 'github_repo').only(
+            'id', 'user_id', 'viewed_at', 'arxiv_entry_id', 'github_repo_id',
+            *(f'arxiv_entry__{field}' for field in ARXIV_CARD_FIELDS),
+            *(f'github_repo__{field}' for field in GITHUB_CARD_FIELDS),
+        ).annotate(
+            arxiv_summary_excerpt=Substr('arxiv_entry__summary', 1, SUMMARY_EXCERPT_LENGTH),
+        )
 
 
 class History(models.Model):
@@ -14,7 +33,7 @@ class History(models.Model):
 
     user = models.ForeignKey(settings.AUTH_USER_MODEL,
                              on_delete=models.CASCADE)
-    viewed_at = models.DateTimeField(auto_now=True)
+    viewed_at = models.DateTimeField(default=now)
 
     # 外键关联
     arxiv_entry = models.ForeignKey('pub.ArxivEntry',
@@ -24,10 +43,22 @@ class History(models.Model):
                                     on_delete=models.SET_NULL,
                                     null=True, blank=True)
 
+    objects = HistoryQuerySet.as_manager()
+
     class Meta:
         verbose_name = '历史记录'
         verbose_name_plural = '历史记录'
         ordering = ['-viewed_at']
+        indexes = [
+            models.Index(fields=['user', '-viewed_at'], name='history_user_viewed_at_idx'),
+        ]
+        # 每个用户对每个资源只保留一条记录，批量写入时按约束合并。
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'arxiv_entry'],
+                                    name='unique_user_arxiv_entry_history'),
+            models.UniqueConstraint(fields=['user', 'github_repo'],
+                                    name='unique_user_github_repo_history'),
+        ]
 
     @property
     def content_type(self):
@@ -0,0 +1,11 @@
+from rest_framework.pagination import CursorPagination
+
+
+class HistoryCursorPagination(CursorPagination):
+    """
+    按浏览时间倒序的游标分页，翻页时利用 (user, viewed_at) 索引定位，不需要 OFFSET。
+    """
+    ordering = ('-viewed_at', '-id')
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 100
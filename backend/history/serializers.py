@@ -1,6 +1,8 @@
+from django.utils.timezone import now
 from rest_framework import serializers
 
-from pub.serializers import ArxivEntrySerializer, GithubRepoSerializer
+from pub.serializers import ArxivEntryCardSerializer, GithubRepoCardSerializer
+from user.counters import adjust_counter
 
 from .models import History
 
@@ -15,10 +17,12 @@ class HistorySerializer(serializers.ModelSerializer):
         read_only_fields = ['viewed_at']
 
     def get_entry_data(self, obj):
+        if hasattr(obj, 'arxiv_summary_excerpt') and obj.arxiv_entry:
+            obj.arxiv_entry.summary_excerpt = obj.arxiv_summary_excerpt
         if obj.arxiv_entry:
-            return ArxivEntrySerializer(obj.arxiv_entry).data
+            return ArxivEntryCardSerializer(obj.arxiv_entry, context=self.context).data
         elif obj.github_repo:
-            return GithubRepoSerializer(obj.github_repo).data
+            return GithubRepoCardSerializer(obj.github_repo, context=self.context).data
         return None
 
     def create(self, validated_data):
@@ -42,9 +46,12 @@ class HistorySerializer(serializers.ModelSerializer):
 
         if existing:
             # 如果存在，只更新访问时间
-            existing.save()  # 触发 auto_now
+            existing.viewed_at = now()
+            existing.save(update_fields=['viewed_at'])
             return existing
 
         # 如果不存在，创建新记录
         validated_data.update(history_data)
-        return super().create(validated_data)
+        history = super().create(validated_data)
+        adjust_counter(history.user_id, 'history_count', 1)
+        return history
@@ -1,17 +1,28 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
 from django.contrib.auth import get_user_model
+from django.core.management import call_command
 from django.urls import reverse
+from django.utils.timezone import now
 from rest_framework import status
 from rest_framework.test import APITestCase
 
 from pub.models import ArxivEntry, GithubRepo
+from utils.view_counts import clear_write_buffers
 
 from .models import History
+from .utils import history_buffer
 
 User = get_user_model()
 
 
 class HistoryAPITest(APITestCase):
     def setUp(self):
+        clear_write_buffers()
+        self.addCleanup(clear_write_buffers)
+
         # 创建测试用户
         self.user = User.objects.create_user(
             username='testuser',
@@ -52,6 +63,7 @@ class HistoryAPITest(APITestCase):
         url = reverse('pub:get_arxiv_entry', kwargs={
                       'arxiv_id': self.arxiv_paper.arxiv_id})
         response = self.client.get(url)
+        history_buffer.flush()
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
@@ -72,6 +84,7 @@ class HistoryAPITest(APITestCase):
         url = reverse('pub:get_github_repo', kwargs={
                       'owner': owner, 'repo_name': repo})
         response = self.client.get(url)
+        history_buffer.flush()
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
@@ -92,6 +105,7 @@ class HistoryAPITest(APITestCase):
 
         # 第一次访问
         self.client.get(url)
+        history_buffer.flush()
         first_view = History.objects.get(
             user=self.user,
             arxiv_entry=self.arxiv_paper
@@ -104,6 +118,7 @@ class HistoryAPITest(APITestCase):
 
         # 第二次访问
         self.client.get(url)
+        history_buffer.flush()
         second_view = History.objects.get(
             user=self.user,
             arxiv_entry=self.arxiv_paper
@@ -121,4 +136,91 @@ class HistoryAPITest(APITestCase):
         response = self.client.get(url)
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
+        history_buffer.flush()
         self.assertEqual(History.objects.count(), 0)
+
+    def test_repeated_views_are_coalesced(self):
+        """测试写入前的多次访问合并为一条记录"""
+        arxiv_url = reverse('pub:get_arxiv_entry', kwargs={
+                            'arxiv_id': self.arxiv_paper.arxiv_id})
+        owner, repo = self.github_repo.full_name.split('/')
+        github_url = reverse('pub:get_github_repo', kwargs={
+                             'owner': owner, 'repo_name': repo})
+        for _ in range(3):
+            self.client.get(arxiv_url)
+        self.client.get(github_url)
+        self.assertEqual(History.objects.count(), 0)
+
+        history_buffer.flush()
+        response = self.client.get(reverse('history-list'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [item['content_type'] for item in response.data['results']], ['github', 'arxiv'])
+        self.assertEqual(History.objects.count(), 2)
+
+        # 再次写入时更新已有的记录
+        self.client.get(arxiv_url)
+        history_buffer.flush()
+        self.assertEqual(History.objects.count(), 2)
+        self.assertEqual(History.objects.first().content_type, 'arxiv')
+
+    @mock.patch('utils.bulk.supports_bulk_create_unique_fields', return_value=False)
+    def test_upsert_without_unique_fields(self, _):
+        """测试数据库不支持按唯一字段更新冲突（MySQL）时，更新已有的记录并插入新记录"""
+        viewed_at = now() - timedelta(days=1)
+        existing = History.objects.create(
+            user=self.user, arxiv_entry=self.arxiv_paper, viewed_at=viewed_at)
+
+        history_buffer.add(self.user.pk, 'arxiv', self.arxiv_paper.pk)
+        history_buffer.add(self.user.pk, 'github', self.github_repo.pk)
+        history_buffer.flush()
+
+        self.assertEqual(History.objects.filter(user=self.user).count(), 2)
+        existing.refresh_from_db()
+        self.assertGreater(existing.viewed_at, viewed_at)
+        self.assertTrue(
+            History.objects.filter(user=self.user, github_repo=self.github_repo).exists())
+
+
+class HistoryListTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.client.force_authenticate(user=self.user)
+
+        start = now() - timedelta(days=1)
+        self.entries = [
+            ArxivEntry.objects.create(
+                arxiv_id=f'2312.{i:05d}', title=f'Paper {i}', summary='Long summary ' * 100,
+                authors=[], published=start, updated=start, primary_category='cs.AI',
+                categories=[], link='', pdf='',
+            )
+            for i in range(5)
+        ]
+        History.objects.bulk_create([
+            History(user=self.user, arxiv_entry=entry, viewed_at=start + timedelta(minutes=i))
+            for i, entry in enumerate(self.entries)
+        ])
+
+    def test_cursor_pagination(self):
+        """测试历史记录按浏览时间倒序分页，卡片数据在同一条查询中加载"""
+        arxiv_ids = []
+        url = reverse('history-list') + '?page_size=2'
+        while url:
+            with self.assertNumQueries(1):
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            arxiv_ids += [item['entry_data']['arxiv_id'] for item in response.data['results']]
+            url = response.data['next']
+
+        self.assertEqual(arxiv_ids, [entry.arxiv_id for entry in reversed(self.entries)])
+
+    def test_prune_history(self):
+        """测试清理资源已删除的记录，并且每个用户只保留最近的记录"""
+        self.entries[4].delete()
+
+        out = StringIO()
+        call_command('prunehistory', '--max-per-user=2', '--chunk-size=1', stdout=out)
+        self.assertIn('1 orphaned, 2 over the per-user cap', out.getvalue())
+
+        remaining = History.objects.order_by('-viewed_at').values_list('arxiv_entry_id', flat=True)
+        self.assertEqual(list(remaining), ['2312.00003', '2312.00002'])
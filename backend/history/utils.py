@@ -1,19 +1,153 @@
-from .serializers import HistorySerializer
+from datetime import datetime
+from typing import Any, Optional
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Count, Q
+from django.utils.timezone import now
+
+from pub.models import ArxivEntry, GithubRepo
+from user.counters import recount_user_counters
+from utils.bulk import bulk_upsert
+from utils.view_counts import WriteBuffer
+
+from .models import History
+
+# (用户 ID, 外键字段, 资源 ID)
+HistoryKey = tuple[Any, str, Any]
+
+ENTRY_FIELDS = {
+    'arxiv': ('arxiv_entry', ArxivEntry),
+    'github': ('github_repo', GithubRepo),
+}
+
+
+class HistoryBuffer(WriteBuffer):
+    """
+    在内存中累计浏览历史，同一用户在写入间隔内对同一资源的多次浏览合并为一条，
+    按唯一约束批量写入，已有的记录只更新浏览时间。
+    """
+
+    def _new_pending(self) -> dict[HistoryKey, datetime]:
+        return {}
+
+    def _restore(self, pending: dict[HistoryKey, datetime]) -> None:
+        for key, viewed_at in pending.items():
+            self._pending[key] = max(viewed_at, self._pending.get(key, viewed_at))
+
+    def add(self, user_id: Any, content_type: str, entry_id: Any,
+            viewed_at: Optional[datetime] = None) -> None:
+        """
+        记录一次浏览。
+        """
+        field, _ = ENTRY_FIELDS[content_type]
+        viewed_at = viewed_at or now()
+
+        def add(pending: dict[HistoryKey, datetime]) -> None:
+            key = (user_id, field, entry_id)
+            pending[key] = max(viewed_at, pending.get(key, viewed_at))
+
+        self._record(add)
+
+    def _write(self, pending: dict[HistoryKey, datetime]) -> int:
+        # 跳过在写入前已被删除的用户和资源，避免外键错误导致整批写入失败。
+        user_ids = set(
+            get_user_model().objects
+            .filter(pk__in={user_id for user_id, _, _ in pending})
+            .values_list('pk', flat=True)
+        )
+
+        written = 0
+        written_users = set()
+        with transaction.atomic():
+            for field, model in ENTRY_FIELDS.values():
+                items = [
+                    (user_id, entry_id, viewed_at)
+                    for (user_id, key_field, entry_id), viewed_at in pending.items()
+                    if key_field == field and user_id in user_ids
+                ]
+                entry_ids = set(
+                    model.objects
+                    .filter(pk__in={entry_id for _, entry_id, _ in items})
+                    .values_list('pk', flat=True)
+                )
+                records = [
+                    History(user_id=user_id, viewed_at=viewed_at, **{f'{field}_id': entry_id})
+                    for user_id, entry_id, viewed_at in items
+                    if entry_id in entry_ids
+                ]
+                bulk_upsert(History, records, ['user', field], ['viewed_at'])
+                written += len(records)
+                written_users.update(record.user_id for record in records)
+
+            recount_user_counters(written_users, fields=['history_count'])
+        return written
+
+
+history_buffer = HistoryBuffer()
 
 
 def record_history(user, content_type, entry):
     """
-    记录用户访问历史
+    记录用户访问历史，记录先在内存中累计，随后批量写入
 
     Args:
         user: 用户对象
         content_type: 'arxiv' 或 'github'
         entry: ArxivEntry 或 GithubRepo 对象
     """
-    serializer = HistorySerializer(
-        data={},
-        context={'content_type': content_type, 'entry': entry}
+    history_buffer.add(user.pk, content_type, entry.pk)
+
+
+def delete_in_chunks(queryset, chunk_size: int, user_ids: set) -> int:
+    """
+    按主键分批删除，避免一次删除大量记录时长时间锁表，被删除记录的用户加入 ``user_ids``。
+    """
+    deleted = 0
+    while rows := list(queryset.values_list('id', 'user_id')[:chunk_size]):
+        count, _ = History.objects.filter(id__in=[pk for pk, _ in rows]).delete()
+        deleted += count
+        user_ids.update(user_id for _, user_id in rows)
+    return deleted
+
+
+def prune_history(max_per_user: int, chunk_size: int = 1000) -> tuple[int, int]:
+    """
+    删除资源已被删除的记录，并且每个用户只保留最近 ``max_per_user`` 条记录，
+    返回两类删除的记录数。
+    """
+    affected_users = set()
+    orphaned = delete_in_chunks(
+        History.objects.filter(arxiv_entry__isnull=True, github_repo__isnull=True)
+        .order_by('id'),
+        chunk_size,
+        affected_users,
     )
-    if serializer.is_valid():
-        serializer.save(user=user)
-    return serializer
+
+    capped = 0
+    user_ids = list(
+        History.objects
+        .values('user')
+        .annotate(count=Count('id'))
+        .filter(count__gt=max_per_user)
+        .values_list('user', flat=True)
+    )
+    for user_id in user_ids:
+        records = History.objects.filter(user_id=user_id)
+        # 最近 max_per_user 条之后的第一条记录，它和更早的记录都会被删除。
+        cutoff_viewed_at, cutoff_id = (
+            records.order_by('-viewed_at', '-id')
+            .values_list('viewed_at', 'id')[max_per_user]
+        )
+        capped += delete_in_chunks(
+            records.filter(
+                Q(viewed_at__lt=cutoff_viewed_at)
+                | Q(viewed_at=cutoff_viewed_at, id__lte=cutoff_id)
+            )
+            .order_by('viewed_at', 'id'),
+            chunk_size,
+            affected_users,
+        )
+
+    recount_user_counters(affected_users, fields=['history_count'])
+    return orphaned, capped
@@ -3,17 +3,23 @@ from rest_framework import status, viewsets
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
+from user.counters import adjust_counter
+
 from .models import History
+from .pagination import HistoryCursorPagination
 from .serializers import HistorySerializer
 
 
 class HistoryViewSet(viewsets.ModelViewSet):
     serializer_class = HistorySerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = HistoryCursorPagination
     http_method_names = ['get', 'post', 'delete']
 
     def get_queryset(self):
-        return History.objects.filter(user=self.request.user)
+        # 浏览历史在各个工作进程的内存中累计后批量写入，列表是最终一致的：
+        # 刚刚的浏览最多在 VIEW_COUNT_FLUSH_INTERVAL 秒后出现。
+        return History.objects.filter(user=self.request.user).with_cards()
 
     def create(self, request, *args, **kwargs):
         content_type = request.data.get('content_type')
@@ -36,6 +42,10 @@ class HistoryViewSet(viewsets.ModelViewSet):
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+    def perform_destroy(self, instance):
+        instance.delete()
+        adjust_counter(instance.user_id, 'history_count', -1)
+
     def get_object(self):
         obj = super().get_object()
         if obj.user != self.request.user:
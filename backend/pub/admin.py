@@ -1,6 +1,7 @@
 from django.contrib import admin
 
-from .models import ArxivCategory, ArxivEntry, GithubRepo, ResourceClaim
+from .models import (ArxivCategory, ArxivEntry, GithubRepo, HarvestCheckpoint,
+                     ResourceClaim, ViewRollup)
 
 
 class ArxivEntryAdmin(admin.ModelAdmin):
@@ -27,7 +28,21 @@ class ResourceClaimAdmin(admin.ModelAdmin):
     list_filter = ('resource_type', 'created_at')
 
 
+class ViewRollupAdmin(admin.ModelAdmin):
+    list_display = ('resource_type', 'resource_id', 'granularity', 'bucket_start',
+                    'view_count', 'unique_viewers')
+    search_fields = ('resource_id',)
+    list_filter = ('resource_type', 'granularity', 'bucket_start')
+    exclude = ('viewers',)
+
+
+class HarvestCheckpointAdmin(admin.ModelAdmin):
+    list_display = ('source', 'datestamp', 'updated_at')
+
+
 admin.site.register(ArxivEntry, ArxivEntryAdmin)
 admin.site.register(ArxivCategory, ArxivCategoryAdmin)
 admin.site.register(GithubRepo, GithubRepoAdmin)
 admin.site.register(ResourceClaim, ResourceClaimAdmin)
+admin.site.register(ViewRollup, ViewRollupAdmin)
+admin.site.register(HarvestCheckpoint, HarvestCheckpointAdmin)
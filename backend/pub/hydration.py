@@ -0,0 +1,76 @@
+from collections import defaultdict
+from collections.abc import Iterable
+from typing import Any, Optional
+
+from django.db import models
+from rest_framework import serializers
+
+from .models import ArxivEntry, GithubRepo
+
+ResourceKey = tuple[str, str]
+
+RESOURCE_MODELS: dict[str, type[models.Model]] = {
+    'arxiv': ArxivEntry,
+    'github': GithubRepo,
+}
+
+# 每条查询加载的最大资源数。
+HYDRATION_BATCH_SIZE = 1000
+
+
+class ResourceHydrator:
+    """
+    按 (类型, ID) 加载资源卡片。
+
+    先用 ``add`` 登记需要的资源，第一次读取时每种类型用一条查询加载所有登记的资源，
+    结果在同一个请求内缓存，不存在的资源返回 ``None``。
+    """
+
+    def __init__(self):
+        self._requested: defaultdict[str, set[str]] = defaultdict(set)
+        self._resources: dict[ResourceKey, Optional[models.Model]] = {}
+
+    def add(self, keys: Iterable[tuple[str, Any]]) -> None:
+        for resource_type, resource_id in keys:
+            key = (resource_type, str(resource_id))
+            if resource_type in RESOURCE_MODELS and key not in self._resources:
+                self._requested[resource_type].add(key[1])
+
+    def load(self) -> None:
+        for resource_type, resource_ids in self._requested.items():
+            manager = RESOURCE_MODELS[resource_type].objects
+            resource_ids = list(resource_ids)
+            for i in range(0, len(resource_ids), HYDRATION_BATCH_SIZE):
+                batch = resource_ids[i:i + HYDRATION_BATCH_SIZE]
+                for resource in manager.as_cards().filter(pk__in=batch):
+                    self._resources[(resource_type, str(resource.pk))] = resource
+            for resource_id in resource_ids:
+                self._resources.setdefault((resource_type, resource_id), None)
+        self._requested.clear()
+
+    def get(self, resource_type: str, resource_id: Any) -> Optional[models.Model]:
+        key = (resource_type, str(resource_id))
+        if key not in self._resources:
+            self.add([key])
+            self.load()
+        return self._resources.get(key)
+
+
+def get_hydrator(context: dict[str, Any]) -> ResourceHydrator:
+    """
+    获取序列化上下文中的 hydrator，嵌套的序列化器共用同一个上下文，因此共用同一个缓存。
+    """
+    return context.setdefault('hydrator', ResourceHydrator())
+
+
+class HydratedListSerializer(serializers.ListSerializer):
+    """
+    序列化列表前，将子序列化器 ``get_resource_keys`` 返回的资源登记到 hydrator，
+    使整个列表的资源批量加载。
+    """
+
+    def to_representation(self, data):
+        items = list(data.all() if isinstance(data, models.manager.BaseManager) else data)
+        get_hydrator(self.context).add(
+            key for item in items for key in self.child.get_resource_keys(item))
+        return super().to_representation(items)
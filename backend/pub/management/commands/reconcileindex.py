@@ -0,0 +1,41 @@
+import argparse
+
+import requests
+from django.core.management.base import BaseCommand, CommandError
+
+from feed.cache import invalidate_feed_cache
+from feed.topics import rebuild_topic_candidates
+from pub.reconcile import RECONCILE_BUCKETS, reconcile_index
+from pub.sync import SYNC_SOURCES
+
+
+class Command(BaseCommand):
+    help = '对账数据库与推送后端的索引，重新上传缺失或过期的条目并删除多余的条目。'
+
+    def add_arguments(self, parser: argparse.ArgumentParser) -> None:
+        parser.add_argument('kinds', nargs='*', choices=list(SYNC_SOURCES),
+                            help='要对账的索引，默认为全部')
+        parser.add_argument('--buckets', type=int, default=RECONCILE_BUCKETS, help='摘要的桶数')
+        parser.add_argument('--dry-run', action='store_true', help='只统计不一致的条目')
+
+    def handle(self, *args, **options):
+        changed = []
+        for kind in options['kinds'] or SYNC_SOURCES:
+            try:
+                result = reconcile_index(
+                    SYNC_SOURCES[kind], buckets=options['buckets'], dry_run=options['dry_run'])
+            except requests.RequestException as e:
+                raise CommandError(f'Failed to reconcile {kind} index: {e}')
+
+            self.stdout.write(
+                f'{kind}: {result.mismatched_buckets} mismatched buckets, '
+                f'{result.stale} stale, {result.deleted} deleted, '
+                f'{result.sync.synced} uploaded, {result.sync.failed} failed')
+            if result.stale or result.deleted or result.sync.synced:
+                changed.append(kind)
+
+        if changed and not options['dry_run']:
+            rebuild_topic_candidates(origins=tuple(changed))
+            invalidate_feed_cache()
+
+        self.stdout.write(self.style.SUCCESS('Successfully reconciled feed engine index.'))
@@ -1,10 +1,12 @@
 import argparse
 
 from django.core.management.base import BaseCommand
-from tqdm import trange
+from tqdm import tqdm
 
+from feed.cache import invalidate_feed_cache
+from feed.topics import rebuild_topic_candidates
 from pub.models import ArxivEntry
-from utils.feed_engine import session
+from pub.sync import SYNC_SOURCES, sync_resources
 
 
 class Command(BaseCommand):
@@ -12,6 +14,9 @@ class Command(BaseCommand):
 
     def add_arguments(self, parser: argparse.ArgumentParser) -> None:
         parser.add_argument('--batch-size', type=int, default=256)
+        parser.add_argument('--concurrency', type=int, default=4, help='同时上传的批次数')
+        parser.add_argument('--checkpoint-every', type=int, default=20,
+                            help='每上传多少批保存一次索引')
         parser.add_argument('--all', action='store_true', help='上传所有数据')
 
     def handle(self, *args, **options):
@@ -20,36 +25,21 @@ class Command(BaseCommand):
         else:
             unsynced_entries = ArxivEntry.objects.filter(synced=False)
 
-        batch_size = options['batch_size']
-
-        for i in trange(0, len(unsynced_entries), batch_size, desc='Syncing arXiv entries'):
-            batch = unsynced_entries[i:i + batch_size]
-            arxiv_ids = []
-            payload = []
-
-            for entry in batch:
-                arxiv_ids.append(entry.arxiv_id)
-                payload.append({
-                    'entry_id': entry.arxiv_id,
-                    'content': generate_index_text(entry),
-                })
-
-            response = session.post('/arxiv/batch', json=payload)
-            response.raise_for_status()
-
-            ArxivEntry.objects.filter(arxiv_id__in=arxiv_ids).update(synced=True)
-
-        response = session.post('/save')
-        response.raise_for_status()
-
-        self.stdout.write(self.style.SUCCESS('Successfully synced arXiv entries.'))
-
-
-def generate_index_text(arxiv_entry: ArxivEntry) -> str:
-    """
-    为 arXiv 论文生成用于索引的文本。
-    """
-    return (
-        f"Title: {arxiv_entry.title}\n"
-        f"Abstract: {arxiv_entry.summary}\n"
-    )
+        with tqdm(total=unsynced_entries.count(), desc='Syncing arXiv entries') as progress:
+            result = sync_resources(
+                SYNC_SOURCES['arxiv'],
+                unsynced_entries,
+                batch_size=options['batch_size'],
+                concurrency=options['concurrency'],
+                checkpoint_every=options['checkpoint_every'],
+                on_progress=progress.update,
+            )
+
+        rebuild_topic_candidates(origins=('arxiv',))
+        invalidate_feed_cache()
+
+        if result.failed:
+            self.stdout.write(self.style.WARNING(
+                f'Synced {result.synced} arXiv entries, {result.failed} failed.'))
+        else:
+            self.stdout.write(self.style.SUCCESS('Successfully synced arXiv entries.'))
@@ -1,10 +1,12 @@
 import argparse
 
 from django.core.management.base import BaseCommand
-from tqdm import trange
+from tqdm import tqdm
 
+from feed.cache import invalidate_feed_cache
+from feed.topics import rebuild_topic_candidates
 from pub.models import GithubRepo
-from utils.feed_engine import session
+from pub.sync import SYNC_SOURCES, sync_resources
 
 
 class Command(BaseCommand):
@@ -12,6 +14,9 @@ class Command(BaseCommand):
 
     def add_arguments(self, parser: argparse.ArgumentParser) -> None:
         parser.add_argument('--batch-size', type=int, default=256)
+        parser.add_argument('--concurrency', type=int, default=4, help='同时上传的批次数')
+        parser.add_argument('--checkpoint-every', type=int, default=20,
+                            help='每上传多少批保存一次索引')
         parser.add_argument('--all', action='store_true', help='上传所有数据')
 
     def handle(self, *args, **options):
@@ -20,37 +25,21 @@ class Command(BaseCommand):
         else:
             unsynced_repos = GithubRepo.objects.filter(synced=False)
 
-        batch_size = options['batch_size']
-
-        for i in trange(0, len(unsynced_repos), batch_size, desc='Syncing GitHub repos'):
-            batch = unsynced_repos[i:i + batch_size]
-            repo_names = []
-            payload = []
-
-            for repo in batch:
-                repo_names.append(repo.full_name)
-                payload.append({
-                    'entry_id': repo.full_name,
-                    'content': generate_index_text(repo),
-                })
-
-            response = session.post('/github/batch', json=payload)
-            response.raise_for_status()
-
-            GithubRepo.objects.filter(full_name__in=repo_names).update(synced=True)
-
-        response = session.post('/save')
-        response.raise_for_status()
-
-        self.stdout.write(self.style.SUCCESS('Successfully synced GitHub repos.'))
-
-
-def generate_index_text(github_repo: GithubRepo) -> str:
-    """
-    为 GitHub 仓库生成用于索引的文本。
-    """
-    return (
-        f"Repository: {github_repo.name}\n"
-        f"Description: {github_repo.description}\n"
-        f"Topics: {', '.join(github_repo.topics)}\n"
-    )
+        with tqdm(total=unsynced_repos.count(), desc='Syncing GitHub repos') as progress:
+            result = sync_resources(
+                SYNC_SOURCES['github'],
+                unsynced_repos,
+                batch_size=options['batch_size'],
+                concurrency=options['concurrency'],
+                checkpoint_every=options['checkpoint_every'],
+                on_progress=progress.update,
+            )
+
+        rebuild_topic_candidates(origins=('github',))
+        invalidate_feed_cache()
+
+        if result.failed:
+            self.stdout.write(self.style.WARNING(
+                f'Synced {result.synced} GitHub repos, {result.failed} failed.'))
+        else:
+            self.stdout.write(self.style.SUCCESS('Successfully synced GitHub repos.'))
@@ -0,0 +1,32 @@
+# Generated by Django 5.1.2 on 2026-10-17 21:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pub', '0009_resourceclaim'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ViewRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('resource_type', models.CharField(choices=[('arxiv', 'ArXiv Paper'), ('github', 'GitHub Repository')], max_length=10, verbose_name='资源类型')),
+                ('resource_id', models.CharField(max_length=255, verbose_name='资源 ID')),
+                ('granularity', models.CharField(choices=[('hour', '小时'), ('day', '天')], max_length=4, verbose_name='粒度')),
+                ('bucket_start', models.DateTimeField(verbose_name='开始时间')),
+                ('view_count', models.IntegerField(default=0, verbose_name='浏览次数')),
+                ('unique_viewers', models.IntegerField(default=0, verbose_name='独立访客数')),
+                ('viewers', models.BinaryField(verbose_name='访客草图')),
+            ],
+            options={
+                'verbose_name': '浏览汇总',
+                'verbose_name_plural': '浏览汇总',
+                'indexes': [models.Index(fields=['granularity', 'bucket_start'], name='pub_viewrol_granula_16edde_idx')],
+                'unique_together': {('resource_type', 'resource_id', 'granularity', 'bucket_start')},
+            },
+        ),
+    ]
@@ -0,0 +1,63 @@
+# Generated by Django 5.1.2 on 2026-10-17 21:32
+
+import hashlib
+
+from django.db import migrations, models
+
+
+def get_arxiv_index_text(arxiv_entry):
+    return (
+        f"Title: {arxiv_entry.title}\n"
+        f"Abstract: {arxiv_entry.summary}\n"
+    )
+
+
+def get_github_index_text(github_repo):
+    return (
+        f"Repository: {github_repo.name}\n"
+        f"Description: {github_repo.description}\n"
+        f"Topics: {', '.join(github_repo.topics)}\n"
+    )
+
+
+# 与 pub.sync 中生成索引文本的方式保持一致，迁移不依赖会变化的应用代码。
+INDEX_SOURCES = [
+    ('ArxivEntry', ('title', 'summary'), get_arxiv_index_text),
+    ('GithubRepo', ('name', 'description', 'topics'), get_github_index_text),
+]
+
+
+def populate_index_hash(apps, schema_editor):
+    for model_name, fields, get_index_text in INDEX_SOURCES:
+        model = apps.get_model('pub', model_name)
+
+        updated = []
+        for obj in model.objects.only(*fields).iterator(chunk_size=1000):
+            obj.index_hash = hashlib.blake2b(
+                get_index_text(obj).encode(), digest_size=16).hexdigest()
+            updated.append(obj)
+            if len(updated) >= 1000:
+                model.objects.bulk_update(updated, ['index_hash'])
+                updated.clear()
+        model.objects.bulk_update(updated, ['index_hash'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pub', '0010_viewrollup'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='arxiventry',
+            name='index_hash',
+            field=models.CharField(blank=True, default='', max_length=32, verbose_name='索引内容哈希'),
+        ),
+        migrations.AddField(
+            model_name='githubrepo',
+            name='index_hash',
+            field=models.CharField(blank=True, default='', max_length=32, verbose_name='索引内容哈希'),
+        ),
+        migrations.RunPython(populate_index_hash, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.1.2 on 2026-10-17 21:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pub', '0011_index_hash'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HarvestCheckpoint',
+            fields=[
+                ('source', models.CharField(max_length=64, primary_key=True, serialize=False, verbose_name='来源')),
+                ('datestamp', models.DateField(verbose_name='时间戳')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='更新时间')),
+            ],
+            options={
+                'verbose_name': '抓取检查点',
+                'verbose_name_plural': '抓取检查点',
+            },
+        ),
+    ]
@@ -1,11 +1,28 @@
 from django.conf import settings
 from django.db import models
+from django.db.models.functions import Substr
 from django.utils.text import slugify
 
 from .utils import normalize_author
 
 # Create your models here.
 
+# 卡片中的摘要只保留开头的部分。
+SUMMARY_EXCERPT_LENGTH = 300
+
+# 列表中以卡片形式展示的字段，不包含摘要全文和 README。
+ARXIV_CARD_FIELDS = [
+    'arxiv_id', 'title', 'authors', 'comment', 'published', 'updated',
+    'primary_category', 'categories', 'link', 'pdf', 'slug', 'view_count', 'citation_count',
+]
+GITHUB_CARD_FIELDS = [
+    'repo_id', 'name', 'full_name', 'description', 'html_url', 'owner',
+    'created_at', 'updated_at', 'pushed_at',
+    'homepage', 'size', 'language', 'license', 'topics',
+    'stargazers_count', 'forks_count', 'open_issues_count', 'network_count', 'subscribers_count',
+    'view_count',
+]
+
 
 class ArxivEntryAuthor(models.Model):
     """
@@ -31,6 +48,16 @@ class ArxivEntryAuthor(models.Model):
         return f'{self.first_name} {self.last_name}'
 
 
+class ArxivEntryQuerySet(models.QuerySet):
+    def as_cards(self):
+        """
+        只加载卡片需要的字段，摘要截断后作为 ``summary_excerpt``。
+        """
+        return self.only(*ARXIV_CARD_FIELDS).annotate(
+            summary_excerpt=Substr('summary', 1, SUMMARY_EXCERPT_LENGTH),
+        )
+
+
 class ArxivEntry(models.Model):
     """
     ArXiv 论文。
@@ -54,6 +81,10 @@ class ArxivEntry(models.Model):
     citation_count = models.IntegerField(default=0, verbose_name='引用次数')
 
     synced = models.BooleanField(default=False, verbose_name='已同步')
+    # 用于索引的文本的哈希，只有索引内容变化时才需要重新同步
+    index_hash = models.CharField(max_length=32, blank=True, default='', verbose_name='索引内容哈希')
+
+    objects = ArxivEntryQuerySet.as_manager()
 
     class Meta:
         verbose_name = 'ArXiv 论文'
@@ -97,6 +128,14 @@ class ArxivCategory(models.Model):
         return self.name
 
 
+class GithubRepoQuerySet(models.QuerySet):
+    def as_cards(self):
+        """
+        只加载卡片需要的字段，不加载 README。
+        """
+        return self.only(*GITHUB_CARD_FIELDS)
+
+
 class GithubRepo(models.Model):
     """
     GitHub 仓库。
@@ -131,6 +170,10 @@ class GithubRepo(models.Model):
     view_count = models.IntegerField(default=0, verbose_name='浏览次数')
 
     synced = models.BooleanField(default=False, verbose_name='已同步')
+    # 用于索引的文本的哈希，只有索引内容变化时才需要重新同步
+    index_hash = models.CharField(max_length=32, blank=True, default='', verbose_name='索引内容哈希')
+
+    objects = GithubRepoQuerySet.as_manager()
 
     class Meta:
         verbose_name = 'GitHub 仓库'
@@ -167,3 +210,57 @@ class ResourceClaim(models.Model):
 
     def __str__(self):
         return f'{self.user.username} claimed {self.resource_type}:{self.resource_id}'
+
+
+class ViewRollup(models.Model):
+    """
+    按小时或按天汇总的浏览记录，独立访客数由 HyperLogLog 草图估计。
+    """
+    resource_type = models.CharField(
+        max_length=10,
+        choices=[
+            ('arxiv', 'ArXiv Paper'),
+            ('github', 'GitHub Repository'),
+        ],
+        verbose_name='资源类型'
+    )
+    resource_id = models.CharField(max_length=255, verbose_name='资源 ID')
+    granularity = models.CharField(
+        max_length=4,
+        choices=[
+            ('hour', '小时'),
+            ('day', '天'),
+        ],
+        verbose_name='粒度'
+    )
+    bucket_start = models.DateTimeField(verbose_name='开始时间')
+    view_count = models.IntegerField(default=0, verbose_name='浏览次数')
+    unique_viewers = models.IntegerField(default=0, verbose_name='独立访客数')
+    viewers = models.BinaryField(verbose_name='访客草图')
+
+    class Meta:
+        verbose_name = '浏览汇总'
+        verbose_name_plural = '浏览汇总'
+        unique_together = ('resource_type', 'resource_id', 'granularity', 'bucket_start')
+        indexes = [
+            models.Index(fields=['granularity', 'bucket_start']),
+        ]
+
+    def __str__(self):
+        return f'{self.resource_type}:{self.resource_id} {self.granularity} {self.bucket_start}'
+
+
+class HarvestCheckpoint(models.Model):
+    """
+    增量抓取的检查点，记录已抓取到的最新时间戳，下次从该时间戳开始抓取。
+    """
+    source = models.CharField(max_length=64, primary_key=True, verbose_name='来源')
+    datestamp = models.DateField(verbose_name='时间戳')
+    updated_at = models.DateTimeField(auto_now=True, verbose_name='更新时间')
+
+    class Meta:
+        verbose_name = '抓取检查点'
+        verbose_name_plural = '抓取检查点'
+
+    def __str__(self):
+        return f'{self.source} @ {self.datestamp}'
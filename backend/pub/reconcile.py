@@ -0,0 +1,121 @@
+"""
+对账数据库与推荐后端的索引。
+
+两边先按桶比较摘要，只对摘要不同的桶取回推荐后端中的条目逐条比较：数据库中缺失或内容不同的
+条目标记为未同步并重新上传，推荐后端中多出的条目被删除。
+"""
+from collections.abc import Iterator
+from itertools import batched
+from typing import Any, NamedTuple
+
+from django.conf import settings
+
+from utils.feed_engine import get_timeout, session
+from utils.index_digest import digest_buckets, get_bucket
+
+from .sync import SyncResult, SyncSource, delete_resources, sync_resources
+
+# 摘要的桶数，桶越多，每个不一致的桶需要逐条比较的条目越少。
+RECONCILE_BUCKETS = 1024
+# 每条请求取回的桶数。
+RECONCILE_BATCH_SIZE = 1000
+
+
+class ReconcileResult(NamedTuple):
+    mismatched_buckets: int
+    stale: int
+    deleted: int
+    sync: SyncResult
+
+
+def post_engine(url: str, payload: Any) -> Any:
+    response = session.post(
+        url, json=payload, timeout=get_timeout(settings.FEED_ENGINE_SYNC_TIMEOUT))
+    response.raise_for_status()
+    return response.json()
+
+
+def fill_index_hashes(source: SyncSource) -> int:
+    """
+    为没有索引内容哈希的记录（如在后台创建的记录）计算哈希，返回更新的记录数。
+    """
+    queryset = source.model.objects.filter(index_hash='').only(*source.fields)
+    updated = 0
+    for batch in batched(queryset.iterator(chunk_size=RECONCILE_BATCH_SIZE), RECONCILE_BATCH_SIZE):
+        for obj in batch:
+            obj.index_hash = source.get_index_hash(obj)
+        source.model.objects.bulk_update(batch, ['index_hash'])
+        updated += len(batch)
+    return updated
+
+
+def iter_index_entries(source: SyncSource) -> Iterator[tuple[Any, str, str]]:
+    """
+    按主键顺序读取所有记录的 (主键, 条目 ID, 内容哈希)。
+    """
+    queryset = (
+        source.model.objects
+        .order_by('pk')
+        .values_list('pk', source.entry_id_field, 'index_hash')
+    )
+    last_pk = None
+    while True:
+        page = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+        rows = list(page[:RECONCILE_BATCH_SIZE])
+        if not rows:
+            return
+        yield from rows
+        last_pk = rows[-1][0]
+
+
+def reconcile_index(
+    source: SyncSource,
+    buckets: int = RECONCILE_BUCKETS,
+    dry_run: bool = False,
+    **sync_options,
+) -> ReconcileResult:
+    """
+    对账并修复推荐后端的索引，``dry_run`` 为真时只统计不一致的条目。
+    """
+    if not dry_run:
+        fill_index_hashes(source)
+
+    local_digests = digest_buckets(
+        ((entry_id, index_hash) for _, entry_id, index_hash in iter_index_entries(source)),
+        buckets,
+    )
+    remote_digests = post_engine(f'/{source.kind}/digest', {'buckets': buckets})['buckets']
+    mismatched = [
+        bucket for bucket, (local, remote) in enumerate(zip(local_digests, remote_digests))
+        if local != remote
+    ]
+    if not mismatched:
+        return ReconcileResult(0, 0, 0, SyncResult(0, 0))
+
+    remote_hashes: dict[str, str] = {}
+    for bucket_ids in batched(mismatched, RECONCILE_BATCH_SIZE):
+        remote_hashes.update(post_engine(f'/{source.kind}/hashes', {
+            'buckets': buckets,
+            'bucket_ids': list(bucket_ids),
+        })['hashes'])
+
+    mismatched = set(mismatched)
+    stale = []
+    for pk, entry_id, index_hash in iter_index_entries(source):
+        if get_bucket(entry_id, buckets) in mismatched:
+            if remote_hashes.pop(entry_id, None) != index_hash:
+                stale.append(pk)
+    # 剩下的条目在数据库中已不存在
+    extra = list(remote_hashes)
+
+    if dry_run:
+        return ReconcileResult(len(mismatched), len(stale), len(extra), SyncResult(0, 0))
+
+    for pks in batched(stale, RECONCILE_BATCH_SIZE):
+        source.model.objects.filter(pk__in=pks).update(synced=False)
+    if extra:
+        delete_resources(source, extra)
+
+    unsynced = source.model.objects.filter(synced=False)
+    result = sync_resources(source, unsynced, **sync_options)
+    return ReconcileResult(len(mismatched), len(stale), len(extra), result)
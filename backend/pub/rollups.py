@@ -0,0 +1,235 @@
+from collections.abc import Iterable
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from django.db import transaction
+from django.db.models import Min, Q, Sum
+from django.utils.timezone import now
+from rest_framework.request import Request
+
+from utils.hll import HyperLogLog
+from utils.view_counts import WriteBuffer
+
+from .models import ViewRollup
+
+ResourceKey = tuple[str, str]
+
+GRANULARITIES = ('hour', 'day')
+
+# 按小时汇总的记录保留 2 天，足以回答最近 24 小时的查询；按天汇总的记录保留 90 天。
+ROLLUP_RETENTION = {
+    'hour': timedelta(days=2),
+    'day': timedelta(days=90),
+}
+
+
+def truncate(time: datetime, granularity: str) -> datetime:
+    """
+    将时间截断到 UTC 的整小时或整天。
+    """
+    time = time.astimezone(timezone.utc).replace(minute=0, second=0, microsecond=0)
+    if granularity == 'day':
+        time = time.replace(hour=0)
+    return time
+
+
+def get_client_ip(request: Request) -> str:
+    """
+    获取客户端的 IP 地址。
+
+    nginx 用 X-Real-IP 传递客户端地址，并把它追加到 X-Forwarded-For 的末尾。
+    X-Forwarded-For 中更早的地址由客户端发送，不可信，因此只使用最后一跳。
+    """
+    real_ip = request.META.get('HTTP_X_REAL_IP', '').strip()
+    if real_ip:
+        return real_ip
+    forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR', '').split(',')[-1].strip()
+    if forwarded_for:
+        return forwarded_for
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def get_viewer_key(request: Request) -> str:
+    """
+    获取访客的标识，已登录用户使用用户 ID，否则使用 IP 地址。
+    """
+    if request.user.is_authenticated:
+        return f'user:{request.user.pk}'
+    return f'ip:{get_client_ip(request)}'
+
+
+RollupKey = tuple[str, str, str, datetime]
+
+
+class ViewRollupBuffer(WriteBuffer):
+    """
+    在内存中按小时和按天汇总浏览记录，批量合并到数据库中的汇总记录。
+    """
+
+    def _new_pending(self) -> dict[RollupKey, tuple[int, HyperLogLog]]:
+        return {}
+
+    def _restore(self, pending: dict[RollupKey, tuple[int, HyperLogLog]]) -> None:
+        for key, (view_count, viewers) in pending.items():
+            self._merge(self._pending, key, view_count, viewers)
+
+    @staticmethod
+    def _merge(
+        pending: dict[RollupKey, tuple[int, HyperLogLog]],
+        key: RollupKey,
+        view_count: int,
+        viewers: HyperLogLog,
+    ) -> None:
+        if key in pending:
+            pending_count, pending_viewers = pending[key]
+            pending_viewers.merge(viewers)
+            pending[key] = (pending_count + view_count, pending_viewers)
+        else:
+            pending[key] = (view_count, viewers)
+
+    def add(self, resource_type: str, resource_id: str, viewer: str,
+            time: Optional[datetime] = None) -> None:
+        """
+        记录一次浏览。
+        """
+        time = time or now()
+
+        def add(pending: dict[RollupKey, tuple[int, HyperLogLog]]) -> None:
+            for granularity in GRANULARITIES:
+                key = (resource_type, str(resource_id), granularity, truncate(time, granularity))
+                viewers = HyperLogLog()
+                viewers.add(viewer)
+                self._merge(pending, key, 1, viewers)
+
+        self._record(add)
+
+    def _write(self, pending: dict[RollupKey, tuple[int, HyperLogLog]]) -> int:
+        with transaction.atomic():
+            rows = ViewRollup.objects.select_for_update().filter(
+                resource_id__in={key[1] for key in pending},
+                bucket_start__in={key[3] for key in pending},
+            )
+            existing = {
+                (row.resource_type, row.resource_id, row.granularity, row.bucket_start): row
+                for row in rows
+            }
+
+            new_rows: list[ViewRollup] = []
+            updated_rows: list[ViewRollup] = []
+            for key, (view_count, viewers) in pending.items():
+                row = existing.get(key)
+                if row is None:
+                    resource_type, resource_id, granularity, bucket_start = key
+                    row = ViewRollup(
+                        resource_type=resource_type,
+                        resource_id=resource_id,
+                        granularity=granularity,
+                        bucket_start=bucket_start,
+                    )
+                    new_rows.append(row)
+                else:
+                    viewers.merge(HyperLogLog.from_bytes(row.viewers))
+                    updated_rows.append(row)
+
+                row.view_count += view_count
+                row.unique_viewers = viewers.count()
+                row.viewers = viewers.to_bytes()
+
+            ViewRollup.objects.bulk_create(new_rows)
+            ViewRollup.objects.bulk_update(
+                updated_rows, ['view_count', 'unique_viewers', 'viewers'], batch_size=500)
+
+        return len(new_rows) + len(updated_rows)
+
+
+view_rollups = ViewRollupBuffer()
+
+
+def get_rollup_granularity(window: timedelta) -> str:
+    """
+    两天以内的窗口按小时汇总，否则按天汇总。
+    """
+    return 'hour' if window <= timedelta(days=2) else 'day'
+
+
+def get_view_stats(
+    resource_type: str,
+    resource_id: str,
+    window: timedelta,
+    current_time: Optional[datetime] = None,
+) -> tuple[int, int]:
+    """
+    获取资源在最近 ``window`` 时间内的浏览次数和独立访客数。
+
+    按天汇总时窗口的起点对齐到整天，因此可能多统计不到一天的浏览。
+    """
+    current_time = current_time or now()
+    granularity = get_rollup_granularity(window)
+    rows = ViewRollup.objects.filter(
+        resource_type=resource_type,
+        resource_id=resource_id,
+        granularity=granularity,
+        bucket_start__gte=truncate(current_time - window, granularity),
+    ).only('view_count', 'viewers')
+
+    view_count = 0
+    viewers = HyperLogLog()
+    for row in rows:
+        view_count += row.view_count
+        viewers.merge(HyperLogLog.from_bytes(row.viewers))
+    return view_count, viewers.count()
+
+
+def get_view_velocities(
+    window: timedelta,
+    current_time: Optional[datetime] = None,
+    resource_types: Iterable[str] = ('arxiv', 'github'),
+) -> dict[ResourceKey, int]:
+    """
+    获取最近 ``window`` 时间内每个资源每个时间段的独立访客数之和。
+
+    同一访客在同一时间段内的重复浏览只计一次。
+    """
+    current_time = current_time or now()
+    granularity = get_rollup_granularity(window)
+    rows = (
+        ViewRollup.objects
+        .filter(
+            granularity=granularity,
+            bucket_start__gte=truncate(current_time - window, granularity),
+            resource_type__in=list(resource_types),
+        )
+        .values_list('resource_type', 'resource_id')
+        .annotate(velocity=Sum('unique_viewers'))
+        .order_by()
+    )
+    return {
+        (resource_type, resource_id): velocity
+        for resource_type, resource_id, velocity in rows
+    }
+
+
+def rollups_cover(window: timedelta, current_time: Optional[datetime] = None) -> bool:
+    """
+    汇总记录是否已经覆盖最近 ``window`` 时间，刚部署浏览汇总时最早的记录晚于窗口的开始。
+    """
+    current_time = current_time or now()
+    granularity = get_rollup_granularity(window)
+    earliest = (
+        ViewRollup.objects
+        .filter(granularity=granularity)
+        .aggregate(earliest=Min('bucket_start'))['earliest']
+    )
+    return earliest is not None and earliest <= truncate(current_time - window, granularity)
+
+
+def prune_view_rollups(current_time: Optional[datetime] = None) -> int:
+    """
+    删除超过保留期限的汇总记录，返回删除的记录数。
+    """
+    current_time = current_time or now()
+    condition = Q()
+    for granularity, retention in ROLLUP_RETENTION.items():
+        condition |= Q(granularity=granularity, bucket_start__lt=current_time - retention)
+    deleted, _ = ViewRollup.objects.filter(condition).delete()
+    return deleted
@@ -1,10 +1,31 @@
+from typing import Any
+
 from drf_spectacular.utils import (PolymorphicProxySerializer,
                                    extend_schema_field)
 from rest_framework import serializers
 
 from user.serializers import UserSerializer
 
-from .models import ArxivEntry, GithubRepo, ResourceClaim
+from .hydration import HydratedListSerializer, get_hydrator
+from .models import (ARXIV_CARD_FIELDS, GITHUB_CARD_FIELDS,
+                     SUMMARY_EXCERPT_LENGTH, ArxivEntry, GithubRepo,
+                     ResourceClaim)
+
+
+class SparseFieldsetMixin:
+    """
+    支持通过 ``?fields=a,b`` 查询参数只返回部分字段。
+    """
+
+    def get_fields(self):
+        fields = super().get_fields()
+
+        request = self.context.get('request')
+        if request is None or not (param := request.query_params.get('fields')):
+            return fields
+
+        requested = {name.strip() for name in param.split(',')}
+        return {name: field for name, field in fields.items() if name in requested}
 
 
 class ArxivEntrySerializer(serializers.ModelSerializer):
@@ -13,12 +34,49 @@ class ArxivEntrySerializer(serializers.ModelSerializer):
         exclude = ['synced']
 
 
+class ArxivEntryCardSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    """
+    列表中展示的 arXiv 论文卡片，摘要只保留开头的部分。
+    """
+    summary = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ArxivEntry
+        fields = ARXIV_CARD_FIELDS + ['summary']
+
+    def get_summary(self, obj: ArxivEntry) -> str:
+        if hasattr(obj, 'summary_excerpt'):
+            return obj.summary_excerpt
+        return obj.summary[:SUMMARY_EXCERPT_LENGTH]
+
+
+def get_resource_card(context: dict[str, Any], resource_type: str, resource_id: Any):
+    """
+    通过上下文中的 hydrator 加载资源并序列化为卡片，资源不存在时返回 ``None``。
+    """
+    resource = get_hydrator(context).get(resource_type, resource_id)
+    if resource is None:
+        return None
+    if resource_type == 'arxiv':
+        return ArxivEntryCardSerializer(resource, context=context).data
+    return GithubRepoCardSerializer(resource, context=context).data
+
+
 class GithubRepoSerializer(serializers.ModelSerializer):
     class Meta:
         model = GithubRepo
         exclude = ['synced']
 
 
+class GithubRepoCardSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    """
+    列表中展示的 GitHub 仓库卡片，不包含 README。
+    """
+    class Meta:
+        model = GithubRepo
+        fields = GITHUB_CARD_FIELDS
+
+
 class ResourceClaimSerializer(serializers.ModelSerializer):
     user = UserSerializer()
 
@@ -28,6 +86,12 @@ class ResourceClaimSerializer(serializers.ModelSerializer):
         read_only_fields = ['created_at']
 
 
+class ViewStatsSerializer(serializers.Serializer):
+    window = serializers.CharField()
+    view_count = serializers.IntegerField()
+    unique_viewers = serializers.IntegerField()
+
+
 class UserResourceClaimSerializer(serializers.ModelSerializer):
     resource = serializers.SerializerMethodField()
 
@@ -35,26 +99,18 @@ class UserResourceClaimSerializer(serializers.ModelSerializer):
         model = ResourceClaim
         fields = ['id', 'user', 'resource_type', 'resource_id', 'created_at', 'resource']
         read_only_fields = ['created_at']
+        list_serializer_class = HydratedListSerializer
 
     @extend_schema_field(PolymorphicProxySerializer(
         component_name='ResourceItem',
         serializers=[
-            ArxivEntrySerializer,
-            GithubRepoSerializer,
+            ArxivEntryCardSerializer,
+            GithubRepoCardSerializer,
         ],
         resource_type_field_name=None,
     ))
     def get_resource(self, obj):
-        if obj.resource_type == 'arxiv':
-            try:
-                entry = ArxivEntry.objects.get(arxiv_id=obj.resource_id)
-                return ArxivEntrySerializer(entry).data
-            except ArxivEntry.DoesNotExist:
-                return None
-        elif obj.resource_type == 'github':
-            try:
-                repo = GithubRepo.objects.get(repo_id=obj.resource_id)
-                return GithubRepoSerializer(repo).data
-            except GithubRepo.DoesNotExist:
-                return None
-        return None
+        return get_resource_card(self.context, obj.resource_type, obj.resource_id)
+
+    def get_resource_keys(self, obj: ResourceClaim):
+        return [(obj.resource_type, obj.resource_id)]
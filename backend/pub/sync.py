@@ -0,0 +1,253 @@
+"""
+将论文和仓库数据同步到推荐后端。
+
+按主键分批读取待同步的记录，并发上传到 ``/<kind>/batch``，每完成若干批调用一次 ``/save``
+保存索引，保存成功后才将这些记录标记为已同步，中断后重新运行只会重复上传未保存的批次。
+"""
+import gzip
+import json
+import logging
+import random
+import time
+from collections.abc import Callable, Iterator
+from concurrent.futures import (FIRST_COMPLETED, Future, ThreadPoolExecutor,
+                                wait)
+from itertools import batched
+from typing import Any, NamedTuple, Optional
+
+import requests
+from django.conf import settings
+from django.db import models
+
+from utils.feed_engine import (RETRYABLE_STATUS_CODES, FeedEngineUnavailable,
+                               get_timeout, session)
+from utils.index_digest import get_content_hash
+
+from .models import ArxivEntry, GithubRepo
+
+logger = logging.getLogger(__name__)
+
+# 每条请求删除的条目数
+DELETE_BATCH_SIZE = 1000
+
+
+def generate_arxiv_index_text(arxiv_entry: ArxivEntry) -> str:
+    """
+    为 arXiv 论文生成用于索引的文本。
+    """
+    return (
+        f"Title: {arxiv_entry.title}\n"
+        f"Abstract: {arxiv_entry.summary}\n"
+    )
+
+
+def generate_github_index_text(github_repo: GithubRepo) -> str:
+    """
+    为 GitHub 仓库生成用于索引的文本。
+    """
+    return (
+        f"Repository: {github_repo.name}\n"
+        f"Description: {github_repo.description}\n"
+        f"Topics: {', '.join(github_repo.topics)}\n"
+    )
+
+
+class SyncSource(NamedTuple):
+    kind: str
+    model: type[models.Model]
+    # 推荐后端中条目 ID 对应的字段
+    entry_id_field: str
+    # 生成索引文本需要读取的字段
+    fields: tuple[str, ...]
+    generate_index_text: Callable[[Any], str]
+
+    def get_index_hash(self, obj: models.Model) -> str:
+        return get_content_hash(self.generate_index_text(obj))
+
+
+SYNC_SOURCES = {
+    'arxiv': SyncSource(
+        'arxiv', ArxivEntry, 'arxiv_id', ('title', 'summary'), generate_arxiv_index_text),
+    'github': SyncSource(
+        'github', GithubRepo, 'full_name', ('full_name', 'name', 'description', 'topics'),
+        generate_github_index_text),
+}
+
+
+def mark_index_changes(source: SyncSource, objs: list[models.Model]) -> None:
+    """
+    计算对象的索引内容哈希并与数据库中的记录比较，设置 ``index_hash`` 和 ``synced``。
+
+    新对象和索引内容变化的对象被标记为未同步，其余对象保留数据库中的同步状态，写入后不会被重新上传。
+    """
+    existing = {
+        pk: (index_hash, synced)
+        for pk, index_hash, synced in source.model.objects
+        .filter(pk__in=[obj.pk for obj in objs])
+        .values_list('pk', 'index_hash', 'synced')
+    }
+
+    for obj in objs:
+        obj.index_hash = source.get_index_hash(obj)
+        index_hash, synced = existing.get(obj.pk, (None, False))
+        obj.synced = synced and index_hash == obj.index_hash
+
+
+class SyncResult(NamedTuple):
+    synced: int
+    failed: int
+
+
+def iter_batches(queryset: models.QuerySet, fields: tuple[str, ...],
+                 batch_size: int) -> Iterator[list[models.Model]]:
+    """
+    按主键顺序分批读取记录，每批从上一批最后的主键之后开始，只读取需要的字段。
+
+    与 OFFSET 分页不同，处理过程中修改记录（如标记为已同步）不会导致跳过记录，
+    读取每一批的代价也与位置无关。
+    """
+    queryset = queryset.only(*fields).order_by('pk')
+    last_pk = None
+    while True:
+        page = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+        batch = list(page[:batch_size])
+        if not batch:
+            return
+        yield batch
+        last_pk = batch[-1].pk
+
+
+def post_gzip(url: str, payload: Any, timeout: Any) -> requests.Response:
+    """
+    发送 gzip 压缩的 JSON 请求体。
+    """
+    body = gzip.compress(json.dumps(payload).encode(), compresslevel=6)
+    response = session.post(url, data=body, timeout=timeout, headers={
+        'Content-Type': 'application/json',
+        'Content-Encoding': 'gzip',
+    })
+    response.raise_for_status()
+    return response
+
+
+def _is_retryable(e: requests.RequestException) -> bool:
+    if isinstance(e, requests.HTTPError):
+        return e.response is not None and e.response.status_code in RETRYABLE_STATUS_CODES
+    return isinstance(e, (requests.ConnectionError, requests.Timeout))
+
+
+def upload_batch(url: str, documents: list[dict[str, str]], timeout: Any) -> list[str]:
+    """
+    上传一批文档，返回上传失败的条目 ID。
+
+    连接失败、超时或网关错误时最多重试 ``FEED_ENGINE_RETRIES`` 次；仍然失败时将批次拆成两半
+    分别上传，从而只放弃无法上传的单个文档。熔断器打开时直接抛出异常，终止同步。
+    """
+    for attempt in range(settings.FEED_ENGINE_RETRIES + 1):
+        try:
+            post_gzip(url, documents, timeout)
+            return []
+        except FeedEngineUnavailable:
+            raise
+        except requests.RequestException as e:
+            error = e
+            if attempt == settings.FEED_ENGINE_RETRIES or not _is_retryable(e):
+                break
+            logger.info('Retrying upload of %d documents to %s: %s', len(documents), url, e)
+        time.sleep(random.uniform(0, settings.FEED_ENGINE_RETRY_BACKOFF * 2 ** attempt))
+
+    if len(documents) == 1:
+        logger.warning('Failed to upload %s to %s: %s', documents[0]['entry_id'], url, error)
+        return [documents[0]['entry_id']]
+
+    middle = len(documents) // 2
+    return (upload_batch(url, documents[:middle], timeout)
+            + upload_batch(url, documents[middle:], timeout))
+
+
+def sync_resources(
+    source: SyncSource,
+    queryset: models.QuerySet,
+    batch_size: int = 256,
+    concurrency: int = 4,
+    checkpoint_every: int = 20,
+    on_progress: Optional[Callable[[int], None]] = None,
+) -> SyncResult:
+    """
+    将 ``queryset`` 中的记录上传到推荐后端并标记为已同步。
+
+    最多同时上传 ``concurrency`` 批，读取数据库与上传并行进行；每完成 ``checkpoint_every`` 批
+    保存一次索引。上传失败的记录保持未同步，下次同步时重试。
+    """
+    url = f'/{source.kind}/batch'
+    timeout = get_timeout(settings.FEED_ENGINE_SYNC_TIMEOUT)
+    fields = tuple(dict.fromkeys((source.entry_id_field, *source.fields)))
+
+    synced = failed = 0
+    # 已上传但尚未保存的记录，entry_id -> 主键
+    unsaved: dict[str, Any] = {}
+    unsaved_batches = 0
+
+    def checkpoint() -> None:
+        nonlocal synced, unsaved, unsaved_batches
+        if not unsaved:
+            return
+        response = session.post('/save', timeout=timeout)
+        response.raise_for_status()
+        source.model.objects.filter(pk__in=list(unsaved.values())).update(synced=True)
+        synced += len(unsaved)
+        unsaved = {}
+        unsaved_batches = 0
+
+    def collect(future: Future) -> None:
+        nonlocal failed, unsaved_batches
+        batch = in_flight.pop(future)
+        failed_ids = set(future.result())
+        for entry_id, pk in batch.items():
+            if entry_id not in failed_ids:
+                unsaved[entry_id] = pk
+        failed += len(failed_ids)
+        unsaved_batches += 1
+        if on_progress is not None:
+            on_progress(len(batch))
+        if unsaved_batches >= checkpoint_every:
+            checkpoint()
+
+    in_flight: dict[Future, dict[str, Any]] = {}
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='feed-sync') as executor:
+        try:
+            for batch in iter_batches(queryset, fields, batch_size):
+                documents = [{
+                    'entry_id': getattr(obj, source.entry_id_field),
+                    'content': source.generate_index_text(obj),
+                } for obj in batch]
+                future = executor.submit(upload_batch, url, documents, timeout)
+                in_flight[future] = {getattr(obj, source.entry_id_field): obj.pk for obj in batch}
+
+                if len(in_flight) >= concurrency:
+                    done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        collect(future)
+
+            for future in list(in_flight):
+                future.result()
+                collect(future)
+        finally:
+            for future in in_flight:
+                future.cancel()
+
+    checkpoint()
+    return SyncResult(synced, failed)
+
+
+def delete_resources(source: SyncSource, entry_ids: list[str]) -> None:
+    """
+    从推荐后端删除条目并保存索引。
+    """
+    timeout = get_timeout(settings.FEED_ENGINE_SYNC_TIMEOUT)
+    for batch in batched(entry_ids, DELETE_BATCH_SIZE):
+        response = session.post(
+            f'/{source.kind}/delete', json={'entry_ids': list(batch)}, timeout=timeout)
+        response.raise_for_status()
+    response = session.post('/save', timeout=timeout)
+    response.raise_for_status()
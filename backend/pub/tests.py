@@ -1,12 +1,28 @@
-from datetime import datetime
-
+import tempfile
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from unittest import mock
+
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APIClient, APITestCase
 
+from crawler import arxiv as arxiv_crawler
+from crawler import github as github_crawler
 from user.models import User
+from utils.hll import HyperLogLog
+from utils.local_engine import LocalFeedEngine
+from utils.view_counts import ViewCountBuffer, clear_write_buffers, view_counts
 
-from .models import ArxivEntry, GithubRepo, ResourceClaim
+from .models import (ArxivEntry, ArxivEntryAuthor, GithubRepo, ResourceClaim,
+                     ViewRollup)
+from .reconcile import reconcile_index
+from .rollups import (get_view_stats, get_view_velocities, prune_view_rollups,
+                      view_rollups)
+from .sync import SYNC_SOURCES, sync_resources
 
 # Create your tests here.
 
@@ -15,6 +31,8 @@ class PubTests(APITestCase):
     client: APIClient
 
     def setUp(self) -> None:
+        clear_write_buffers()
+        self.addCleanup(clear_write_buffers)
         self.test_arxiv_entry_data = {
             'arxiv_id': '1706.03762v7',
             'authors': [{'name': 'Ashish Vaswani'},
@@ -70,6 +88,115 @@ class PubTests(APITestCase):
                 self.assertEqual(response.data[k], v)
 
 
+@override_settings(VIEW_COUNT_FLUSH_INTERVAL=3600, VIEW_COUNT_FLUSH_EVENTS=3)
+class ViewCountTests(APITestCase):
+    client: APIClient
+
+    def setUp(self) -> None:
+        clear_write_buffers()
+        self.addCleanup(clear_write_buffers)
+        self.entry = ArxivEntry.objects.create(
+            arxiv_id='2401.00001v1',
+            title='Test Paper',
+            summary='Test summary',
+            authors=[{'name': 'Test Author'}],
+            published='2024-01-01T00:00:00Z',
+            updated='2024-01-01T00:00:00Z',
+            primary_category='cs.LG',
+            categories=['cs.LG'],
+            link='http://arxiv.org/abs/2401.00001v1',
+            pdf='http://arxiv.org/pdf/2401.00001v1',
+        )
+        self.repo = GithubRepo.objects.create(
+            repo_id='1',
+            name='repo',
+            full_name='owner/repo',
+            description='Test repo',
+            html_url='https://github.com/owner/repo',
+            owner={'login': 'owner'},
+            topics=[],
+            created_at='2024-01-01T00:00:00Z',
+            updated_at='2024-01-01T00:00:00Z',
+            pushed_at='2024-01-01T00:00:00Z',
+        )
+        self.entry_url = reverse('pub:get_arxiv_entry', kwargs={'arxiv_id': '2401.00001v1'})
+
+    def test_buffered_view_count(self):
+        """测试浏览次数在内存中累计，响应包含尚未写入的增量，达到次数后批量写入"""
+        for expected in (1, 2):
+            response = self.client.get(self.entry_url)
+            self.assertEqual(response.data['view_count'], expected)
+        self.entry.refresh_from_db()
+        self.assertEqual(self.entry.view_count, 0)
+
+        response = self.client.get(
+            reverse('pub:get_github_repo', kwargs={'owner': 'owner', 'repo_name': 'repo'}))
+        self.assertEqual(response.data['view_count'], 1)
+
+        self.entry.refresh_from_db()
+        self.repo.refresh_from_db()
+        self.assertEqual(self.entry.view_count, 2)
+        self.assertEqual(self.repo.view_count, 1)
+
+        response = self.client.get(self.entry_url)
+        self.assertEqual(response.data['view_count'], 3)
+
+    @override_settings(VIEW_COUNT_FLUSH_INTERVAL=0)
+    def test_flush_interval(self):
+        """测试超过写入间隔后立即写入"""
+        self.client.get(self.entry_url)
+        self.entry.refresh_from_db()
+        self.assertEqual(self.entry.view_count, 1)
+
+    def test_in_flight_counts_visible(self):
+        """测试写入提交前读取的增量包括正在写入的增量"""
+        view_counts.incr(ArxivEntry, self.entry.pk)
+        write = ViewCountBuffer._write
+        deltas = []
+
+        def concurrent_write(buffer, pending):
+            # 模拟写入期间其他请求读取数据库中尚未更新的浏览次数
+            deltas.append(view_counts.incr(ArxivEntry, self.entry.pk))
+            return write(buffer, pending)
+
+        with mock.patch.object(ViewCountBuffer, '_write', concurrent_write):
+            view_counts.flush()
+        self.assertEqual(deltas, [2])
+        self.assertEqual(view_counts.incr(ArxivEntry, self.entry.pk), 2)
+
+    def test_flush_idle_buffer(self):
+        """测试后台线程只写入一段时间内没有写入的缓冲区"""
+        view_counts.incr(ArxivEntry, self.entry.pk)
+        self.assertEqual(view_counts.flush_if_idle(3600), 0)
+        self.assertEqual(view_counts.flush_if_idle(0), 1)
+        self.entry.refresh_from_db()
+        self.assertEqual(self.entry.view_count, 1)
+        self.assertEqual(view_counts.flush_if_idle(0), 0)
+
+    def test_flush_batches_updates(self):
+        """测试每个模型只用一条语句写入所有对象的增量"""
+        other = ArxivEntry.objects.create(
+            arxiv_id='2401.00002v1', title='Other', summary='', authors=[],
+            published='2024-01-01T00:00:00Z', updated='2024-01-01T00:00:00Z',
+            primary_category='cs.LG', categories=[], link='', pdf='',
+        )
+        with override_settings(VIEW_COUNT_FLUSH_EVENTS=100):
+            for _ in range(3):
+                view_counts.incr(ArxivEntry, self.entry.pk)
+            view_counts.incr(ArxivEntry, other.pk)
+            view_counts.incr(GithubRepo, self.repo.pk)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(view_counts.flush(), 3)
+        updates = [query for query in queries if query['sql'].startswith('UPDATE')]
+        self.assertEqual(len(updates), 2)
+
+        self.entry.refresh_from_db()
+        other.refresh_from_db()
+        self.repo.refresh_from_db()
+        self.assertEqual((self.entry.view_count, other.view_count, self.repo.view_count), (3, 1, 1))
+
+
 class ResourceClaimTests(APITestCase):
     client: APIClient
 
@@ -221,10 +348,16 @@ class ResourceClaimTests(APITestCase):
         )
 
         url = reverse('user:get_user_claims', kwargs={'pk': self.user.id})
-        response = self.client.get(url)
+        with self.assertNumQueries(4):  # 用户 + 认领 + arXiv 论文 + GitHub 仓库
+            response = self.client.get(url)
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(len(response.data), 2)
+        self.assertEqual(
+            {claim['resource']['title' if claim['resource_type'] == 'arxiv' else 'full_name']
+             for claim in response.data},
+            {self.arxiv_entry.title, self.github_repo.full_name},
+        )
 
         # 验证返回的数据包含所有认领
         resource_types = [claim['resource_type'] for claim in response.data]
@@ -257,3 +390,270 @@ class ResourceClaimTests(APITestCase):
         })
         response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class ViewRollupTests(APITestCase):
+    client: APIClient
+
+    def setUp(self) -> None:
+        clear_write_buffers()
+        self.addCleanup(clear_write_buffers)
+        self.entry = ArxivEntry.objects.create(
+            arxiv_id='2401.00001v1', title='Test Paper', summary='', authors=[],
+            published='2024-01-01T00:00:00Z', updated='2024-01-01T00:00:00Z',
+            primary_category='cs.LG', categories=[], link='', pdf='',
+        )
+        self.current_time = datetime(2024, 6, 1, 12, 30, tzinfo=timezone.utc)
+
+    def get_stats_url(self, resource_type='arxiv', resource_id='2401.00001v1'):
+        return reverse('pub:get_resource_view_stats', kwargs={
+            'resource_type': resource_type, 'resource_id': resource_id})
+
+    def test_hyperloglog(self):
+        """测试 HyperLogLog 的估计误差和序列化"""
+        sketch = HyperLogLog()
+        for i in range(10000):
+            sketch.add(f'user:{i}')
+        self.assertAlmostEqual(sketch.count(), 10000, delta=10000 * 0.1)
+
+        other = HyperLogLog()
+        for i in range(5000, 15000):
+            other.add(f'user:{i}')
+        sketch.merge(other)
+        self.assertAlmostEqual(sketch.count(), 15000, delta=15000 * 0.1)
+
+        restored = HyperLogLog.from_bytes(sketch.to_bytes())
+        self.assertEqual(restored.count(), sketch.count())
+        self.assertEqual(HyperLogLog.from_bytes(b'').count(), 0)
+
+    def test_rollup_buckets(self):
+        """测试浏览记录按小时和按天汇总，多次写入时合并独立访客"""
+        for viewer in ('user:1', 'user:1', 'user:2'):
+            view_rollups.add('arxiv', self.entry.pk, viewer, self.current_time)
+        view_rollups.flush()
+        view_rollups.add(
+            'arxiv', self.entry.pk, 'user:3', self.current_time + timedelta(hours=1))
+        view_rollups.add('arxiv', self.entry.pk, 'user:1', self.current_time)
+        view_rollups.flush()
+
+        rollups = ViewRollup.objects.filter(resource_id=self.entry.pk)
+        self.assertEqual(rollups.filter(granularity='hour').count(), 2)
+        day = rollups.get(granularity='day')
+        self.assertEqual(day.bucket_start, datetime(2024, 6, 1, tzinfo=timezone.utc))
+        self.assertEqual(day.view_count, 5)
+        self.assertEqual(day.unique_viewers, 3)
+
+        stats = get_view_stats(
+            'arxiv', self.entry.pk, timedelta(hours=24), self.current_time + timedelta(hours=2))
+        self.assertEqual(stats, (5, 3))
+        velocities = get_view_velocities(
+            timedelta(days=7), self.current_time + timedelta(hours=2))
+        self.assertEqual(velocities, {('arxiv', self.entry.pk): 3})
+
+    def test_prune_view_rollups(self):
+        """测试超过保留期限的汇总记录被删除"""
+        view_rollups.add('arxiv', self.entry.pk, 'user:1', self.current_time)
+        view_rollups.flush()
+
+        self.assertEqual(prune_view_rollups(self.current_time + timedelta(days=3)), 1)
+        self.assertEqual(ViewRollup.objects.get().granularity, 'day')
+        self.assertEqual(prune_view_rollups(self.current_time + timedelta(days=91)), 1)
+        self.assertFalse(ViewRollup.objects.exists())
+
+    def test_view_stats(self):
+        """测试浏览统计接口按访客去重"""
+        url = reverse('pub:get_arxiv_entry', kwargs={'arxiv_id': '2401.00001v1'})
+        self.client.get(url)
+        self.client.get(url)
+        self.client.get(url, REMOTE_ADDR='10.0.0.2')
+        view_rollups.flush()
+
+        response = self.client.get(self.get_stats_url(), {'window': '7d'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, {'window': '7d', 'view_count': 3, 'unique_viewers': 2})
+
+        response = self.client.get(self.get_stats_url(), {'window': '1y'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get(self.get_stats_url('github', '1'))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class SyncTests(APITestCase):
+    def setUp(self) -> None:
+        self.engine_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.engine_dir.cleanup)
+
+        settings_override = override_settings(
+            FEED_ENGINE_URL='local://',
+            FEED_ENGINE_LOCAL_PATH=Path(self.engine_dir.name),
+            FEED_ENGINE_RETRY_BACKOFF=0.001,
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        for i in range(5):
+            ArxivEntry.objects.create(
+                arxiv_id=f'2401.0000{i}v1',
+                title=f'Paper {i}',
+                summary=f'Summary of paper {i}',
+                authors=[{'name': 'Alice Smith'}],
+                published='2024-01-01T00:00:00Z',
+                updated='2024-01-01T00:00:00Z',
+                primary_category='cs.LG',
+                categories=['cs.LG'],
+                link=f'http://arxiv.org/abs/2401.0000{i}v1',
+                pdf=f'http://arxiv.org/pdf/2401.0000{i}v1',
+            )
+        ArxivEntry.objects.filter(arxiv_id='2401.00000v1').update(synced=True)
+
+    def sync(self, bad_ids: tuple[str, ...] = ()):
+        """同步未同步的论文，推荐后端拒绝包含 ``bad_ids`` 的批次，返回同步结果和请求的路径"""
+        paths = []
+        handle = LocalFeedEngine.handle
+
+        def fake_handle(engine, path, payload):
+            paths.append(path)
+            if path.endswith('/batch') and any(doc['entry_id'] in bad_ids for doc in payload):
+                return 400, {'detail': 'Invalid document'}
+            return handle(engine, path, payload)
+
+        with mock.patch.object(LocalFeedEngine, 'handle', autospec=True,
+                               side_effect=fake_handle):
+            with CaptureQueriesContext(connection) as queries:
+                result = sync_resources(
+                    SYNC_SOURCES['arxiv'],
+                    ArxivEntry.objects.filter(synced=False),
+                    batch_size=2,
+                    concurrency=2,
+                    checkpoint_every=1,
+                )
+        self.assertFalse(any('OFFSET' in query['sql'] for query in queries))
+        return result, paths
+
+    def test_sync(self):
+        """测试分批上传 gzip 压缩的请求体，每批完成后保存索引并标记为已同步"""
+        result, paths = self.sync()
+
+        self.assertEqual(result, (4, 0))
+        self.assertEqual(paths.count('/arxiv/batch'), 2)
+        self.assertEqual(paths.count('/save'), 2)
+        self.assertFalse(ArxivEntry.objects.filter(synced=False).exists())
+
+        engine = LocalFeedEngine(Path(self.engine_dir.name))
+        self.assertEqual(len(engine.indexes['arxiv']), 4)
+
+    def test_split_on_failure(self):
+        """测试批次上传失败时拆分重试，只有无法上传的论文保持未同步"""
+        result, paths = self.sync(bad_ids=('2401.00003v1',))
+
+        self.assertEqual(result, (3, 1))
+        self.assertEqual(
+            list(ArxivEntry.objects.filter(synced=False).values_list('arxiv_id', flat=True)),
+            ['2401.00003v1'],
+        )
+        # 失败的批次被拆成两个单条批次
+        self.assertEqual(paths.count('/arxiv/batch'), 4)
+
+    def test_reconcile(self):
+        """测试对账只比较摘要不同的桶，重新上传缺失和过期的论文并删除多余的条目"""
+        ArxivEntry.objects.update(synced=False)
+        sync_resources(SYNC_SOURCES['arxiv'], ArxivEntry.objects.all())
+        source = SYNC_SOURCES['arxiv']
+        self.assertEqual(reconcile_index(source, buckets=16).mismatched_buckets, 0)
+
+        index = LocalFeedEngine(Path(self.engine_dir.name)).indexes['arxiv']
+        index.remove(['2401.00001v1'])
+        index.add([{'entry_id': '2301.00000v1', 'content': 'Deleted paper'}])
+        index.save()
+        entry = ArxivEntry.objects.get(arxiv_id='2401.00002v1')
+        entry.title = 'Revised paper'
+        entry.index_hash = source.get_index_hash(entry)
+        entry.save()
+
+        dry_run = reconcile_index(source, buckets=16, dry_run=True)
+        self.assertEqual((dry_run.stale, dry_run.deleted), (2, 1))
+        self.assertLessEqual(dry_run.mismatched_buckets, 3)
+
+        result = reconcile_index(source, buckets=16)
+        self.assertEqual((result.stale, result.deleted, result.sync.synced), (2, 1, 2))
+        self.assertEqual(reconcile_index(source, buckets=16).mismatched_buckets, 0)
+
+        index = LocalFeedEngine(Path(self.engine_dir.name)).indexes['arxiv']
+        self.assertEqual(set(index.hashes), set(ArxivEntry.objects.values_list('pk', flat=True)))
+        self.assertEqual(index.hashes['2401.00002v1'], entry.index_hash)
+
+
+class IndexHashTests(APITestCase):
+    def setUp(self) -> None:
+        self.arxiv_result = {
+            'arxiv_id': '2401.00001v1',
+            'title': 'Graph neural networks',
+            'summary': 'Message passing on graphs.',
+            'authors': [{'name': 'Alice Smith'}],
+            'published': '2024-01-01T00:00:00Z',
+            'updated': '2024-01-01T00:00:00Z',
+            'primary_category': 'cs.LG',
+            'categories': ['cs.LG'],
+            'link': 'http://arxiv.org/abs/2401.00001v1',
+            'pdf': 'http://arxiv.org/pdf/2401.00001v1',
+        }
+        self.github_result = {
+            'repo_id': '1',
+            'name': 'repo',
+            'full_name': 'owner/repo',
+            'description': 'A repository',
+            'html_url': 'https://github.com/owner/repo',
+            'owner': {'login': 'owner'},
+            'created_at': '2024-01-01T00:00:00Z',
+            'updated_at': '2024-01-01T00:00:00Z',
+            'pushed_at': '2024-01-01T00:00:00Z',
+            'homepage': None,
+            'size': 1,
+            'language': 'Python',
+            'license': None,
+            'topics': ['graphs'],
+            'stargazers_count': 1,
+            'forks_count': 0,
+            'open_issues_count': 0,
+            'network_count': 0,
+            'subscribers_count': 0,
+            'readme': None,
+        }
+
+    def test_arxiv_revision(self):
+        """测试重新抓取的论文总是更新元数据，只有索引内容变化时才标记为未同步"""
+        arxiv_crawler.save_results_to_db([self.arxiv_result])
+        entry = ArxivEntry.objects.get()
+        self.assertFalse(entry.synced)
+        self.assertEqual(entry.index_hash, SYNC_SOURCES['arxiv'].get_index_hash(entry))
+        ArxivEntry.objects.update(synced=True)
+
+        arxiv_crawler.save_results_to_db([{
+            **self.arxiv_result,
+            'comment': '10 pages',
+            'authors': [{'name': 'Alice Smith'}, {'name': 'Bob Jones'}],
+        }])
+        entry = ArxivEntry.objects.get()
+        self.assertTrue(entry.synced)
+        self.assertEqual(entry.comment, '10 pages')
+        self.assertEqual(ArxivEntryAuthor.objects.filter(arxiv_entry=entry).count(), 2)
+
+        arxiv_crawler.save_results_to_db([{**self.arxiv_result, 'title': 'Graph transformers'}])
+        entry = ArxivEntry.objects.get()
+        self.assertFalse(entry.synced)
+        self.assertEqual(entry.title, 'Graph transformers')
+
+    def test_github_update(self):
+        """测试重新抓取的仓库总是更新统计，只有索引内容变化时才标记为未同步"""
+        github_crawler.save_results_to_db([self.github_result])
+        GithubRepo.objects.update(synced=True)
+
+        github_crawler.save_results_to_db([{**self.github_result, 'stargazers_count': 10}])
+        repo = GithubRepo.objects.get()
+        self.assertTrue(repo.synced)
+        self.assertEqual(repo.stargazers_count, 10)
+
+        github_crawler.save_results_to_db([{**self.github_result, 'topics': ['graphs', 'gnn']}])
+        repo = GithubRepo.objects.get()
+        self.assertFalse(repo.synced)
+        self.assertEqual(repo.index_hash, SYNC_SOURCES['github'].get_index_hash(repo))
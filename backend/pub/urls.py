@@ -16,4 +16,8 @@ urlpatterns = [
         'claim/<str:resource_type>/<str:resource_id>',
         views.ResourceClaimView.as_view(),
         name='resource_claim'),
+    path(
+        'stats/<str:resource_type>/<str:resource_id>',
+        views.get_resource_view_stats,
+        name='get_resource_view_stats'),
 ]
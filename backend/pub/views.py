@@ -1,5 +1,7 @@
-from django.db.models import F
-from drf_spectacular.utils import OpenApiResponse, extend_schema
+from datetime import timedelta
+
+from drf_spectacular.utils import (OpenApiParameter, OpenApiResponse,
+                                   extend_schema)
 from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.exceptions import NotFound
@@ -9,11 +11,13 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 
 from history.utils import record_history
-from utils.exceptions import ErrorSerializer
+from utils.exceptions import CustomValidationError, ErrorSerializer
+from utils.view_counts import view_counts
 
 from .models import ArxivEntry, GithubRepo, ResourceClaim
+from .rollups import get_view_stats, get_viewer_key, view_rollups
 from .serializers import (ArxivEntrySerializer, GithubRepoSerializer,
-                          ResourceClaimSerializer)
+                          ResourceClaimSerializer, ViewStatsSerializer)
 
 
 @extend_schema(
@@ -37,9 +41,8 @@ def get_arxiv_entry(request: Request, arxiv_id: str):
     if request.user.is_authenticated:
         record_history(request.user, 'arxiv', entry)
 
-    entry.view_count = F('view_count') + 1
-    entry.save(update_fields=['view_count'])
-    entry.refresh_from_db()
+    entry.view_count += view_counts.incr(ArxivEntry, entry.pk)
+    view_rollups.add('arxiv', entry.pk, get_viewer_key(request))
 
     serializer = ArxivEntrySerializer(entry)
     return Response(serializer.data, status=status.HTTP_200_OK)
@@ -66,30 +69,74 @@ def get_github_repo(request: Request, owner: str, repo_name: str):
     if request.user.is_authenticated:
         record_history(request.user, 'github', repo)
 
-    repo.view_count = F('view_count') + 1
-    repo.save(update_fields=['view_count'])
-    repo.refresh_from_db()
+    repo.view_count += view_counts.incr(GithubRepo, repo.pk)
+    view_rollups.add('github', repo.pk, get_viewer_key(request))
 
     serializer = GithubRepoSerializer(repo)
     return Response(serializer.data, status=status.HTTP_200_OK)
 
 
-class ResourceClaimView(APIView):
-    permission_classes = [IsAuthenticatedOrReadOnly]
+def validate_resource(resource_type: str, resource_id: str):
+    """
+    验证资源是否存在，如果不存在则抛出异常。
+    """
+    if resource_type not in ['arxiv', 'github']:
+        raise NotFound('资源类型不存在。')
 
-    def validate_resource(self, resource_type: str, resource_id: str):
-        """
-        验证资源是否存在，如果不存在则抛出异常。
-        """
-        if resource_type not in ['arxiv', 'github']:
-            raise NotFound('资源类型不存在。')
+    if resource_type == 'arxiv':
+        if not ArxivEntry.objects.filter(arxiv_id=resource_id).exists():
+            raise NotFound('ArXiv 论文不存在。')
+    else:
+        if not GithubRepo.objects.filter(repo_id=resource_id).exists():
+            raise NotFound('GitHub 仓库不存在。')
 
-        if resource_type == 'arxiv':
-            if not ArxivEntry.objects.filter(arxiv_id=resource_id).exists():
-                raise NotFound('ArXiv 论文不存在。')
-        else:
-            if not GithubRepo.objects.filter(repo_id=resource_id).exists():
-                raise NotFound('GitHub 仓库不存在。')
+
+VIEW_STATS_WINDOWS = {
+    '24h': timedelta(hours=24),
+    '7d': timedelta(days=7),
+    '30d': timedelta(days=30),
+}
+
+
+@extend_schema(
+    operation_id='get_resource_view_stats',
+    parameters=[
+        OpenApiParameter(
+            'window', str, enum=list(VIEW_STATS_WINDOWS), default='24h',
+            description='统计的时间范围'),
+    ],
+    responses={
+        200: OpenApiResponse(ViewStatsSerializer, description='获取浏览统计成功'),
+        400: OpenApiResponse(ErrorSerializer, description='参数错误'),
+        404: OpenApiResponse(ErrorSerializer, description='资源不存在'),
+    },
+)
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def get_resource_view_stats(request: Request, resource_type: str, resource_id: str):
+    """
+    获取资源在最近一段时间内的浏览次数和独立访客数。
+    """
+    validate_resource(resource_type, resource_id)
+
+    window = request.query_params.get('window', '24h')
+    if window not in VIEW_STATS_WINDOWS:
+        windows = ', '.join(VIEW_STATS_WINDOWS)
+        raise CustomValidationError({'window': [f'时间范围必须是 {windows} 之一。']})
+
+    view_count, unique_viewers = get_view_stats(
+        resource_type, resource_id, VIEW_STATS_WINDOWS[window])
+
+    serializer = ViewStatsSerializer({
+        'window': window,
+        'view_count': view_count,
+        'unique_viewers': unique_viewers,
+    })
+    return Response(serializer.data)
+
+
+class ResourceClaimView(APIView):
+    permission_classes = [IsAuthenticatedOrReadOnly]
 
     @extend_schema(
         operation_id='get_resource_claims',
@@ -108,7 +155,7 @@ class ResourceClaimView(APIView):
         """
         获取资源的认领列表。
         """
-        self.validate_resource(resource_type, resource_id)
+        validate_resource(resource_type, resource_id)
 
         claims = ResourceClaim.objects.filter(
             resource_type=resource_type,
@@ -132,7 +179,7 @@ class ResourceClaimView(APIView):
         认领/取消认领资源。
         """
         # 验证资源类型
-        self.validate_resource(resource_type, resource_id)
+        validate_resource(resource_type, resource_id)
 
         claim, created = ResourceClaim.objects.get_or_create(
             user=request.user,
@@ -158,7 +205,7 @@ class ResourceClaimView(APIView):
         取消认领资源。
         """
         # 验证资源类型
-        self.validate_resource(resource_type, resource_id)
+        validate_resource(resource_type, resource_id)
 
         ResourceClaim.objects.filter(
             user=request.user,
@@ -0,0 +1,20 @@
+#!/bin/bash
+
+# 定期运行维护命令，由 docker-compose 的 scheduler 服务启动。
+export DJANGO_SETTINGS_MODULE=app.settings_prod
+
+hot_scores_interval=${HOT_SCORES_INTERVAL:-300}
+last_prune_date=
+
+while true; do
+    python manage.py refreshhotscores
+    # 新订阅的话题在请求路径上不召回候选，由这里补上
+    python manage.py rebuildtopiccandidates --missing
+
+    # 每天清理一次浏览历史
+    if [ "$(date +%F)" != "${last_prune_date}" ]; then
+        python manage.py prunehistory && last_prune_date=$(date +%F)
+    fi
+
+    sleep "${hot_scores_interval}"
+done
@@ -6,6 +6,7 @@ from rest_framework.request import Request
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from feed.utils import backfill_follow_inbox, prune_follow_inbox
 from utils.exceptions import CustomValidationError, ErrorSerializer
 
 from .models import ScholarSubscription, TopicSubscription
@@ -57,6 +58,8 @@ class TopicSubscriptionsView(APIView):
             subscriber=request.user,
             topic=topic,
         )
+        # 请求路径上不访问推荐后端。新话题的候选列表由 rebuildtopiccandidates --missing
+        # 定期召回，之后随同步命令批量重建；在此之前订阅推荐不包含该话题。
 
         serializer = TopicSubscriptionSerializer(subscription)
         return Response(data=serializer.data, status=status.HTTP_201_CREATED)
@@ -128,10 +131,12 @@ class ScholarSubscriptionsView(APIView):
             raise CustomValidationError(serializer.errors)
 
         scholar_name = serializer.validated_data['scholar_name']
-        subscription, _ = ScholarSubscription.objects.get_or_create(
+        subscription, created = ScholarSubscription.objects.get_or_create(
             subscriber=request.user,
             scholar_name=scholar_name,
         )
+        if created:
+            backfill_follow_inbox(request.user.id, scholar_name)
 
         serializer = ScholarSubscriptionSerializer(subscription)
         return Response(data=serializer.data, status=status.HTTP_201_CREATED)
@@ -160,4 +165,5 @@ class ScholarSubscriptionView(APIView):
             raise NotFound('未找到该订阅。')
 
         subscription.delete()
+        prune_follow_inbox(request.user.id, subscription.scholar_name)
         return Response(status=status.HTTP_204_NO_CONTENT)
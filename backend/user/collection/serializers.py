@@ -4,8 +4,9 @@ from drf_spectacular.utils import (PolymorphicProxySerializer,
                                    extend_schema_field)
 from rest_framework import serializers
 
-from pub.models import ArxivEntry, GithubRepo
-from pub.serializers import ArxivEntrySerializer, GithubRepoSerializer
+from pub.hydration import HydratedListSerializer
+from pub.serializers import (ArxivEntryCardSerializer,
+                             GithubRepoCardSerializer, get_resource_card)
 
 from .models import Collection, CollectionGroup
 
@@ -21,17 +22,17 @@ class CollectionItemSerializer(serializers.Serializer):
     @extend_schema_field(PolymorphicProxySerializer(
         component_name='CollectionItem',
         serializers=[
-            ArxivEntrySerializer,
-            GithubRepoSerializer,
+            ArxivEntryCardSerializer,
+            GithubRepoCardSerializer,
         ],
         resource_type_field_name=None,
     ))
     def get_item(self, obj: dict[str, Any]):
         match obj['type']:
             case 'arxiv':
-                return ArxivEntrySerializer(obj['item']).data
+                return ArxivEntryCardSerializer(obj['item'], context=self.context).data
             case 'github':
-                return GithubRepoSerializer(obj['item']).data
+                return GithubRepoCardSerializer(obj['item'], context=self.context).data
 
 
 class CollectionSerializer(serializers.ModelSerializer):
@@ -42,21 +43,13 @@ class CollectionSerializer(serializers.ModelSerializer):
         model = Collection
         fields = ['id', 'item_type', 'item_id', 'created_at', 'item']
         read_only_fields = ['id', 'created_at']
+        list_serializer_class = HydratedListSerializer
 
     def get_item(self, obj):
-        if obj.item_type == 'arxiv':
-            try:
-                entry = ArxivEntry.objects.get(arxiv_id=obj.item_id)
-                return ArxivEntrySerializer(entry).data
-            except ArxivEntry.DoesNotExist:
-                return None
-        elif obj.item_type == 'github':
-            try:
-                repo = GithubRepo.objects.get(repo_id=obj.item_id)
-                return GithubRepoSerializer(repo).data
-            except GithubRepo.DoesNotExist:
-                return None
-        return None
+        return get_resource_card(self.context, obj.item_type, obj.item_id)
+
+    def get_resource_keys(self, obj: Collection):
+        return [(obj.item_type, obj.item_id)]
 
 
 class CollectionGroupSerializer(serializers.ModelSerializer):
@@ -69,10 +62,14 @@ class CollectionGroupSerializer(serializers.ModelSerializer):
         fields = ['id', 'name', 'description', 'is_public',
                   'created_at', 'updated_at', 'items', 'items_count']
         read_only_fields = ['id', 'created_at', 'updated_at']
+        list_serializer_class = HydratedListSerializer
 
     def get_items_count(self, obj):
         return obj.collections.count()
 
+    def get_resource_keys(self, obj: CollectionGroup):
+        return [(collection.item_type, collection.item_id) for collection in obj.collections.all()]
+
 
 class CollectionGroupManageItemsSerializer(serializers.Serializer):
     """管理收藏分组的序列化器"""
@@ -92,6 +92,29 @@ class CollectionTests(TestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(len(response.data), 2)
 
+    def test_list_collections_hydrates_in_bulk(self):
+        """测试列出收藏时每种资源只用一条查询加载，已删除的资源返回空"""
+        for i in range(5):
+            entry = ArxivEntry.objects.create(
+                arxiv_id=f'2401.1000{i}', title=f'Paper {i}', summary='', authors=[],
+                published='2024-01-01T00:00:00Z', updated='2024-01-01T00:00:00Z',
+                primary_category='cs.AI', categories=[], link='', pdf='',
+            )
+            Collection.objects.create(user=self.user, item_type='arxiv', item_id=entry.arxiv_id)
+        Collection.objects.create(
+            user=self.user, item_type='github', item_id=self.github_repo.repo_id)
+        Collection.objects.create(user=self.user, item_type='arxiv', item_id='missing')
+
+        url = reverse('collection:collection-list')
+        with self.assertNumQueries(3):  # 收藏项 + arXiv 论文 + GitHub 仓库
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        items = {item['item_id']: item['item'] for item in response.data}
+        self.assertEqual(len(items), 7)
+        self.assertEqual(items['2401.10003']['title'], 'Paper 3')
+        self.assertEqual(items[str(self.github_repo.repo_id)]['name'], 'test-repo')
+        self.assertIsNone(items['missing'])
+
     def test_delete_collection(self):
         """测试删除收藏"""
         collection = Collection.objects.create(
@@ -187,6 +210,21 @@ class CollectionGroupTests(TestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(len(response.data), 2)
 
+    def test_list_groups_hydrates_in_bulk(self):
+        """测试列出收藏分组时所有分组的收藏项一起加载"""
+        for i in range(3):
+            group = CollectionGroup.objects.create(user=self.user, name=f'Group {i}')
+            for j in range(3):
+                collection = Collection.objects.create(
+                    user=self.user, item_type='arxiv', item_id=f'2401.{i}{j}')
+                group.collections.add(collection)
+
+        url = reverse('collection:collectiongroup-list')
+        with self.assertNumQueries(3):  # 分组 + 收藏项 + arXiv 论文
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([group['items_count'] for group in response.data], [3, 3, 3])
+
     def test_manage_group_items(self):
         """测试管理分组内的收藏项"""
         group = CollectionGroup.objects.create(
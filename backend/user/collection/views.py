@@ -35,7 +35,11 @@ class CollectionGroupViewSet(viewsets.ModelViewSet):
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
-        return CollectionGroup.objects.filter(user=self.request.user)
+        return (
+            CollectionGroup.objects
+            .filter(user=self.request.user)
+            .prefetch_related('collections')
+        )
 
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
@@ -81,5 +85,6 @@ class CollectionGroupViewSet(viewsets.ModelViewSet):
                 collection_id__in=collection_ids
             ).delete()
 
-        serializer = self.get_serializer(group)
+        # 重新加载分组，预取的收藏项已经过期。
+        serializer = self.get_serializer(self.get_object())
         return Response(serializer.data, status=status.HTTP_200_OK)
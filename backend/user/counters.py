@@ -0,0 +1,89 @@
+from collections.abc import Iterable
+from typing import Any, Optional
+
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from comment.models import Comment
+from history.models import History
+from pub.models import ResourceClaim
+from sub.models import ScholarSubscription, TopicSubscription
+from utils.bulk import bulk_upsert
+
+from .collection.models import Collection
+from .models import User, UserCounters
+
+# (模型, 指向用户的字段, 计数字段)
+COUNTED_MODELS = [
+    (TopicSubscription, 'subscriber', 'topic_count'),
+    (ScholarSubscription, 'subscriber', 'scholar_count'),
+    (Collection, 'user', 'collection_count'),
+    (ResourceClaim, 'user', 'claim_count'),
+    (Comment, 'author', 'comment_count'),
+    (History, 'user', 'history_count'),
+]
+COUNTER_FIELDS = [field for _, _, field in COUNTED_MODELS]
+
+# 每批重新计算的用户数。
+RECOUNT_BATCH_SIZE = 1000
+
+
+def adjust_counter(user_id: Any, field: str, delta: int) -> None:
+    """
+    增减用户的一个计数。用户还没有计数记录时跳过，由 recountusercounters 命令校正。
+    """
+    UserCounters.objects.filter(user_id=user_id).update(**{field: F(field) + delta})
+
+
+def recount_user_counters(
+    user_ids: Optional[Iterable[Any]] = None,
+    fields: Iterable[str] = COUNTER_FIELDS,
+) -> int:
+    """
+    重新计算用户的计数并批量写入，不指定用户时重新计算所有用户，返回写入的用户数。
+    """
+    fields = list(fields)
+    counts = {}
+    for model, user_field, field in COUNTED_MODELS:
+        if field in fields:
+            counts[field] = Coalesce(Subquery(
+                model.objects
+                .filter(**{user_field: OuterRef('pk')})
+                .order_by()
+                .values(user_field)
+                .annotate(count=Count('*'))
+                .values('count')
+            ), 0)
+
+    users = User.objects.order_by('pk')
+    if user_ids is not None:
+        users = users.filter(pk__in=list(user_ids))
+    if set(fields) != set(COUNTER_FIELDS):
+        # 只更新部分计数时跳过没有计数记录的用户，避免其他计数被写为默认值
+        users = users.filter(counters__isnull=False)
+    user_pks = list(users.values_list('pk', flat=True))
+
+    written = 0
+    for i in range(0, len(user_pks), RECOUNT_BATCH_SIZE):
+        rows = (
+            User.objects
+            .filter(pk__in=user_pks[i:i + RECOUNT_BATCH_SIZE])
+            .annotate(**counts)
+            .values('pk', *fields)
+        )
+        counters = [
+            UserCounters(user_id=row['pk'], **{field: row[field] for field in fields})
+            for row in rows
+        ]
+        bulk_upsert(UserCounters, counters, ['user'], fields, batch_size=RECOUNT_BATCH_SIZE)
+        written += len(counters)
+    return written
+
+
+def get_user_counters(user: User) -> UserCounters:
+    """
+    读取用户的计数。计数记录在创建用户时创建，已有用户的记录由数据迁移补齐，
+    缺失时创建空的记录，由 recountusercounters 命令校正。
+    """
+    counters, _ = UserCounters.objects.get_or_create(user=user)
+    return counters
@@ -0,0 +1,18 @@
+import argparse
+
+from django.core.management.base import BaseCommand
+
+from user.counters import recount_user_counters
+
+
+class Command(BaseCommand):
+    help = '重新计算用户的统计计数，校正信号遗漏的变化。'
+
+    def add_arguments(self, parser: argparse.ArgumentParser) -> None:
+        parser.add_argument('--user', type=int, nargs='*', help='只重新计算指定用户的计数')
+
+    def handle(self, *args, **options):
+        recounted = recount_user_counters(options['user'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Successfully recounted counters for {recounted} users.'))
@@ -0,0 +1,31 @@
+# Generated by Django 5.1.2 on 2026-10-17 21:26
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user', '0008_alter_collection_options_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserCounters',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='counters', serialize=False, to=settings.AUTH_USER_MODEL, verbose_name='用户')),
+                ('topic_count', models.IntegerField(default=0, verbose_name='订阅话题数')),
+                ('scholar_count', models.IntegerField(default=0, verbose_name='订阅学者数')),
+                ('collection_count', models.IntegerField(default=0, verbose_name='收藏数')),
+                ('claim_count', models.IntegerField(default=0, verbose_name='认领数')),
+                ('comment_count', models.IntegerField(default=0, verbose_name='评论数')),
+                ('history_count', models.IntegerField(default=0, verbose_name='浏览历史数')),
+            ],
+            options={
+                'verbose_name': '用户统计',
+                'verbose_name_plural': '用户统计',
+            },
+        ),
+    ]
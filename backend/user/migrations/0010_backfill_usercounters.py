@@ -0,0 +1,55 @@
+# Generated by Django 5.1.2 on 2026-10-17 21:51
+
+from django.db import migrations
+from django.db.models import Count
+
+# (应用, 模型, 指向用户的字段, 计数字段)
+COUNTED_MODELS = [
+    ('sub', 'TopicSubscription', 'subscriber', 'topic_count'),
+    ('sub', 'ScholarSubscription', 'subscriber', 'scholar_count'),
+    ('user', 'Collection', 'user', 'collection_count'),
+    ('pub', 'ResourceClaim', 'user', 'claim_count'),
+    ('comment', 'Comment', 'author', 'comment_count'),
+    ('history', 'History', 'user', 'history_count'),
+]
+
+
+def backfill_user_counters(apps, schema_editor):
+    """
+    为已有用户创建计数记录。
+    """
+    User = apps.get_model('user', 'User')
+    UserCounters = apps.get_model('user', 'UserCounters')
+
+    counts = {}
+    for app_label, model_name, user_field, field in COUNTED_MODELS:
+        model = apps.get_model(app_label, model_name)
+        rows = model.objects.order_by().values(user_field).annotate(count=Count('*'))
+        counts[field] = {row[user_field]: row['count'] for row in rows}
+
+    user_ids = User.objects.filter(counters__isnull=True).values_list('pk', flat=True)
+    UserCounters.objects.bulk_create(
+        (
+            UserCounters(user_id=user_id, **{
+                field: field_counts.get(user_id, 0) for field, field_counts in counts.items()
+            })
+            for user_id in user_ids.iterator()
+        ),
+        batch_size=1000,
+        ignore_conflicts=True,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('comment', '0003_comment_wilson_score'),
+        ('history', '0004_history_user_viewed_at_idx'),
+        ('pub', '0012_harvestcheckpoint'),
+        ('sub', '0001_initial'),
+        ('user', '0009_usercounters'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_user_counters, migrations.RunPython.noop),
+    ]
@@ -21,3 +21,24 @@ class User(AbstractUser):
 
     created_at = models.DateTimeField(auto_now_add=True, verbose_name='创建时间')
     updated_at = models.DateTimeField(auto_now=True, verbose_name='更新时间')
+
+
+class UserCounters(models.Model):
+    """
+    用户的统计计数，由信号和写入浏览历史的代码维护，recountusercounters 命令定期校正。
+    """
+
+    user = models.OneToOneField(
+        User, on_delete=models.CASCADE, primary_key=True,
+        related_name='counters', verbose_name='用户')
+
+    topic_count = models.IntegerField(default=0, verbose_name='订阅话题数')
+    scholar_count = models.IntegerField(default=0, verbose_name='订阅学者数')
+    collection_count = models.IntegerField(default=0, verbose_name='收藏数')
+    claim_count = models.IntegerField(default=0, verbose_name='认领数')
+    comment_count = models.IntegerField(default=0, verbose_name='评论数')
+    history_count = models.IntegerField(default=0, verbose_name='浏览历史数')
+
+    class Meta:
+        verbose_name = '用户统计'
+        verbose_name_plural = '用户统计'
@@ -0,0 +1,40 @@
+from django.db import models
+from django.db.models.signals import post_delete, post_save
+
+from history.models import History
+
+from .counters import COUNTED_MODELS, adjust_counter
+from .models import User, UserCounters
+
+
+def create_user_counters(sender, instance: User, created: bool, raw: bool = False, **kwargs):
+    if created and not raw:
+        UserCounters.objects.get_or_create(user=instance)
+
+
+def connect_counter_signals(model: type[models.Model], user_field: str, field: str) -> None:
+    """
+    创建和删除对象时更新用户的计数。
+    """
+    user_id_field = model._meta.get_field(user_field).attname
+
+    def on_save(sender, instance, created: bool, raw: bool = False, **kwargs):
+        if created and not raw:
+            adjust_counter(getattr(instance, user_id_field), field, 1)
+
+    def on_delete(sender, instance, **kwargs):
+        adjust_counter(getattr(instance, user_id_field), field, -1)
+
+    post_save.connect(on_save, sender=model, weak=False,
+                      dispatch_uid=f'user_counters_{field}_save')
+    post_delete.connect(on_delete, sender=model, weak=False,
+                        dispatch_uid=f'user_counters_{field}_delete')
+
+
+def connect_signals() -> None:
+    post_save.connect(create_user_counters, sender=User, dispatch_uid='user_counters_create')
+
+    for model, user_field, field in COUNTED_MODELS:
+        # 浏览历史批量写入和清理，不触发信号，由 history.utils 负责更新计数
+        if model is not History:
+            connect_counter_signals(model, user_field, field)
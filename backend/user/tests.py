@@ -1,9 +1,21 @@
+from io import StringIO
+from unittest import mock
+
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APIClient, APITestCase
 
-from .models import User
+from comment.models import Comment
+from history.models import History
+from history.utils import history_buffer
+from pub.models import ArxivEntry, ResourceClaim
+from sub.models import TopicSubscription
+
+from .collection.models import Collection
+from .counters import recount_user_counters
+from .models import User, UserCounters
 
 # Create your tests here.
 
@@ -280,3 +292,77 @@ class UserTests(APITestCase):
         response = self.client.post(url, {}, format='multipart')
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
         self.assertEqual(response.data['code'], 'validation_error')
+
+
+class UserCountersTests(APITestCase):
+    client: APIClient
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpassword')
+        self.client.force_authenticate(user=self.user)
+        self.entry = ArxivEntry.objects.create(
+            arxiv_id='2401.00001', title='Test Paper', summary='', authors=[],
+            published='2024-01-01T00:00:00Z', updated='2024-01-01T00:00:00Z',
+            primary_category='cs.AI', categories=[], link='', pdf='',
+        )
+
+    def get_stats(self):
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('user:get_self_stats'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def test_counters_follow_changes(self):
+        """测试创建和删除对象时更新计数，读取统计只需要一次查询"""
+        self.assertEqual(self.get_stats()['comment_count'], 0)
+
+        TopicSubscription.objects.create(subscriber=self.user, topic='llm')
+        Collection.objects.create(user=self.user, item_type='arxiv', item_id='2401.00001')
+        comment = Comment.objects.create(resource='arxiv/2401.00001', content='a', author=self.user)
+        Comment.objects.create(
+            resource='arxiv/2401.00001', content='b', author=self.user, parent=comment)
+        history_buffer.add(self.user.pk, 'arxiv', self.entry.pk)
+        history_buffer.flush()
+
+        stats = self.get_stats()
+        self.assertEqual(
+            (stats['topic_count'], stats['collection_count'], stats['comment_count'],
+             stats['history_count']),
+            (1, 1, 2, 1),
+        )
+
+        # 删除父评论时级联删除回复
+        comment.delete()
+        history = History.objects.get()
+        self.client.delete(reverse('history-detail', kwargs={'pk': history.pk}))
+        stats = self.get_stats()
+        self.assertEqual((stats['comment_count'], stats['history_count']), (0, 0))
+
+    def test_recount_user_counters(self):
+        """测试重新计算计数，没有计数记录的用户补齐记录"""
+        ResourceClaim.objects.create(
+            user=self.user, resource_type='arxiv', resource_id='2401.00001')
+        UserCounters.objects.filter(user=self.user).update(claim_count=5, history_count=3)
+
+        call_command('recountusercounters', stdout=StringIO())
+        counters = UserCounters.objects.get(user=self.user)
+        self.assertEqual((counters.claim_count, counters.history_count), (1, 0))
+
+        UserCounters.objects.all().delete()
+        call_command('recountusercounters', stdout=StringIO())
+        self.assertEqual(self.get_stats()['claim_count'], 1)
+
+    @mock.patch('utils.bulk.supports_bulk_create_unique_fields', return_value=False)
+    def test_recount_without_unique_fields(self, _):
+        """测试数据库不支持按唯一字段更新冲突（MySQL）时重新计算计数"""
+        other = User.objects.create_user(username='other', password='testpassword')
+        UserCounters.objects.filter(user=other).delete()
+        TopicSubscription.objects.create(subscriber=self.user, topic='llm')
+        TopicSubscription.objects.create(subscriber=other, topic='llm')
+        UserCounters.objects.filter(user=self.user).update(topic_count=5)
+
+        self.assertEqual(recount_user_counters(), 2)
+        self.assertEqual(
+            dict(UserCounters.objects.values_list('user', 'topic_count')),
+            {self.user.pk: 1, other.pk: 1},
+        )
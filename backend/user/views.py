@@ -1,5 +1,5 @@
 from django.contrib.auth.backends import ModelBackend
-from django.db.models import F, Q
+from django.db.models import Q
 from drf_spectacular.utils import OpenApiResponse, extend_schema
 from rest_framework import status
 from rest_framework.decorators import (api_view, parser_classes,
@@ -13,7 +13,9 @@ from rest_framework.views import APIView
 from pub.models import ResourceClaim
 from pub.serializers import UserResourceClaimSerializer
 from utils.exceptions import CustomValidationError, ErrorSerializer
+from utils.view_counts import view_counts
 
+from .counters import get_user_counters
 from .exceptions import PasswordNotMatch, UserDoesNotExist
 from .models import User
 from .serializers import (ChangePasswordSerializer, RegisterSerializer,
@@ -113,9 +115,7 @@ def get_user_by_id(request: Request, pk):
     """
     try:
         user = User.objects.get(pk=pk)
-        user.view_count = F('view_count') + 1
-        user.save(update_fields=['view_count'])
-        user.refresh_from_db()
+        user.view_count += view_counts.incr(User, user.pk)
     except User.DoesNotExist:
         raise UserDoesNotExist()
     serializer = UserSerializer(user)
@@ -204,7 +204,7 @@ def get_user_claims(request: Request, pk: int) -> Response:
         raise UserDoesNotExist()
 
     claims = ResourceClaim.objects.filter(user=user)
-    serializer = UserResourceClaimSerializer(claims, many=True)
+    serializer = UserResourceClaimSerializer(claims, many=True, context={'request': request})
     return Response(serializer.data)
 
 
@@ -231,21 +231,5 @@ def get_self_stats(request: Request) -> Response:
     """
     获取当前登录用户的统计数据。
     """
-    user = request.user
-
-    topic_count = user.topicsubscription_set.count()
-    scholar_count = user.scholarsubscription_set.count()
-    collection_count = user.collection_set.count()
-    claim_count = user.resourceclaim_set.count()
-    comment_count = user.comment_set.count()
-    history_count = user.history_set.count()
-
-    serializer = UserStatsSerializer({
-        'topic_count': topic_count,
-        'scholar_count': scholar_count,
-        'collection_count': collection_count,
-        'claim_count': claim_count,
-        'comment_count': comment_count,
-        'history_count': history_count,
-    })
+    serializer = UserStatsSerializer(get_user_counters(request.user))
     return Response(serializer.data)
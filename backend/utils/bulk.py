@@ -0,0 +1,49 @@
+"""
+可移植的批量写入。
+"""
+from collections.abc import Sequence
+
+from django.db.models import Model
+
+from .db import supports_bulk_create_unique_fields
+
+
+def bulk_upsert(
+    model: type[Model],
+    objs: Sequence[Model],
+    unique_fields: Sequence[str],
+    update_fields: Sequence[str],
+    batch_size: int = 500,
+) -> None:
+    """
+    按 ``unique_fields`` 批量插入或更新记录。
+
+    MySQL 不支持 ``bulk_create`` 的 ``unique_fields``，此时先更新已存在的记录，
+    再插入其余记录并忽略并发插入造成的冲突。
+    """
+    if supports_bulk_create_unique_fields():
+        model.objects.bulk_create(
+            objs,
+            batch_size=batch_size,
+            update_conflicts=True,
+            unique_fields=unique_fields,
+            update_fields=update_fields,
+        )
+        return
+
+    attnames = [model._meta.get_field(field).attname for field in unique_fields]
+    for start in range(0, len(objs), batch_size):
+        batch = objs[start:start + batch_size]
+        keys = {tuple(getattr(obj, attname) for attname in attnames): obj for obj in batch}
+        existing = model.objects.filter(**{
+            f'{attname}__in': {key[i] for key in keys} for i, attname in enumerate(attnames)
+        }).values_list('pk', *attnames)
+
+        updated = []
+        for pk, *key in existing:
+            obj = keys.pop(tuple(key), None)
+            if obj is not None:
+                obj.pk = pk
+                updated.append(obj)
+        model.objects.bulk_update(updated, update_fields)
+        model.objects.bulk_create(keys.values(), ignore_conflicts=True)
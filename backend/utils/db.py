@@ -0,0 +1,11 @@
+from django.conf import settings
+
+
+def supports_bulk_create_unique_fields() -> bool:
+    """
+    数据库是否支持 ``bulk_create`` 的 ``unique_fields``，MySQL 不支持。
+    """
+    return settings.DATABASES['default']['ENGINE'] in (
+        'django.db.backends.postgresql',
+        'django.db.backends.sqlite3',
+    )
@@ -1,5 +1,88 @@
+import logging
+import random
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from concurrent.futures import wait
+from typing import Any, Callable, Hashable, Optional
+
 import requests
 from django.conf import settings
+from requests.adapters import HTTPAdapter
+
+from . import metrics
+from .local_engine import LocalFeedEngineAdapter
+
+logger = logging.getLogger(__name__)
+
+# 网关类错误通常是暂时的，可以重试。
+RETRYABLE_STATUS_CODES = frozenset({502, 503, 504})
+
+
+class FeedEngineUnavailable(requests.RequestException):
+    """
+    熔断器打开期间，推荐后端的请求直接失败。
+    """
+
+
+class CircuitBreaker:
+    """
+    推荐后端的熔断器。
+
+    连续失败 ``FEED_ENGINE_BREAKER_THRESHOLD`` 次后打开，之后的请求直接失败；
+    经过 ``FEED_ENGINE_BREAKER_COOLDOWN`` 秒后放行一个试探请求，成功则关闭，失败则重新打开。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._probing = False
+
+    @property
+    def is_open(self) -> bool:
+        return self._opened_at is not None
+
+    def before_call(self) -> None:
+        with self._lock:
+            if self._opened_at is None:
+                return
+            elapsed = time.monotonic() - self._opened_at
+            if self._probing or elapsed < settings.FEED_ENGINE_BREAKER_COOLDOWN:
+                raise FeedEngineUnavailable('Feed engine circuit breaker is open')
+            self._probing = True
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self._opened_at is not None:
+                logger.info('Feed engine recovered, closing circuit breaker')
+            self._failures = 0
+            self._opened_at = None
+            self._probing = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._probing or (
+                self._opened_at is None
+                and self._failures >= settings.FEED_ENGINE_BREAKER_THRESHOLD
+            ):
+                logger.warning(
+                    'Feed engine failed %d times in a row, opening circuit breaker',
+                    self._failures)
+                metrics.incr('feed_engine.breaker.open')
+                self._opened_at = time.monotonic()
+                self._probing = False
+
+    def reset(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._probing = False
+
+
+circuit_breaker = CircuitBreaker()
 
 
 class FeedEngineSession(requests.Session):
@@ -8,10 +91,189 @@ class FeedEngineSession(requests.Session):
         self.headers.update({
             'Authorization': f'Bearer {settings.FEED_ENGINE_TOKEN}',
         })
+        # 连接池大小与调用推荐后端的线程数一致，避免并发请求时反复建立连接。
+        adapter = HTTPAdapter(pool_maxsize=settings.FEED_ENGINE_MAX_WORKERS)
+        self.mount('http://', adapter)
+        self.mount('https://', adapter)
+        # FEED_ENGINE_URL 以 local:// 开头时使用进程内的推荐后端
+        self.mount('local://', LocalFeedEngineAdapter())
 
     def request(self, method, url, *args, **kwargs):
+        circuit_breaker.before_call()
+
+        kwargs.setdefault('timeout', get_timeout())
         joined_url = f'{settings.FEED_ENGINE_URL}{url}'
-        return super().request(method, joined_url, *args, **kwargs)
+        try:
+            response = super().request(method, joined_url, *args, **kwargs)
+        except requests.RequestException:
+            circuit_breaker.record_failure()
+            raise
+
+        if response.status_code >= 500:
+            circuit_breaker.record_failure()
+        else:
+            circuit_breaker.record_success()
+        return response
 
 
 session = FeedEngineSession()
+
+
+def get_timeout(
+    read_timeout: Optional[float] = None,
+    deadline: Optional[float] = None,
+) -> tuple[float, float]:
+    """
+    获取请求的 (连接超时, 读取超时)，读取超时默认为 ``FEED_ENGINE_TIMEOUT``，且不超过截止时间。
+    """
+    if read_timeout is None:
+        read_timeout = settings.FEED_ENGINE_TIMEOUT
+    if deadline is not None:
+        read_timeout = max(min(read_timeout, deadline - time.monotonic()), 0.001)
+    return min(settings.FEED_ENGINE_CONNECT_TIMEOUT, read_timeout), read_timeout
+
+
+_executor: Optional[ThreadPoolExecutor] = None
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """
+    获取调用推荐后端的线程池，线程数由 ``FEED_ENGINE_MAX_WORKERS`` 限定。
+    """
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.FEED_ENGINE_MAX_WORKERS,
+            thread_name_prefix='feed-engine',
+        )
+    return _executor
+
+
+class SingleFlight:
+    """
+    合并并发的相同请求：同一个键同时只有一个调用在执行，其余调用等待并共享它的结果或异常。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: dict[Hashable, Future] = {}
+
+    def do(self, key: Hashable, fn: Callable[[], Any], deadline: Optional[float] = None) -> Any:
+        with self._lock:
+            future = self._calls.get(key)
+            is_leader = future is None
+            if is_leader:
+                future = self._calls[key] = Future()
+
+        if not is_leader:
+            metrics.incr('feed_engine.singleflight.merged')
+            timeout = None if deadline is None else max(deadline - time.monotonic(), 0)
+            try:
+                return future.result(timeout=timeout)
+            except FutureTimeoutError:
+                raise requests.Timeout('Timed out waiting for an in-flight feed engine request')
+
+        metrics.incr('feed_engine.singleflight.calls')
+        try:
+            result = fn()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+
+single_flight = SingleFlight()
+
+
+def get_search_key(url: str, payload: dict[str, Any]) -> Hashable:
+    """
+    获取搜索请求的合并键，查询忽略大小写和多余的空白，但保留顺序以便按位置对应结果。
+    """
+    queries = tuple(' '.join(query.split()).casefold() for query in payload['queries'])
+    return url, queries, payload['max_results']
+
+
+def post_json(url: str, payload: Any, deadline: Optional[float] = None) -> Any:
+    """
+    向推荐后端发送请求并解码响应。
+
+    并发的相同搜索请求只发送一次，调用方共享解码后的结果，因此不应修改返回值。
+    """
+    if url.endswith('/search'):
+        return single_flight.do(
+            get_search_key(url, payload),
+            lambda: _post_json(url, payload, deadline),
+            deadline,
+        )
+    return _post_json(url, payload, deadline)
+
+
+def _post_json(url: str, payload: Any, deadline: Optional[float] = None) -> Any:
+    """
+    向推荐后端发送请求并解码响应。
+
+    搜索请求是幂等的，连接失败、超时或网关错误时在截止时间内最多重试 ``FEED_ENGINE_RETRIES`` 次，
+    重试间隔为带随机抖动的指数退避。
+    """
+    for attempt in range(settings.FEED_ENGINE_RETRIES + 1):
+        try:
+            response = session.post(url, json=payload, timeout=get_timeout(deadline=deadline))
+            response.raise_for_status()
+            return response.json()
+        except requests.RequestException as e:
+            delay = random.uniform(0, settings.FEED_ENGINE_RETRY_BACKOFF * 2 ** attempt)
+            if attempt == settings.FEED_ENGINE_RETRIES or not _is_retryable(url, e):
+                raise
+            if deadline is not None and time.monotonic() + delay >= deadline:
+                raise
+            logger.info('Retrying feed engine request to %s: %s', url, e)
+
+        metrics.incr('feed_engine.retry')
+        time.sleep(delay)
+
+
+def _is_retryable(url: str, e: requests.RequestException) -> bool:
+    if not url.endswith('/search') or isinstance(e, FeedEngineUnavailable):
+        return False
+    if isinstance(e, requests.HTTPError):
+        return e.response is not None and e.response.status_code in RETRYABLE_STATUS_CODES
+    return isinstance(e, (requests.ConnectionError, requests.Timeout))
+
+
+def post_json_concurrently(calls: list[tuple[str, Any]]) -> list[Optional[Any]]:
+    """
+    并发地向推荐后端发送多个请求，按顺序返回解码后的响应。
+
+    所有请求共享 ``FEED_ENGINE_TIMEOUT`` 的截止时间，超时或失败的请求对应的结果为 ``None``，
+    调用方可以据此使用部分结果。
+    """
+    executor = get_executor()
+    deadline = time.monotonic() + settings.FEED_ENGINE_TIMEOUT
+    futures = [executor.submit(post_json, url, payload, deadline) for url, payload in calls]
+    done, _ = wait(futures, timeout=settings.FEED_ENGINE_TIMEOUT)
+
+    results = []
+    for (url, _), future in zip(calls, futures):
+        results.append(_get_result(url, future, future in done))
+    return results
+
+
+def _get_result(url: str, future: Future, done: bool) -> Optional[Any]:
+    if not done:
+        future.cancel()
+        logger.warning('Feed engine request to %s timed out', url)
+        return None
+
+    try:
+        return future.result()
+    except FeedEngineUnavailable:
+        metrics.incr('feed_engine.unavailable')
+        return None
+    except (requests.RequestException, ValueError) as e:
+        logger.warning('Feed engine request to %s failed: %s', url, e)
+        return None
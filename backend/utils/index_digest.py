@@ -0,0 +1,35 @@
+"""
+推荐后端索引的摘要，用于比较数据库与索引中的条目。
+
+条目按 ID 的哈希分到固定数量的桶中，桶的摘要是桶内每个条目 (ID, 内容哈希) 的哈希的异或，
+与条目的顺序无关。只有两边摘要不同的桶才需要逐条比较。
+"""
+import hashlib
+from collections.abc import Iterable
+
+
+def get_content_hash(text: str) -> str:
+    """
+    获取索引文本的哈希，数据库和推荐后端使用相同的算法。
+    """
+    return hashlib.blake2b(text.encode(), digest_size=16).hexdigest()
+
+
+def get_bucket(entry_id: str, buckets: int) -> int:
+    digest = hashlib.blake2b(entry_id.encode(), digest_size=8).digest()
+    return int.from_bytes(digest, 'big') % buckets
+
+
+def get_entry_digest(entry_id: str, content_hash: str) -> int:
+    digest = hashlib.blake2b(f'{entry_id}\0{content_hash}'.encode(), digest_size=16).digest()
+    return int.from_bytes(digest, 'big')
+
+
+def digest_buckets(entries: Iterable[tuple[str, str]], buckets: int) -> list[str]:
+    """
+    计算 (ID, 内容哈希) 序列中每个桶的摘要。
+    """
+    digests = [0] * buckets
+    for entry_id, content_hash in entries:
+        digests[get_bucket(entry_id, buckets)] ^= get_entry_digest(entry_id, content_hash)
+    return [f'{digest:032x}' for digest in digests]
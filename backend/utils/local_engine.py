@@ -0,0 +1,333 @@
+"""
+进程内的推荐后端，实现与外部推荐后端相同的 HTTP 接口，用于开发、测试和小规模部署。
+
+通过将 ``FEED_ENGINE_URL`` 设置为 ``local://`` 开头的地址启用，请求由 :class:`LocalFeedEngineAdapter`
+在进程内处理，不经过网络。
+"""
+import gzip
+import json
+import os
+import re
+import threading
+from collections import Counter
+from pathlib import Path
+from typing import Any, NamedTuple, Optional
+
+import numpy as np
+import requests
+from django.conf import settings
+from requests.adapters import BaseAdapter
+from scipy import sparse
+from unidecode import unidecode
+
+from .index_digest import digest_buckets, get_bucket, get_content_hash
+
+TOKEN_PATTERN = re.compile(r'[a-z0-9]+')
+
+# 搜索得分中查询词覆盖率的权重，其余为 TF-IDF 余弦相似度。
+COVERAGE_WEIGHT = 0.8
+
+
+def tokenize(text: str) -> list[str]:
+    return TOKEN_PATTERN.findall(unidecode(text).lower())
+
+
+class SearchHit(NamedTuple):
+    entry_id: str
+    score: float
+
+
+class _Matrices(NamedTuple):
+    ids: list[str]
+    idf: np.ndarray
+    weights: sparse.csr_matrix
+    presence: sparse.csr_matrix
+
+
+class SparseIndex:
+    """
+    基于稀疏词频矩阵的 TF-IDF 索引。
+
+    得分由按 IDF 加权的查询词覆盖率和 TF-IDF 余弦相似度组成，取值范围为 [0, 1]，
+    包含全部查询词的文档得分不低于 ``COVERAGE_WEIGHT``。
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.vocab: dict[str, int] = {}
+        self.rows: dict[str, tuple[np.ndarray, np.ndarray]] = {}
+        # 每个条目的索引文本的哈希，用于与数据库对账
+        self.hashes: dict[str, str] = {}
+        self.dirty = False
+
+        self._matrices: Optional[_Matrices] = None
+        self._mtime: Optional[int] = None
+        self._lock = threading.RLock()
+
+        self.reload()
+
+    def __len__(self):
+        return len(self.rows)
+
+    def add(self, documents: list[dict[str, str]]) -> None:
+        with self._lock:
+            for document in documents:
+                counts = Counter(tokenize(document['content']))
+                indices = np.fromiter(
+                    (self.vocab.setdefault(term, len(self.vocab)) for term in counts),
+                    dtype=np.int32, count=len(counts))
+                data = np.fromiter(counts.values(), dtype=np.float32, count=len(counts))
+                self.rows[document['entry_id']] = (indices, data)
+                self.hashes[document['entry_id']] = get_content_hash(document['content'])
+
+            self.dirty = True
+            self._matrices = None
+
+    def remove(self, entry_ids: list[str]) -> int:
+        with self._lock:
+            removed = 0
+            for entry_id in entry_ids:
+                if self.rows.pop(entry_id, None) is not None:
+                    removed += 1
+                self.hashes.pop(entry_id, None)
+
+            if removed:
+                self.dirty = True
+                self._matrices = None
+            return removed
+
+    def digest(self, buckets: int) -> list[str]:
+        with self._lock:
+            self.reload_if_changed()
+            return digest_buckets(self.hashes.items(), buckets)
+
+    def get_hashes(self, buckets: int, bucket_ids: list[int]) -> dict[str, str]:
+        """
+        获取指定桶中的条目及其内容哈希。
+        """
+        bucket_ids = set(bucket_ids)
+        with self._lock:
+            self.reload_if_changed()
+            return {
+                entry_id: content_hash
+                for entry_id, content_hash in self.hashes.items()
+                if get_bucket(entry_id, buckets) in bucket_ids
+            }
+
+    def search(self, queries: list[str], max_results: int) -> list[list[SearchHit]]:
+        with self._lock:
+            self.reload_if_changed()
+            matrices = self._get_matrices()
+
+        if not matrices.ids:
+            return [[] for _ in queries]
+
+        num_terms = len(matrices.idf)
+        max_idf = np.log(1 + len(matrices.ids)) + 1
+
+        query_weights = sparse.lil_matrix((len(queries), num_terms), dtype=np.float32)
+        query_idf = sparse.lil_matrix((len(queries), num_terms), dtype=np.float32)
+        total_idf = np.zeros(len(queries), dtype=np.float32)
+
+        for i, query in enumerate(queries):
+            for term, count in Counter(tokenize(query)).items():
+                column = self.vocab.get(term)
+                if column is None or column >= num_terms:
+                    # 未出现在索引中的词只计入覆盖率的分母。
+                    total_idf[i] += max_idf
+                    continue
+                query_weights[i, column] = (1 + np.log(count)) * matrices.idf[column]
+                query_idf[i, column] = matrices.idf[column]
+                total_idf[i] += matrices.idf[column]
+
+        query_weights = _normalize_rows(query_weights.tocsr())
+        cosine = (matrices.weights @ query_weights.T).toarray()
+        coverage = (matrices.presence @ query_idf.tocsr().T).toarray()
+        coverage /= np.maximum(total_idf, 1e-6)
+        scores = COVERAGE_WEIGHT * coverage + (1 - COVERAGE_WEIGHT) * cosine
+
+        results = []
+        for column in scores.T:
+            k = min(max_results, len(column))
+            top = np.argpartition(-column, k - 1)[:k] if k > 0 else np.array([], dtype=int)
+            top = top[np.argsort(-column[top], kind='stable')]
+            results.append([
+                SearchHit(matrices.ids[row], float(column[row]))
+                for row in top
+                if column[row] > 0
+            ])
+        return results
+
+    def save(self) -> None:
+        with self._lock:
+            if not self.dirty:
+                return
+
+            ids = list(self.rows)
+            counts = self._build_counts(ids)
+            vocab = sorted(self.vocab, key=self.vocab.__getitem__)
+
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_suffix('.tmp.npz')
+            np.savez_compressed(
+                tmp_path,
+                ids=np.array(ids, dtype=str),
+                hashes=np.array([self.hashes.get(entry_id, '') for entry_id in ids], dtype=str),
+                vocab=np.array(vocab, dtype=str),
+                indptr=counts.indptr,
+                indices=counts.indices,
+                data=counts.data,
+            )
+            os.replace(tmp_path, self.path)
+
+            self.dirty = False
+            self._mtime = self.path.stat().st_mtime_ns
+
+    def reload(self) -> None:
+        with self._lock:
+            self.vocab = {}
+            self.rows = {}
+            self.hashes = {}
+            self._matrices = None
+            self._mtime = None
+
+            if not self.path.exists():
+                return
+
+            with np.load(self.path, allow_pickle=False) as archive:
+                ids = archive['ids'].tolist()
+                # 旧版本保存的索引没有哈希，对账时这些条目会被重新上传
+                hashes = archive['hashes'].tolist() if 'hashes' in archive.files else None
+                self.vocab = {term: i for i, term in enumerate(archive['vocab'].tolist())}
+                indptr, indices, data = archive['indptr'], archive['indices'], archive['data']
+
+            for i, entry_id in enumerate(ids):
+                start, end = indptr[i], indptr[i + 1]
+                self.rows[entry_id] = (indices[start:end], data[start:end])
+            self.hashes = dict(zip(ids, hashes or [''] * len(ids)))
+
+            self.dirty = False
+            self._mtime = self.path.stat().st_mtime_ns
+
+    def reload_if_changed(self) -> None:
+        """
+        其他进程（如同步命令）保存索引后，未修改索引的进程重新加载。
+        """
+        if self.dirty or not self.path.exists():
+            return
+        if self.path.stat().st_mtime_ns != self._mtime:
+            self.reload()
+
+    def _get_matrices(self) -> _Matrices:
+        if self._matrices is None:
+            ids = list(self.rows)
+            counts = self._build_counts(ids)
+
+            document_frequency = np.bincount(counts.indices, minlength=counts.shape[1])
+            idf = np.log((1 + len(ids)) / (1 + document_frequency)) + 1
+
+            weights = counts.copy()
+            weights.data = 1 + np.log(weights.data)
+            weights = _normalize_rows(weights.multiply(idf).tocsr())
+
+            presence = counts.copy()
+            presence.data = np.ones_like(presence.data)
+
+            self._matrices = _Matrices(ids, idf.astype(np.float32), weights, presence)
+        return self._matrices
+
+    def _build_counts(self, ids: list[str]) -> sparse.csr_matrix:
+        lengths = [len(self.rows[entry_id][0]) for entry_id in ids]
+        indptr = np.zeros(len(ids) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=indptr[1:])
+
+        if ids:
+            indices = np.concatenate([self.rows[entry_id][0] for entry_id in ids])
+            data = np.concatenate([self.rows[entry_id][1] for entry_id in ids])
+        else:
+            indices = np.zeros(0, dtype=np.int32)
+            data = np.zeros(0, dtype=np.float32)
+
+        return sparse.csr_matrix(
+            (data, indices, indptr), shape=(len(ids), len(self.vocab)), dtype=np.float32)
+
+
+def _normalize_rows(matrix: sparse.csr_matrix) -> sparse.csr_matrix:
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    norms[norms == 0] = 1
+    return sparse.diags(1 / norms).dot(matrix).tocsr()
+
+
+class LocalFeedEngine:
+    """
+    进程内的推荐后端，为 arXiv 论文和 GitHub 仓库各维护一个索引。
+    """
+    KINDS = ('arxiv', 'github')
+
+    def __init__(self, path: Path):
+        self.indexes = {kind: SparseIndex(path / f'{kind}.npz') for kind in self.KINDS}
+
+    def handle(self, path: str, payload: Any) -> tuple[int, Any]:
+        match path.strip('/').split('/'):
+            case [kind, 'search'] if kind in self.indexes:
+                results = self.indexes[kind].search(payload['queries'], payload['max_results'])
+                return 200, [
+                    [{'entry_id': hit.entry_id, 'score': hit.score} for hit in hits]
+                    for hits in results
+                ]
+            case [kind, 'batch'] if kind in self.indexes:
+                self.indexes[kind].add(payload)
+                return 200, {'count': len(payload)}
+            case [kind, 'delete'] if kind in self.indexes:
+                return 200, {'count': self.indexes[kind].remove(payload['entry_ids'])}
+            case [kind, 'digest'] if kind in self.indexes:
+                return 200, {'buckets': self.indexes[kind].digest(payload['buckets'])}
+            case [kind, 'hashes'] if kind in self.indexes:
+                hashes = self.indexes[kind].get_hashes(payload['buckets'], payload['bucket_ids'])
+                return 200, {'hashes': hashes}
+            case ['save']:
+                for index in self.indexes.values():
+                    index.save()
+                return 200, {}
+            case _:
+                return 404, {'detail': f'Unknown endpoint: {path}'}
+
+
+_engines: dict[Path, LocalFeedEngine] = {}
+_engines_lock = threading.Lock()
+
+
+def get_local_engine(path: Path) -> LocalFeedEngine:
+    with _engines_lock:
+        if path not in _engines:
+            _engines[path] = LocalFeedEngine(path)
+        return _engines[path]
+
+
+class LocalFeedEngineAdapter(BaseAdapter):
+    """
+    在进程内处理发往 ``local://`` 地址的请求的 requests 传输适配器，
+    索引保存在 ``FEED_ENGINE_LOCAL_PATH`` 目录下。
+    """
+
+    def send(self, request: requests.PreparedRequest, **kwargs) -> requests.Response:
+        url = requests.utils.urlparse(request.url)
+        body = request.body
+        if body and request.headers.get('Content-Encoding') == 'gzip':
+            body = gzip.decompress(body)
+        payload = json.loads(body) if body else None
+
+        engine = get_local_engine(Path(settings.FEED_ENGINE_LOCAL_PATH))
+        status_code, data = engine.handle(url.path, payload)
+
+        response = requests.Response()
+        response.status_code = status_code
+        response.headers['Content-Type'] = 'application/json'
+        response._content = json.dumps(data).encode()
+        response.encoding = 'utf-8'
+        response.url = request.url
+        response.request = request
+        return response
+
+    def close(self):
+        pass
@@ -0,0 +1,45 @@
+import threading
+from collections import Counter
+
+from drf_spectacular.utils import OpenApiResponse, extend_schema
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAdminUser
+from rest_framework.request import Request
+from rest_framework.response import Response
+
+from .exceptions import ErrorSerializer
+
+_counters: Counter[str] = Counter()
+_lock = threading.Lock()
+
+
+def incr(name: str, value: int = 1) -> None:
+    """
+    增加当前进程中的计数器。
+    """
+    with _lock:
+        _counters[name] += value
+
+
+def get_counters() -> dict[str, int]:
+    """
+    获取当前进程中所有计数器的快照。
+    """
+    with _lock:
+        return dict(_counters)
+
+
+@extend_schema(
+    operation_id='get_metrics',
+    responses={
+        200: OpenApiResponse(description='获取计数器成功'),
+        403: OpenApiResponse(ErrorSerializer, description='无权限'),
+    },
+)
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def get_metrics(request: Request):
+    """
+    获取处理该请求的工作进程的计数器。
+    """
+    return Response(get_counters())
@@ -0,0 +1,214 @@
+import atexit
+import logging
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import Counter, defaultdict
+from typing import Any, Callable, TypeVar
+
+from django.conf import settings
+from django.db import DatabaseError, connections, models, transaction
+from django.db.models import Case, F, Value, When
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+# 每条 UPDATE 语句更新的最大行数。
+FLUSH_BATCH_SIZE = 500
+
+
+class WriteBuffer(ABC):
+    """
+    在内存中累计事件，批量写入数据库的缓冲区。
+
+    距上次写入超过 ``VIEW_COUNT_FLUSH_INTERVAL`` 秒或累计 ``VIEW_COUNT_FLUSH_EVENTS`` 个事件时，
+    由当前请求写入；``start_flush_thread`` 启动的后台线程写入之后没有新事件的缓冲区，
+    进程退出时也会写入一次。进程崩溃时每个进程丢失的事件不超过 ``VIEW_COUNT_FLUSH_EVENTS`` 个，
+    也不超过最近约两个 ``VIEW_COUNT_FLUSH_INTERVAL`` 内记录的事件（后台线程的检查间隔加上空闲时间），
+    以先达到的为准。
+
+    正在写入的事件保存在 ``_in_flight`` 中直到写入提交，读取未写入的增量时需要一并计入。
+    同一时间只有一次写入。
+    """
+
+    instances: list['WriteBuffer'] = []
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._pending = self._new_pending()
+        self._in_flight = None
+        self._events = 0
+        self._last_flush = time.monotonic()
+
+        WriteBuffer.instances.append(self)
+        atexit.register(self.flush)
+
+    @abstractmethod
+    def _new_pending(self) -> Any:
+        """
+        创建空的缓冲区。
+        """
+
+    @abstractmethod
+    def _write(self, pending: Any) -> int:
+        """
+        在一个事务中写入累计的事件，返回写入的行数。
+        """
+
+    @abstractmethod
+    def _restore(self, pending: Any) -> None:
+        """
+        将写入失败的事件合并回缓冲区，在锁内调用。
+        """
+
+    def _record(self, add: Callable[[Any], T]) -> T:
+        """
+        在锁内将事件加入缓冲区，必要时写入数据库，返回 ``add`` 的结果。
+        """
+        with self._lock:
+            result = add(self._pending)
+            self._events += 1
+            should_flush = (
+                self._events >= settings.VIEW_COUNT_FLUSH_EVENTS
+                or time.monotonic() - self._last_flush >= settings.VIEW_COUNT_FLUSH_INTERVAL
+            )
+
+        if should_flush:
+            self.flush()
+        return result
+
+    def flush(self) -> int:
+        """
+        将累计的事件写入数据库，返回写入的行数。写入失败的事件会放回缓冲区。
+        """
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, self._new_pending()
+                events, self._events = self._events, 0
+                self._last_flush = time.monotonic()
+                if not pending:
+                    return 0
+                self._in_flight = pending
+
+            try:
+                written = self._write(pending)
+            except DatabaseError:
+                logger.exception('%s failed to flush', type(self).__name__)
+                with self._lock:
+                    self._in_flight = None
+                    self._events += events
+                    self._restore(pending)
+                return 0
+
+            with self._lock:
+                self._in_flight = None
+            return written
+
+    def flush_if_idle(self, interval: float) -> int:
+        """
+        距上次写入超过 ``interval`` 秒时写入累计的事件。
+        """
+        with self._lock:
+            due = self._events > 0 and time.monotonic() - self._last_flush >= interval
+        return self.flush() if due else 0
+
+    def clear(self) -> None:
+        """
+        丢弃累计的事件，用于测试。
+        """
+        with self._lock:
+            self._pending = self._new_pending()
+            self._events = 0
+            self._in_flight = None
+
+
+def clear_write_buffers() -> None:
+    """
+    丢弃所有缓冲区中累计的事件，测试在开始和结束时调用，避免事件被写入其他测试的数据库。
+    """
+    for buffer in WriteBuffer.instances:
+        buffer.clear()
+
+
+_flush_thread = None
+
+
+def start_flush_thread() -> None:
+    """
+    启动后台线程，每隔 ``VIEW_COUNT_FLUSH_INTERVAL`` 秒写入一段时间内没有新事件的缓冲区，
+    避免访问量低时事件长时间停留在内存中。每个进程只启动一次，需要在 fork 之后调用。
+    """
+    global _flush_thread
+    if _flush_thread is not None:
+        return
+
+    def run():
+        interval = settings.VIEW_COUNT_FLUSH_INTERVAL
+        while True:
+            time.sleep(interval)
+            try:
+                for buffer in WriteBuffer.instances:
+                    buffer.flush_if_idle(interval)
+            except Exception:
+                logger.exception('Background flush failed')
+            finally:
+                connections.close_all()
+
+    _flush_thread = threading.Thread(target=run, name='write-buffer-flush', daemon=True)
+    _flush_thread.start()
+
+
+class ViewCountBuffer(WriteBuffer):
+    """
+    在内存中累计浏览次数，每个模型用一条 ``UPDATE ... CASE`` 语句批量写入。
+    """
+
+    def _new_pending(self) -> defaultdict[type[models.Model], Counter[Any]]:
+        return defaultdict(Counter)
+
+    def _write(self, pending: defaultdict[type[models.Model], Counter[Any]]) -> int:
+        with transaction.atomic():
+            return sum(flush_view_counts(model, deltas) for model, deltas in pending.items())
+
+    def _restore(self, pending: defaultdict[type[models.Model], Counter[Any]]) -> None:
+        for model, deltas in pending.items():
+            self._pending[model].update(deltas)
+
+    def incr(self, model: type[models.Model], pk: Any) -> int:
+        """
+        记录一次浏览，返回该对象尚未计入读取时数据库中浏览次数的增量（包括本次），
+        包括正在写入但尚未提交的增量。
+        """
+        def add(pending: defaultdict[type[models.Model], Counter[Any]]) -> int:
+            pending[model][pk] += 1
+            in_flight = self._in_flight.get(model, {}).get(pk, 0) if self._in_flight else 0
+            return pending[model][pk] + in_flight
+
+        return self._record(add)
+
+
+def flush_view_counts(model: type[models.Model], deltas: Counter[Any]) -> int:
+    """
+    用 ``UPDATE ... CASE`` 语句批量增加浏览次数，增量相同的对象共用一个分支。
+    """
+    items = list(deltas.items())
+    updated = 0
+    for i in range(0, len(items), FLUSH_BATCH_SIZE):
+        pks_by_delta: dict[int, list[Any]] = {}
+        for pk, delta in items[i:i + FLUSH_BATCH_SIZE]:
+            pks_by_delta.setdefault(delta, []).append(pk)
+
+        increment = Case(
+            *(When(pk__in=pks, then=Value(delta)) for delta, pks in pks_by_delta.items()),
+            default=Value(0),
+            output_field=models.IntegerField(),
+        )
+        updated += model.objects.filter(
+            pk__in=[pk for pks in pks_by_delta.values() for pk in pks],
+        ).update(view_count=F('view_count') + increment)
+    return updated
+
+
+view_counts = ViewCountBuffer()
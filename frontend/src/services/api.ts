@@ -258,6 +258,19 @@ export interface GithubHistory extends BaseHistory {
 
 export type History = ArxivHistory | GithubHistory
 
+export interface CursorPage<T> {
+  next: string | null
+  previous?: string | null
+  results: T[]
+}
+
+/** Extract the cursor query parameter from a `next` link. */
+export function getCursor(next: string | null) {
+  return next
+    ? new URL(next, window.location.origin).searchParams.get('cursor')
+    : null
+}
+
 export interface Comment {
   id: number
   /** arxiv_id or String(repo_id) */
@@ -270,6 +283,13 @@ export interface Comment {
   vote_count: number
   user_vote: number
   replies: Comment[]
+  /** Link to the remaining replies, null if all replies are included */
+  replies_next: string | null
+}
+
+export enum CommentOrdering {
+  New = 'new',
+  Top = 'top',
 }
 
 export interface CommentRequest {
@@ -357,6 +377,8 @@ export const URLS = {
     `/v1/comments/${origin}/${resource}/${commentId}/`,
   commentVote: (origin: FeedOrigin, resource: string, commentId: number) =>
     `/v1/comments/${origin}/${resource}/${commentId}/vote/`,
+  commentReplies: (origin: FeedOrigin, resource: string, commentId: number) =>
+    `/v1/comments/${origin}/${resource}/${commentId}/replies/`,
 
   resourceClaim: (origin: FeedOrigin, resource: string) =>
     `/v1/pub/claim/${origin}/${resource}`,
@@ -500,8 +522,12 @@ export function manageCollectionGroupItems(
   return client.post<void>(URLS.collectionGroupManageItems(groupId), payload)
 }
 
-export function getHistory() {
-  return client.get<History[]>(URLS.history)
+export function getHistory(cursor?: string | null) {
+  return client.get<CursorPage<History>>(URLS.history, {
+    params: {
+      cursor: cursor ?? undefined,
+    },
+  })
 }
 
 export function getHistoryItem(id: number) {
@@ -512,8 +538,34 @@ export function removeHistoryItem(id: number) {
   return client.delete<void>(URLS.historyItem(id))
 }
 
-export function getComments(origin: FeedOrigin, resource: string) {
-  return client.get<Comment[]>(URLS.comments(origin, resource))
+export function getComments(
+  origin: FeedOrigin,
+  resource: string,
+  ordering: CommentOrdering = CommentOrdering.New,
+  cursor?: string | null,
+) {
+  return client.get<CursorPage<Comment>>(URLS.comments(origin, resource), {
+    params: {
+      ordering,
+      cursor: cursor ?? undefined,
+    },
+  })
+}
+
+export function getCommentReplies(
+  origin: FeedOrigin,
+  resource: string,
+  commentId: number,
+  cursor?: string | null,
+) {
+  return client.get<CursorPage<Comment>>(
+    URLS.commentReplies(origin, resource, commentId),
+    {
+      params: {
+        cursor: cursor ?? undefined,
+      },
+    },
+  )
 }
 
 export function postComment(